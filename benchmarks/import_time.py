@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Measure the import time of the public entry points.
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+and the median of the cumulative import time is reported.
+
+Usage: python3 benchmarks/import_time.py [--runs N] [--max-ms MS] [module ...]
+
+With --max-ms, exits with an error if any module takes longer to import.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = [
+    "protonvpn_nm_lib.api",
+    "protonvpn_nm_lib.core.session",
+    "protonvpn_nm_lib.core.servers",
+]
+
+
+def import_time_us(module):
+    """Get the cumulative import time of module, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError("Could not import {}:\n{}".format(
+            module, result.stderr
+        ))
+
+    # import time: self [us] | cumulative | imported package
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+
+    raise RuntimeError("No import time reported for {}".format(module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    too_slow = []
+    for module in args.modules:
+        median_ms = statistics.median(
+            import_time_us(module) for _ in range(args.runs)
+        ) / 1000
+        print("{:<40} {:>8.1f} ms".format(module, median_ms))
+        if args.max_ms is not None and median_ms > args.max_ms:
+            too_slow.append(module)
+
+    if too_slow:
+        print("Slower than {} ms: {}".format(args.max_ms, ", ".join(too_slow)))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,10 @@ from .core.country import Country
 from .core.environment import ExecutionEnvironment
 from .core.status import Status
 from .core.utilities import Utilities
-from .core.report import BugReport
-from .enums import (ConnectionMetadataEnum, ConnectionTypeEnum, FeatureEnum,
-                    MetadataEnum, ServerTierEnum, KillswitchStatusEnum)
+from .enums import (ConnectionMetadataEnum, ConnectionStartStatusEnum,
+                    ConnectionTypeEnum, FeatureEnum, MetadataEnum,
+                    ServerTierEnum, KillswitchStatusEnum,
+                    VPNConnectionStateEnum)
 from .logger import logger
 
 
@@ -16,7 +17,8 @@ class ProtonVPNClientAPI:
         self._env = ExecutionEnvironment()
         self._country = Country()
         self._utils = Utilities
-        self._bug_report = BugReport()
+        self.__bug_report = None
+        self.__last_setup = None
 
     def __set_netzone_address(self):
         new_ip = self._env.api_session.get_location_data().ip
@@ -39,6 +41,9 @@ class ProtonVPNClientAPI:
     def logout(self):
         """Logout user and delete current user session."""
         self._env.api_session.logout()
+        # Forget the connections prepared with the credentials
+        self._env.connection_backend.clear_profiles()
+        self.__last_setup = None
         try:
             self.disconnect()
         except exceptions.ConnectionNotFound:
@@ -52,6 +57,14 @@ class ProtonVPNClientAPI:
         """
         connect_result = self._env.connection_backend.connect()
         self._env.connection_metadata.save_connect_time()
+        if (
+            self._env.connection_backend.use_profile_pool
+            and self.__last_setup is not None
+            and connect_result.get(ConnectionStartStatusEnum.STATE)
+            == VPNConnectionStateEnum.IS_ACTIVE
+        ):
+            self.__prepare_next_connections()
+
         return connect_result
 
     def disconnect(self):
@@ -125,15 +138,75 @@ class ProtonVPNClientAPI:
         server = connect_configurations[connection_type](
             _connection_type_extra_arg,
         )
+        physical_server = self.__get_physical_server(server)
+
+        if self._env.settings.killswitch != KillswitchStatusEnum.DISABLED:
+            # The routed kill switch of the chosen server comes first, the
+            # other ones are ready if it has to be reconnected elsewhere
+            self._env.killswitch.prebuild_routes([physical_server.entry_ip] + [
+                candidate.entry_ip for candidate in server.physical_servers
+                if candidate.enabled
+                and candidate.entry_ip != physical_server.entry_ip
+            ])
+
+        data = self.__get_setup_data(server, physical_server)
+        # Both metadata files are only read and written once
+        with self._env.connection_metadata.batch():
+            self._env.connection_metadata.save_servername(server.name)
+            self._env.connection_metadata.save_protocol(_protocol)
+            self._env.connection_metadata.save_display_server_ip(
+                physical_server.exit_ip
+            )
+            self._env.connection_metadata.save_server_ip(
+                physical_server.entry_ip
+            )
+
+        logger.info("Stored metadata to file")
+        configuration = physical_server.get_configuration(_protocol)
+        logger.info("Received configuration object")
+        self._env.connection_backend.vpn_configuration = configuration
+
+        logger.info("Setting up {}".format(server.name))
+        self._env.connection_backend.setup(**data)
+        self.__last_setup = (server, physical_server, _protocol)
+        return server
+
+    def __get_physical_server(self, server):
+        """Pick a physical server of a logical server, preferring one
+        with a prepared connection.
+
+        Returns:
+            PhysicalServer
+        """
+        prepared_domains = self._env.connection_backend.get_prepared_domains()
+        if prepared_domains:
+            for physical_server in server.physical_servers:
+                if not physical_server.enabled:
+                    continue
+
+                self._env.api_session.servers.match_server_domain(
+                    physical_server
+                )
+                if physical_server.domain in prepared_domains:
+                    logger.info("Picked prepared {}".format(physical_server))
+                    return physical_server
+
         physical_server = server.get_random_physical_server()
         self._env.api_session.servers.match_server_domain(physical_server)
+        return physical_server
 
+    def __get_setup_data(self, server, physical_server):
+        """Get the connection backend setup() arguments.
+
+        Returns:
+            dict
+        """
         openvpn_username = self._env.api_session.vpn_username
         if physical_server.label:
             openvpn_username = openvpn_username + "+b:" + physical_server.label
             logger.info("Appended server label.")
 
-        data = {
+        return {
             "domain": physical_server.domain,
             "entry_ip": physical_server.entry_ip,
             "servername": server.name,
@@ -142,21 +215,50 @@ class ProtonVPNClientAPI:
                 "ovpn_password": self._env.api_session.vpn_password
             },
         }
-        self._env.connection_metadata.save_servername(server.name)
-        self._env.connection_metadata.save_protocol(_protocol)
-        self._env.connection_metadata.save_display_server_ip(
-            physical_server.exit_ip
-        )
-        self._env.connection_metadata.save_server_ip(physical_server.entry_ip)
 
-        logger.info("Stored metadata to file")
-        configuration = physical_server.get_configuration(_protocol)
-        logger.info("Received configuration object")
-        self._env.connection_backend.vpn_configuration = configuration
+    def __prepare_next_connections(self):
+        """Let the connection backend prepare the connections to the
+        servers likely to be connected to next: the current one, the
+        fastest one in its country and the fastest one."""
+        server, physical_server, protocol = self.__last_setup
+        candidates = [(server, physical_server)]
+        for get_server, extra_arg in [
+            (self.config_for_fastest_server_in_country, server.exit_country),
+            (self.config_for_fastest_server, None),
+        ]:
+            try:
+                candidate = get_server(extra_arg)
+            except exceptions.ProtonVPNException as e:
+                logger.info("No candidate to prepare: {}".format(e))
+                continue
+
+            if candidate.name not in [
+                candidate_server.name for candidate_server, _ in candidates
+            ]:
+                candidates.append(
+                    (candidate, self.__get_physical_server(candidate))
+                )
 
-        logger.info("Setting up {}".format(server.name))
-        self._env.connection_backend.setup(**data)
-        return server
+        self._env.connection_backend.prepare_profiles([
+            (
+                candidate_physical_server.get_configuration(protocol),
+                self.__get_setup_data(candidate, candidate_physical_server)
+            ) for candidate, candidate_physical_server in candidates
+        ])
+
+    def __secure_core_criteria(self, secure_core):
+        """Get the feature criteria matching the secure core setting.
+
+        Args:
+            secure_core (bool)
+
+        Returns:
+            dict: kwargs for ServerList.filter_by()
+        """
+        if secure_core:
+            return {"features": FeatureEnum.SECURE_CORE}
+
+        return {"excluded_features": FeatureEnum.SECURE_CORE | FeatureEnum.TOR}
 
     def config_for_fastest_free_server(self, *_):
         """Select fastest server.
@@ -167,8 +269,8 @@ class ProtonVPNClientAPI:
         secure_core = bool(self._env.settings.secure_core.value)
         logger.info("Fastest with secure core \"{}\"".format(secure_core))
         try:
-            return self._env.api_session.servers.filter(
-                lambda server: server.tier == ServerTierEnum.FREE.value
+            return self._env.api_session.servers.filter_by(
+                max_tier=ServerTierEnum.FREE.value
             ).get_fastest_server()
         except exceptions.EmptyServerListError:
             raise exceptions.FastestServerNotFound(
@@ -184,17 +286,9 @@ class ProtonVPNClientAPI:
         secure_core = bool(self._env.settings.secure_core.value)
         logger.info("Fastest with secure core \"{}\"".format(secure_core))
         try:
-            return self._env.api_session.servers.filter(
-                lambda server:
-                    server.tier <= ExecutionEnvironment().api_session.vpn_tier
-                    and (
-                        secure_core
-                        and FeatureEnum.SECURE_CORE in server.features
-                    ) or (
-                        not secure_core
-                        and FeatureEnum.SECURE_CORE not in server.features
-                        and FeatureEnum.TOR not in server.features
-                    )
+            return self._env.api_session.servers.filter_by(
+                max_tier=ExecutionEnvironment().api_session.vpn_tier,
+                **self.__secure_core_criteria(secure_core)
             ).get_fastest_server()
         except exceptions.EmptyServerListError:
             raise exceptions.FastestServerNotFound(
@@ -210,20 +304,10 @@ class ProtonVPNClientAPI:
         secure_core = bool(self._env.settings.secure_core.value)
         logger.info("Country with secure core \"{}\"".format(secure_core))
         try:
-            return self._env.api_session.servers.filter(
-                lambda server:
-                server.tier <= ExecutionEnvironment().api_session.vpn_tier
-                and server.exit_country.lower() == country_code.lower()
-                and (
-                    (
-                        secure_core
-                        and FeatureEnum.SECURE_CORE in server.features
-                    ) or (
-                        not secure_core
-                        and FeatureEnum.SECURE_CORE not in server.features
-                        and FeatureEnum.TOR not in server.features
-                    )
-                )
+            return self._env.api_session.servers.filter_by(
+                max_tier=ExecutionEnvironment().api_session.vpn_tier,
+                exit_country=country_code,
+                **self.__secure_core_criteria(secure_core)
             ).get_fastest_server()
         except exceptions.EmptyServerListError:
             raise exceptions.FastestServerInCountryNotFound(
@@ -252,16 +336,9 @@ class ProtonVPNClientAPI:
             if f in connection_type_translation
         ]
         try:
-            return self._env.api_session.servers.filter(
-                lambda server: (
-                    server.tier <= ExecutionEnvironment().api_session.vpn_tier
-                    and all(
-                        chosen_feature
-                        in server.features
-                        for chosen_feature
-                        in possible_features
-                    )
-                )
+            return self._env.api_session.servers.filter_by(
+                max_tier=ExecutionEnvironment().api_session.vpn_tier,
+                features=sum(possible_features)
             ).get_fastest_server()
         except exceptions.EmptyServerListError:
             raise exceptions.FeatureServerNotFound(
@@ -277,10 +354,9 @@ class ProtonVPNClientAPI:
             LogicalServer
         """
         try:
-            return self._env.api_session.servers.filter(
-                lambda server:
-                server.tier <= ExecutionEnvironment().api_session.vpn_tier
-                and server.name.lower() == servername.lower() # noqa
+            return self._env.api_session.servers.filter_by(
+                max_tier=ExecutionEnvironment().api_session.vpn_tier,
+                name=servername
             ).get_fastest_server()
         except exceptions.EmptyServerListError:
             raise exceptions.ServernameServerNotFound(
@@ -417,7 +493,27 @@ class ProtonVPNClientAPI:
 
     def get_bug_report(self):
         """Get bug report object."""
-        return self._bug_report
+        if self.__bug_report is None:
+            from .core.report import BugReport
+            self.__bug_report = BugReport()
+
+        return self.__bug_report
+
+
+class LazyProtonVPNClientAPI:
+    """Create the ProtonVPNClientAPI on first use.
+
+    So that importing this module (ie to show the help of a frontend)
+    doesn't set up the execution environment.
+    """
+    def __init__(self):
+        self.__client_api = None
+
+    def __getattr__(self, name):
+        if self.__client_api is None:
+            self.__client_api = ProtonVPNClientAPI()
+
+        return getattr(self.__client_api, name)
 
 
-protonvpn = ProtonVPNClientAPI() # noqa
+protonvpn = LazyProtonVPNClientAPI() # noqa
@@ -97,6 +97,10 @@ PROTON_XDG_CACHE_HOME_NOTIFICATION_ICONS = os.path.join(PROTON_XDG_CACHE_HOME, "
 XDG_CONFIG_SYSTEMD = os.path.join(XDG_CONFIG_HOME, "systemd")
 XDG_CONFIG_SYSTEMD_USER = os.path.join(XDG_CONFIG_SYSTEMD, "user")
 TEMPLATES = os.path.join(PWD, "templates")
+# Same as the NetworkManager OpenVPN plugin, readable by its service
+NM_OPENVPN_CERT_DIR = os.path.join(
+    os.path.expanduser("~"), ".cert", "nm-openvpn"
+)
 
 # Constant filepaths
 APP_CONFIG = os.path.join(PWD, "app.cfg")
@@ -110,9 +114,19 @@ LOCAL_SERVICE_FILEPATH = os.path.join(
 CACHED_SERVERLIST = os.path.join(
     PROTON_XDG_CACHE_HOME, "cached_serverlist.json"
 )
+CACHED_SERVERLIST_BINARY = os.path.join(
+    PROTON_XDG_CACHE_HOME, "cached_serverlist.bin"
+)
+CACHED_SERVERLIST_LOADS = os.path.join(
+    PROTON_XDG_CACHE_HOME, "cached_serverlist_loads.json"
+)
 CACHED_OPENVPN_CERTIFICATE = os.path.join(
     PROTON_XDG_CACHE_HOME, "ProtonVPN.ovpn"
 )
+OPENVPN_CA_FILEPATH = os.path.join(NM_OPENVPN_CERT_DIR, "ProtonVPN-ca.pem")
+OPENVPN_TLS_CRYPT_FILEPATH = os.path.join(
+    NM_OPENVPN_CERT_DIR, "ProtonVPN-tls-crypt.pem"
+)
 CACHE_METADATA_FILEPATH = os.path.join(
     PROTON_XDG_CACHE_HOME, "cache_metadata.json"
 )
@@ -137,6 +151,10 @@ STREAMING_ICONS_CACHE_TIME_PATH = os.path.join(
 NETZONE_METADATA_FILEPATH = os.path.join(
     PROTON_XDG_CACHE_HOME, "netzone.json"
 )
+CACHE_SERVICE_SOCKET_PATH = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR", PROTON_XDG_CACHE_HOME),
+    "protonvpn-cache.sock"
+)
 USER_CONFIGURATIONS_FILEPATH = os.path.join(
     PROTON_XDG_CONFIG_HOME, "user_configurations.json"
 )
@@ -1,5 +1,6 @@
-import configparser
 import os
+import sys
+import threading
 from ..constants import APP_CONFIG, APP_VERSION, LOGGER_NAME
 
 
@@ -20,6 +21,8 @@ def set_exception_catcher():
 
 
 def configure_sentry(ignore_logger, sentry_sdk):
+    import configparser
+
     ignore_logger(LOGGER_NAME)
     config = configparser.ConfigParser()
     config.read(APP_CONFIG)
@@ -34,4 +37,59 @@ def configure_sentry(ignore_logger, sentry_sdk):
     )
 
 
-capture_exception = set_exception_catcher()
+_capture_exception = None
+
+
+def capture_exception(e):
+    """Report an exception.
+
+    sentry is only imported and configured on first use, as
+    it is slow to import and most processes never report anything.
+    """
+    global _capture_exception
+    if _capture_exception is None:
+        _capture_exception = set_exception_catcher()
+
+    _capture_exception(e)
+
+
+def install_excepthooks():
+    """Report uncaught exceptions, in the main thread and in threads.
+
+    As sentry is configured lazily, its excepthook and threading
+    integrations are only installed once something was reported. Until
+    then, these hooks report uncaught exceptions. Once sentry is
+    configured, its own hooks report them and these only chain to the
+    previous hooks.
+    """
+    previous_excepthook = sys.excepthook
+    # threading.excepthook is only available since Python 3.8
+    previous_threading_excepthook = getattr(threading, "excepthook", None)
+
+    def report(exc_type, exc_value):
+        if (
+            _capture_exception is not None
+            or exc_value is None
+            or not issubclass(exc_type, Exception)
+        ):
+            return
+
+        try:
+            capture_exception(exc_value)
+        except Exception:
+            pass
+
+    def excepthook(exc_type, exc_value, exc_traceback):
+        report(exc_type, exc_value)
+        previous_excepthook(exc_type, exc_value, exc_traceback)
+
+    def threading_excepthook(args):
+        report(args.exc_type, args.exc_value)
+        previous_threading_excepthook(args)
+
+    sys.excepthook = excepthook
+    if previous_threading_excepthook is not None:
+        threading.excepthook = threading_excepthook
+
+
+install_excepthooks()
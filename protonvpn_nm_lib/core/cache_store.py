@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from ..logger import logger
+from .utils import Singleton
+
+
+class CacheStore(metaclass=Singleton):
+    """Crash-safe writer for cache and metadata files.
+
+    - Files are written to a temporary file which is then renamed,
+      so that a crash never leaves a torn file behind (and mmaped files
+      are never truncated under a reader).
+    - Writes with the same content as the file on disk are skipped.
+    - The temporary file is fsynced before it is renamed, unless the
+      caller opts out (ie for large caches which can be fetched again).
+
+    This is a singleton.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # filepath => (digest, (mtime_ns, size)) of what was last written
+        self.__written = {}
+
+    def write(self, filepath, content, fsync=True):
+        """Write content to filepath.
+
+        Args:
+            filepath (string)
+            content (string|bytes)
+            fsync (bool): (optional) flush the content to disk before
+                replacing the file. Without it, a power loss right
+                after the write might leave an empty file behind
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        self.__write(filepath, content, fsync)
+
+    def read(self, filepath, binary=False):
+        """Read filepath.
+
+        Raises:
+            FileNotFoundError
+        """
+        with open(filepath, "rb") as f:
+            content = f.read()
+
+        return content if binary else content.decode("utf-8")
+
+    def remove(self, filepath):
+        """Remove filepath, if it exists."""
+        self.__remove(filepath)
+
+    def __remove(self, filepath):
+        with self.__lock:
+            self.__written.pop(filepath, None)
+
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    def __write(self, filepath, content, fsync):
+        digest = hashlib.sha1(content).digest()
+        if self.__is_unchanged(filepath, content, digest):
+            logger.debug("\"{}\" is unchanged, skip write".format(filepath))
+            return
+
+        directory, filename = os.path.split(filepath)
+        fd, tmp_filepath = tempfile.mkstemp(
+            prefix=filename + ".", suffix=".tmp", dir=directory or None
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_filepath, filepath)
+        except: # noqa
+            try:
+                os.remove(tmp_filepath)
+            except FileNotFoundError:
+                pass
+            raise
+
+        with self.__lock:
+            self.__written[filepath] = (digest, self.__signature(filepath))
+
+    def __is_unchanged(self, filepath, content, digest):
+        signature = self.__signature(filepath)
+        if signature is None:
+            return False
+
+        with self.__lock:
+            written = self.__written.get(filepath)
+
+        if written is not None and written[1] == signature:
+            return written[0] == digest
+
+        # Unknown (or externally modified) file, compare
+        # the content only if the size matches
+        if signature[1] != len(content):
+            return False
+
+        try:
+            with open(filepath, "rb") as f:
+                return f.read() == content
+        except OSError:
+            return False
+
+    def __signature(self, filepath):
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size
@@ -52,6 +52,11 @@ class ClientConfig:
         data["ClientConfigUpdateTimestamp"] = time.time()
         self.data = data
 
+    def touch_client_config_data(self):
+        """Mark the cached client config as up to date, ie when the API
+        reported it as not modified."""
+        self.__data["ClientConfigUpdateTimestamp"] = time.time()
+
     @property
     def client_config_timestamp(self):
         try:
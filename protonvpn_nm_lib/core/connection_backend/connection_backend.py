@@ -4,6 +4,8 @@ from ...logger import logger
 
 
 class ConnectionBackend(SubclassesMixin, metaclass=ABCMeta):
+    # If the backend prepares connections ahead of time
+    use_profile_pool = False
 
     @classmethod
     def get_backend(cls, backend_client="networkmanager"):
@@ -64,3 +66,27 @@ class ConnectionBackend(SubclassesMixin, metaclass=ABCMeta):
     def disconnect():
         """Setup VPN connection."""
         pass
+
+    def prepare_profiles(self, candidates):
+        """Prepare the connections of the servers likely to be connected
+        to next, if the backend supports it.
+
+        Args:
+            candidates (list(tuple(VPNConfiguration, dict))): VPN
+                configurations and setup() keyword arguments,
+                most likely first
+        """
+        pass
+
+    def get_prepared_domains(self):
+        """Get the domains of the physical servers with a
+        prepared connection.
+
+        Returns:
+            set(string)
+        """
+        return set()
+
+    def clear_profiles(self):
+        """Forget the prepared connections, ie on logout."""
+        pass
@@ -19,11 +19,15 @@ from .plugin import NMPlugin
 
 class NetworkManagerClient(ConnectionBackend, NMClientMixin):
     client = "networkmanager"
+    # Prepare the connections of the next likely servers in the
+    # background, see ProfilePool
+    use_profile_pool = False
 
     def __init__(self, daemon_reconnector=None):
         super().__init__()
         self.__virtual_device_name = VIRTUAL_DEVICE_NAME
         self.__vpn_configuration = None
+        self.__profile_pool = None
         self.daemon_reconnector = DbusReconnect()
 
     @property
@@ -48,17 +52,28 @@ class NetworkManagerClient(ConnectionBackend, NMClientMixin):
         """
         logger.info("Adding VPN connection")
 
-        connection, protocol_implementation = NMPlugin.import_vpn_config(
-            self.vpn_configuration
-        )
+        connection_data = self.__get_connection_data(**kwargs)
+        connection = None
+        if self.use_profile_pool:
+            connection = self.profile_pool.take(
+                self.vpn_configuration, connection_data
+            )
+        if connection is None:
+            connection = self.prepare_connection(
+                self.vpn_configuration, connection_data
+            )
 
         try:
             self.disconnect()
         except: # noqa
             pass
 
+        self._pre_setup_connection(kwargs.get("entry_ip"))
+        self._add_connection_async(connection)
+
+    def __get_connection_data(self, **kwargs):
         credentials = kwargs.get("credentials")
-        connection_data = {
+        return {
             "user_data": {
                 "username": credentials.get("ovpn_username"),
                 "password": credentials.get("ovpn_password")
@@ -66,9 +81,26 @@ class NetworkManagerClient(ConnectionBackend, NMClientMixin):
             "domain": kwargs.get("domain"),
             "servername": kwargs.get("servername"),
             "virtual_device_name": self.virtual_device_name,
-            "vpn_configuration": self.vpn_configuration,
         }
 
+    def prepare_connection(self, vpn_configuration, connection_data):
+        """Import a VPN configuration and configure it.
+
+        Args:
+            vpn_configuration (VPNConfiguration)
+            connection_data (dict): user_data (username and password),
+                domain, servername and virtual_device_name
+
+        Returns:
+            NM.SimpleConnection
+        """
+        connection, protocol_implementation = NMPlugin.import_vpn_config(
+            vpn_configuration
+        )
+
+        connection_data = dict(
+            connection_data, vpn_configuration=vpn_configuration
+        )
         if protocol_implementation == ProtocolImplementationEnum.OPENVPN:
             from .openvpn.configure_openvpn_connection import \
                 ConfigureOpenVPNConnection
@@ -78,8 +110,40 @@ class NetworkManagerClient(ConnectionBackend, NMClientMixin):
         else:
             raise NotImplementedError("Other implementationsa are not ready")
 
-        self._pre_setup_connection(kwargs.get("entry_ip"))
-        self._add_connection_async(connection)
+        return connection
+
+    @property
+    def profile_pool(self):
+        if self.__profile_pool is None:
+            from .profile_pool import ProfilePool
+            self.__profile_pool = ProfilePool(self.prepare_connection)
+        return self.__profile_pool
+
+    def prepare_profiles(self, candidates):
+        """Prepare the connections of the servers likely to be connected
+        to next, in the background, if the profile pool is used.
+
+        Args:
+            candidates (list(tuple(VPNConfiguration, dict))): VPN
+                configurations and setup() keyword arguments,
+                most likely first
+        """
+        if self.use_profile_pool:
+            self.profile_pool.prepare([
+                (vpn_configuration, self.__get_connection_data(**kwargs))
+                for vpn_configuration, kwargs in candidates
+            ])
+
+    def clear_profiles(self):
+        """Forget the prepared connections, ie on logout."""
+        if self.__profile_pool is not None:
+            self.__profile_pool.clear()
+
+    def get_prepared_domains(self):
+        if not self.use_profile_pool:
+            return set()
+
+        return self.profile_pool.get_prepared_domains()
 
     def connect(self, attempt_reconnect=False):
         """Connect to VPN.
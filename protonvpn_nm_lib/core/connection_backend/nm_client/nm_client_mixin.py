@@ -5,12 +5,19 @@ gi.require_version("NM", "1.0")
 from gi.repository import NM, GLib
 
 from ....logger import logger
+from ...dbus.dbus_network_manager_wrapper import NetworkManagerUnitWrapper
+from ...environment import ExecutionEnvironment
 
 
 class NMClientMixin:
-    nm_client = NM.Client.new(None)
     main_loop = GLib.MainLoop()
 
+    @property
+    def nm_client(self):
+        # Shared, and only created (a full sync with
+        # NetworkManager) when first needed
+        return ExecutionEnvironment().nm_client
+
     def _add_connection_async(self, connection):
         self.nm_client.add_connection_async(
             connection,
@@ -123,4 +130,8 @@ class NMClientMixin:
         except Exception as e:
             logger.exception("Exception: {}".format(e))
 
+        # NetworkManager snapshots taken through D-Bus
+        # don't reflect the change
+        NetworkManagerUnitWrapper.invalidate_all_snapshots()
+
         self.main_loop.quit()
@@ -0,0 +1,166 @@
+import os
+import re
+from functools import lru_cache
+
+import gi
+
+gi.require_version("NM", "1.0")
+from gi.repository import NM
+
+from .....constants import (NM_OPENVPN_CERT_DIR, OPENVPN_CA_FILEPATH,
+                            OPENVPN_TEMPLATE, OPENVPN_TLS_CRYPT_FILEPATH,
+                            TEMPLATES)
+from .....logger import logger
+
+
+class BuildOpenVPNConnection:
+    """Build an OpenVPN connection from a VPN configuration, with the
+    same settings the OpenVPN editor plugin would import from the
+    configuration file generated from the template.
+
+    The inline CA and tls-crypt key of the template are written
+    to NM_OPENVPN_CERT_DIR, as the plugin only accepts their paths.
+    """
+    # Directives of the template, as NetworkManager OpenVPN data items
+    VPN_DATA = {
+        "connection-type": "password",
+        "remote-random": "yes",
+        "cipher": "AES-256-GCM",
+        "verb": "3",
+        "tunnel-mtu": "1500",
+        "mssfix": "0",
+        "reneg-seconds": "0",
+        "remote-cert-tls": "server",
+        "dev-type": "tun",
+    }
+
+    @staticmethod
+    def build_connection(vpn_configuration, service_type):
+        """Build a connection.
+
+        Args:
+            vpn_configuration (VPNConfigurationOpenVPN)
+            service_type (string): service of the OpenVPN plugin
+
+        Returns:
+            NM.SimpleConnection
+        """
+        logger.info("Building OpenVPN connection")
+        connection = NM.SimpleConnection.new()
+
+        conn_settings = NM.SettingConnection.new()
+        conn_settings.props.id = "Proton VPN"
+        conn_settings.props.uuid = NM.utils_uuid_generate()
+        conn_settings.props.type = NM.SETTING_VPN_SETTING_NAME
+        connection.add_setting(conn_settings)
+
+        vpn_settings = NM.SettingVpn.new()
+        vpn_settings.props.service_type = service_type
+        for key, value in BuildOpenVPNConnection.get_vpn_data(
+            vpn_configuration
+        ).items():
+            vpn_settings.add_data_item(key, value)
+        connection.add_setting(vpn_settings)
+
+        ipv4_config = NM.SettingIP4Config.new()
+        ipv4_config.props.method = NM.SETTING_IP4_CONFIG_METHOD_AUTO
+        connection.add_setting(ipv4_config)
+
+        ipv6_config = NM.SettingIP6Config.new()
+        ipv6_config.props.method = NM.SETTING_IP6_CONFIG_METHOD_AUTO
+        connection.add_setting(ipv6_config)
+
+        return connection
+
+    @staticmethod
+    def get_vpn_data(vpn_configuration):
+        """Get the data items of a VPN configuration.
+
+        Args:
+            vpn_configuration (VPNConfigurationOpenVPN)
+
+        Returns:
+            dict
+        """
+        vpn_data = dict(BuildOpenVPNConnection.VPN_DATA)
+        vpn_data["remote"] = ", ".join(
+            "{}:{}".format(vpn_configuration.entry_ip, port)
+            for port in vpn_configuration.ports
+        )
+        if vpn_configuration.openvpn_protocol_name == "tcp":
+            vpn_data["proto-tcp"] = "yes"
+
+        inline_files = _write_inline_files()
+        vpn_data["ca"] = inline_files["ca"]
+        vpn_data["tls-crypt"] = inline_files["tls-crypt"]
+
+        return vpn_data
+
+
+# Inline files whose content was checked by this process
+_checked_inline_files = set()
+
+
+@lru_cache(maxsize=None)
+def _get_inline_files():
+    """Extract the inline files of the template.
+
+    Returns:
+        dict: paths and contents by directive (ca and tls-crypt)
+    """
+    with open(os.path.join(TEMPLATES, OPENVPN_TEMPLATE), "r") as f:
+        template = f.read()
+
+    inline_files = {}
+    for directive, filepath in [
+        ("ca", OPENVPN_CA_FILEPATH),
+        ("tls-crypt", OPENVPN_TLS_CRYPT_FILEPATH),
+    ]:
+        match = re.search(
+            r"<{0}>\n(.*?)</{0}>".format(directive), template, re.DOTALL
+        )
+        if match is None:
+            raise ValueError(
+                "No inline {} in {}".format(directive, OPENVPN_TEMPLATE)
+            )
+
+        inline_files[directive] = (filepath, match.group(1))
+
+    return inline_files
+
+
+def _write_inline_files():
+    """Write the inline files of the template, if they are missing
+    or changed.
+
+    Their content is only compared once per process, afterwards
+    only their existence is checked.
+
+    Returns:
+        dict: paths by directive (ca and tls-crypt)
+    """
+    inline_files = {}
+    for directive, (filepath, content) in _get_inline_files().items():
+        if filepath in _checked_inline_files:
+            is_outdated = not os.path.isfile(filepath)
+        else:
+            try:
+                with open(filepath, "r") as f:
+                    is_outdated = f.read() != content
+            except FileNotFoundError:
+                is_outdated = True
+
+        if is_outdated:
+            logger.info("Writing {}".format(filepath))
+            os.makedirs(NM_OPENVPN_CERT_DIR, mode=0o700, exist_ok=True)
+            with open(
+                os.open(
+                    filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+                ), "w"
+            ) as f:
+                f.write(content)
+
+        _checked_inline_files.add(filepath)
+        inline_files[directive] = filepath
+
+    return inline_files
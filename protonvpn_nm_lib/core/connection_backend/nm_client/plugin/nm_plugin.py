@@ -1,4 +1,6 @@
-from .....enums import ProtocolImplementationEnum
+import threading
+
+from .....enums import ProtocolEnum, ProtocolImplementationEnum
 from .....logger import logger
 import gi
 
@@ -7,25 +9,51 @@ from gi.repository import NM
 
 
 class NMPlugin:
+    # Build OpenVPN connections directly, instead of importing a
+    # configuration file with each VPN editor plugin until one parses it
+    build_openvpn_connection = True
+    __vpn_plugin_list = None
+    # Writing a configuration file deletes the other ones, so
+    # connections prepared in the background (see ProfilePool)
+    # are imported one at a time with the foreground ones
+    __import_lock = threading.Lock()
+
+    @classmethod
+    def get_vpn_plugin_list(cls):
+        """Get the installed VPN plugins, loaded once.
 
-    @staticmethod
-    def import_vpn_config(vpn_configuration):
-        plugin_info = NM.VpnPluginInfo
-        vpn_plugin_list = plugin_info.list_load()
+        Returns:
+            list(NM.VpnPluginInfo)
+        """
+        if NMPlugin.__vpn_plugin_list is None:
+            NMPlugin.__vpn_plugin_list = NM.VpnPluginInfo.list_load()
 
+        return NMPlugin.__vpn_plugin_list
+
+    @classmethod
+    def import_vpn_config(cls, vpn_configuration):
         connection = None
         plugin_name = None
 
-        with vpn_configuration as filename:
-            for plugin in vpn_plugin_list:
-                plugin_editor = plugin.load_editor_plugin()
-                # return a NM.SimpleConnection (NM.Connection)
-                # https://lazka.github.io/pgi-docs/NM-1.0/classes/SimpleConnection.html
-                try:
-                    connection = plugin_editor.import_(filename)
-                    plugin_name = plugin.props.name
-                except gi.repository.GLib.Error:
-                    pass
+        if cls.build_openvpn_connection and vpn_configuration.protocol in [
+            ProtocolEnum.TCP, ProtocolEnum.UDP
+        ]:
+            plugin = NM.VpnPluginInfo.list_find_by_name(
+                cls.get_vpn_plugin_list(),
+                ProtocolImplementationEnum.OPENVPN.value
+            )
+            if plugin is not None:
+                from ..openvpn.build_openvpn_connection import \
+                    BuildOpenVPNConnection
+                connection = BuildOpenVPNConnection.build_connection(
+                    vpn_configuration, plugin.props.service
+                )
+                plugin_name = plugin.props.name
+
+        if connection is None:
+            connection, plugin_name = cls.__import_with_editor_plugin(
+                vpn_configuration
+            )
 
         if connection is None:
             raise NotImplementedError(
@@ -37,3 +65,21 @@ class NMPlugin:
             logger.info("Connection was normalized")
 
         return connection, ProtocolImplementationEnum(plugin_name)
+
+    @classmethod
+    def __import_with_editor_plugin(cls, vpn_configuration):
+        connection = None
+        plugin_name = None
+
+        with NMPlugin.__import_lock, vpn_configuration as filename:
+            for plugin in cls.get_vpn_plugin_list():
+                plugin_editor = plugin.load_editor_plugin()
+                # return a NM.SimpleConnection (NM.Connection)
+                # https://lazka.github.io/pgi-docs/NM-1.0/classes/SimpleConnection.html
+                try:
+                    connection = plugin_editor.import_(filename)
+                    plugin_name = plugin.props.name
+                except gi.repository.GLib.Error:
+                    pass
+
+        return connection, plugin_name
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import gi
+
+gi.require_version("NM", "1.0")
+from gi.repository import NM
+
+from ....logger import logger
+from ...environment import ExecutionEnvironment
+
+
+class ProfilePool:
+    """Keep VPN connections prepared for the servers the user is likely
+    to connect to next.
+
+    Preparing a connection (generating the configuration, importing it
+    with the NetworkManager VPN editor plugin, applying credentials and
+    DNS) is done in a background thread, so that setting up a connection
+    to one of these servers only has to add it to NetworkManager.
+
+    Prepared connections are matched by connection data (server,
+    credentials), protocol, ports, user settings and client config
+    features, so they are not used once any of them changed.
+
+    Args:
+        prepare_connection (callable): builds a NM.SimpleConnection from a
+            VPN configuration and connection data
+    """
+    MAX_PROFILES = 3
+
+    def __init__(self, prepare_connection):
+        self.__prepare_connection = prepare_connection
+        self.__lock = threading.Lock()
+        self.__profiles = OrderedDict()
+        self.__thread = None
+
+    def take(self, vpn_configuration, connection_data):
+        """Get a copy of the connection prepared for a server.
+
+        Args:
+            vpn_configuration (VPNConfiguration)
+            connection_data (dict): see NetworkManagerClient.setup()
+
+        Returns:
+            NM.SimpleConnection|None: None if none was prepared
+        """
+        with self.__lock:
+            connection = self.__profiles.get(
+                self.__get_key(vpn_configuration, connection_data)
+            )
+
+        if connection is None:
+            return None
+
+        logger.info("Using prepared connection for {}".format(
+            connection_data["servername"]
+        ))
+        # The prepared one is kept for next time
+        return NM.SimpleConnection.new_clone(connection)
+
+    def get_prepared_domains(self):
+        """Get the domains of the physical servers with a prepared
+        connection.
+
+        Returns:
+            set(string)
+        """
+        with self.__lock:
+            return set(key[1] for key in self.__profiles)
+
+    def prepare(self, candidates):
+        """Prepare connections in the background, replacing the
+        previously prepared ones.
+
+        Args:
+            candidates (list(tuple(VPNConfiguration, dict))): VPN
+                configurations and connection data, most likely first.
+                Only the first MAX_PROFILES are prepared
+        """
+        # The keys depend on the settings and the client config, which
+        # might be refreshed from the API: they are computed by the
+        # caller rather than in the background
+        keyed_candidates = []
+        for vpn_configuration, connection_data in candidates[
+            :self.MAX_PROFILES
+        ]:
+            try:
+                key = self.__get_key(vpn_configuration, connection_data)
+            except Exception as e:
+                logger.exception(
+                    "Unable to prepare connection for {}: {}".format(
+                        connection_data["servername"], e
+                    )
+                )
+                continue
+
+            keyed_candidates.append((key, vpn_configuration, connection_data))
+
+        thread = threading.Thread(
+            target=self.__prepare_all,
+            args=(keyed_candidates,),
+            daemon=True
+        )
+        with self.__lock:
+            self.__thread = thread
+        thread.start()
+
+    def clear(self):
+        """Forget the prepared connections, ie on logout."""
+        with self.__lock:
+            self.__profiles = OrderedDict()
+            self.__thread = None
+
+    def __prepare_all(self, candidates):
+        profiles = OrderedDict()
+        for key, vpn_configuration, connection_data in candidates:
+            with self.__lock:
+                connection = self.__profiles.get(key)
+
+            if connection is None:
+                try:
+                    connection = self.__prepare_connection(
+                        vpn_configuration, connection_data
+                    )
+                except Exception as e:
+                    logger.exception(
+                        "Unable to prepare connection for {}: {}".format(
+                            connection_data["servername"], e
+                        )
+                    )
+                    continue
+
+            profiles[key] = connection
+
+        with self.__lock:
+            # Unless newer candidates were given in the meantime
+            if self.__thread is threading.current_thread():
+                self.__profiles = profiles
+
+        logger.info("Prepared connections: {}".format(
+            [key[0] for key in profiles]
+        ))
+
+    def __get_key(self, vpn_configuration, connection_data):
+        env = ExecutionEnvironment()
+        settings = env.settings
+        features = env.api_session.clientconfig.features
+        user_data = connection_data["user_data"]
+        return (
+            connection_data["servername"],
+            connection_data["domain"],
+            vpn_configuration.protocol,
+            # Only OpenVPN configurations have ports
+            tuple(getattr(vpn_configuration, "ports", ())),
+            # The credentials aren't kept in memory
+            hashlib.sha256("{}\0{}".format(
+                user_data["username"], user_data["password"]
+            ).encode()).hexdigest(),
+            settings.dns,
+            tuple(settings.dns_custom_ips),
+            settings.netshield,
+            settings.vpn_accelerator,
+            settings.moderate_nat,
+            settings.non_standard_ports,
+            # Which settings apply to the username suffixes
+            features.netshield,
+            features.vpn_accelerator,
+            features.moderate_nat,
+            features.safe_mode,
+        )
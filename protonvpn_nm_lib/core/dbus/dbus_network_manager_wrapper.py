@@ -1,18 +1,192 @@
+import threading
+
 from .dbus_logger import logger
 
+import dbus
 from dbus import exceptions as dbus_excp
 
 from ...constants import VIRTUAL_DEVICE_NAME
 from ...enums import SystemBusNMInterfaceEnum, SystemBusNMObjectPathEnum
 from .dbus_wrapper import DbusWrapper
+from .network_manager_snapshot import NetworkManagerSnapshot
 
 
 class NetworkManagerUnitWrapper:
     BUS_NAME = "org.freedesktop.NetworkManager"
+    SNAPSHOT_TTL = 2  # seconds
+    # NMSettingsAddConnection2Flags and NMSettingsUpdate2Flags
+    ADD_CONNECTION2_FLAG_IN_MEMORY = 0x2
+    UPDATE2_FLAG_TO_DISK = 0x1
+    UPDATE2_FLAG_IN_MEMORY = 0x2
+    BATCH_TIMEOUT = 10000  # ms
+    # Bumped by invalidate_all_snapshots()
+    __snapshots_generation = 0
 
     def __init__(self, bus):
         self.virtual_device_name = VIRTUAL_DEVICE_NAME
         self.__dbus_wrapper = DbusWrapper(bus)
+        self.__snapshot = None
+        self.__snapshot_generation = None
+
+    def get_snapshot(self, max_age=None):
+        """Get connections, active connections and devices with their
+        settings/properties.
+
+        The snapshot is shared by all the lookups made within
+        SNAPSHOT_TTL, and taken again after any change made
+        through this wrapper or signaled with
+        invalidate_all_snapshots().
+
+        Args:
+            max_age (int): (optional) maximum age in seconds,
+                SNAPSHOT_TTL by default
+
+        Returns:
+            NetworkManagerSnapshot
+        """
+        if max_age is None:
+            max_age = self.SNAPSHOT_TTL
+
+        generation = NetworkManagerUnitWrapper.__snapshots_generation
+        snapshot = self.__snapshot
+        if (
+            snapshot is None
+            or snapshot.age() > max_age
+            or self.__snapshot_generation != generation
+        ):
+            snapshot = self.__snapshot = self.__take_snapshot()
+            self.__snapshot_generation = generation
+
+        return snapshot
+
+    def invalidate_snapshot(self):
+        """Take a new snapshot on next get_snapshot(), ie after
+        a change made outside of this wrapper."""
+        self.__snapshot = None
+
+    @staticmethod
+    def invalidate_all_snapshots():
+        """Take a new snapshot on next get_snapshot() of every
+        wrapper, ie after a change made through libnm."""
+        NetworkManagerUnitWrapper.__snapshots_generation += 1
+
+    def __take_snapshot(self):
+        logger.info("Take NetworkManager snapshot")
+        nm_properties = self.get_network_manager_properties()
+        active_conn_paths = [
+            str(path) for path in nm_properties["ActiveConnections"]
+        ]
+        device_paths = [str(path) for path in nm_properties["AllDevices"]]
+        conn_paths = [str(path) for path in self.get_all_connections()]
+
+        replies = self.__call_all(
+            [
+                (self._get_connection_settings_interface(path).GetSettings, ())
+                for path in conn_paths
+            ] + [
+                (
+                    self.__get_properties_interface(path).GetAll,
+                    (SystemBusNMInterfaceEnum.NM_CONNECTION_ACTIVE.value,)
+                ) for path in active_conn_paths
+            ] + [
+                (
+                    self.__get_properties_interface(path).GetAll,
+                    (SystemBusNMInterfaceEnum.NM_DEVICE.value,)
+                ) for path in device_paths
+            ]
+        )
+
+        def by_path(paths, path_replies):
+            # Objects which couldn't be fetched (ie removed
+            # in the meantime) are left out
+            return dict(
+                (path, reply) for path, reply in zip(paths, path_replies)
+                if reply is not None
+            )
+
+        conns_count = len(conn_paths)
+        active_conns_end = conns_count + len(active_conn_paths)
+        return NetworkManagerSnapshot(
+            by_path(conn_paths, replies[:conns_count]),
+            by_path(active_conn_paths, replies[conns_count:active_conns_end]),
+            by_path(device_paths, replies[active_conns_end:])
+        )
+
+    def __call_all(self, calls):
+        """Make D-Bus calls concurrently.
+
+        Calls are sent asynchronously, and replies are awaited in a
+        GLib main loop. Falls back to sequential calls if the bus isn't
+        attached to a main loop, if a main loop is already running
+        (ie called from a signal handler), as running a nested main
+        loop would dispatch other events in the meantime, and outside
+        of the main thread, where the application's main loop might be
+        running the default main context.
+
+        Args:
+            calls (list(tuple(callable, tuple))): D-Bus methods and
+                their arguments
+
+        Returns:
+            list: replies, None for failed calls
+        """
+        replies = [None] * len(calls)
+        if not calls:
+            return replies
+
+        try:
+            from gi.repository import GLib
+            if (
+                threading.current_thread() is not threading.main_thread()
+                or GLib.main_depth() > 0
+            ):
+                return self.__call_sequentially(calls)
+
+            loop = GLib.MainLoop()
+            pending = [len(calls)]
+
+            def handlers(index):
+                def on_reply(*reply):
+                    replies[index] = reply[0] if reply else None
+                    on_done()
+
+                def on_error(e):
+                    logger.info("D-Bus call failed: {}".format(e))
+                    on_done()
+
+                return on_reply, on_error
+
+            def on_done():
+                pending[0] -= 1
+                if pending[0] == 0:
+                    loop.quit()
+
+            for index, (method, args) in enumerate(calls):
+                on_reply, on_error = handlers(index)
+                method(*args, reply_handler=on_reply, error_handler=on_error)
+        except Exception as e:
+            logger.info("Unable to make asynchronous D-Bus calls: {}".format(e))
+            return self.__call_sequentially(calls)
+
+        if pending[0] > 0:
+            timeout_id = GLib.timeout_add(self.BATCH_TIMEOUT, loop.quit)
+            loop.run()
+            if pending[0] == 0:
+                GLib.source_remove(timeout_id)
+            else:
+                logger.error("{} D-Bus call(s) timed out".format(pending[0]))
+
+        return replies
+
+    def __call_sequentially(self, calls):
+        replies = [None] * len(calls)
+        for index, (method, args) in enumerate(calls):
+            try:
+                replies[index] = method(*args)
+            except dbus_excp.DBusException as e:
+                logger.info("D-Bus call failed: {}".format(e))
+
+        return replies
 
     def search_for_connection(
         self, conn_name, interface_name=None, is_active=False,
@@ -41,37 +215,29 @@ class NetworkManagerUnitWrapper:
             conn_name, interface_name, is_active, return_settings_path,
             return_device_path, return_active_conn_path
         ))
+        snapshot = self.get_snapshot()
         if is_active:
-            connection_list = self.get_all_active_connections()
+            connection_list = [
+                str(active_conn_props["Connection"])
+                for active_conn_props in snapshot.active_connections.values()
+            ]
         else:
-            connection_list = self.get_all_connections()
+            connection_list = list(snapshot.connections)
 
         for iterated_connection in connection_list:
-            if is_active:
-                conn_props = self.get_active_connection_properties(
-                    iterated_connection
-                )
-                iterated_connection = conn_props["Connection"]
-
-            try:
-                all_connection_properties = self.get_settings_from_connection(
-                    iterated_connection
-                )
-            except dbus_excp.DBusException as e:
+            all_connection_properties = snapshot.connections.get(
+                iterated_connection
+            )
+            if all_connection_properties is None:
                 logger.info(
-                    "Couldn't get settings from connection {}: {}".format(
-                        iterated_connection, e
+                    "Couldn't get settings from connection {}".format(
+                        iterated_connection
                     )
                 )
                 continue
 
             connection_id = str(all_connection_properties["connection"]["id"])
-
-            dev_name = None
-            if "vpn" in all_connection_properties:
-                dev_name = all_connection_properties["vpn"].get("data")
-                if dev_name:
-                    dev_name = dev_name.get("dev")
+            dev_name = snapshot.get_vpn_device(iterated_connection)
 
             if (
                 (
@@ -86,12 +252,12 @@ class NetworkManagerUnitWrapper:
                 if return_settings_path:
                     return_dict["settings_path"] = iterated_connection
                 if return_device_path:
-                    return_dict["device_path"] = self.get_connection_device_path( # noqa
+                    return_dict["device_path"] = snapshot.device_paths_by_connection.get( # noqa
                         iterated_connection
                     )
                 if return_active_conn_path and is_active:
-                    return_dict["active_conn_path"] = self.get_active_connection( # noqa
-                        get_by_settings_path=iterated_connection
+                    return_dict["active_conn_path"] = snapshot.active_connection_paths_by_connection.get( # noqa
+                        iterated_connection
                     )
 
                 return return_dict
@@ -109,15 +275,9 @@ class NetworkManagerUnitWrapper:
             or None if device was not found not.
         """
         logger.info("Get connection device path: {}".format(connection_settings_path))
-        devices = self._get_all_devices()
-        for device in devices:
-            device_available_conns = self._get_available_connections_from_device(device)
-            if len(device_available_conns) > 0:
-                conn_settings_path = str(device_available_conns.pop())
-                if connection_settings_path == conn_settings_path:
-                    return device
-
-        return None
+        return self.get_snapshot().device_paths_by_connection.get(
+            str(connection_settings_path)
+        )
 
     def activate_connection(
         self, connection_settings_path, device_path, specific_object=None
@@ -158,6 +318,7 @@ class NetworkManagerUnitWrapper:
                 specific_object
             )
         )
+        self.invalidate_snapshot()
         nm_interface = self._get_network_manager_interface()
         active_conn_path = nm_interface.ActivateConnection(
             connection_settings_path,
@@ -167,6 +328,86 @@ class NetworkManagerUnitWrapper:
 
         return None if not active_conn_path else active_conn_path
 
+    def add_connection(self, connection_settings, in_memory=False):
+        """Add a new connection (saved to disk).
+
+        NetworkManager activates it right away if it is autoconnectable.
+
+        Args:
+            connection_settings (dict): connection settings (a{sa{sv}})
+            in_memory (bool): (optional) only keep it in memory, until
+                NetworkManager restarts. Saved to disk if NetworkManager
+                doesn't support it (< 1.20)
+
+        Returns:
+            string: connection settings path
+        """
+        logger.info("Add connection: {}".format(
+            connection_settings["connection"]["id"]
+        ))
+        self.invalidate_snapshot()
+        settings_interface = self.__dbus_wrapper.get_proxy_object_interface(
+            self.__get_proxy_object(SystemBusNMObjectPathEnum.NM_SETTINGS.value),
+            SystemBusNMInterfaceEnum.NM_SETTINGS.value
+        )
+        if in_memory:
+            try:
+                return settings_interface.AddConnection2(
+                    connection_settings,
+                    dbus.UInt32(self.ADD_CONNECTION2_FLAG_IN_MEMORY),
+                    dbus.Dictionary({}, signature="sv")
+                )[0]
+            except dbus_excp.DBusException as e:
+                if not self.__is_unknown_method(e):
+                    raise
+                logger.info("AddConnection2 is not supported")
+
+        return settings_interface.AddConnection(connection_settings)
+
+    def update_connection(
+        self, connection_settings_path, connection_settings, in_memory=False
+    ):
+        """Replace the settings of an existing connection.
+
+        Args:
+            connection_settings_path (string): path to connection settings
+            connection_settings (dict): connection settings (a{sa{sv}}),
+                with the uuid of the existing connection
+            in_memory (bool): (optional) only keep the new settings in
+                memory, instead of writing them to disk
+        """
+        logger.info("Update connection: {}".format(connection_settings_path))
+        self.invalidate_snapshot()
+        connection_settings_interface = self._get_connection_settings_interface(
+            connection_settings_path
+        )
+        try:
+            connection_settings_interface.Update2(
+                connection_settings,
+                dbus.UInt32(
+                    self.UPDATE2_FLAG_IN_MEMORY
+                    if in_memory
+                    else self.UPDATE2_FLAG_TO_DISK
+                ),
+                dbus.Dictionary({}, signature="sv")
+            )
+        except dbus_excp.DBusException as e:
+            if not self.__is_unknown_method(e):
+                raise
+            # NetworkManager < 1.12
+            logger.info("Update2 is not supported")
+            if in_memory:
+                connection_settings_interface.UpdateUnsaved(
+                    connection_settings
+                )
+            else:
+                connection_settings_interface.Update(connection_settings)
+
+    def __is_unknown_method(self, e):
+        return (
+            e.get_dbus_name() == "org.freedesktop.DBus.Error.UnknownMethod"
+        )
+
     def disconnect_connection(self, connection_path):
         """Disconnect active connection.
 
@@ -174,6 +415,7 @@ class NetworkManagerUnitWrapper:
             connection_path (string): path to active connection
         """
         logger.info("Disconnect connection: {}".format(connection_path))
+        self.invalidate_snapshot()
         nm_interface = self._get_network_manager_interface()
         nm_interface.DeactivateConnection(connection_path)
 
@@ -184,6 +426,7 @@ class NetworkManagerUnitWrapper:
             connection_path (string): path to active connection
         """
         logger.info("Delete connection: {}".format(connection_settings_path))
+        self.invalidate_snapshot()
         connection_settings_interface = self._get_connection_settings_interface(
             connection_settings_path
         )
@@ -240,20 +483,15 @@ class NetworkManagerUnitWrapper:
             [2]: None | string (active connection path)
         """
         logger.info("Check if VPN is being prepared")
-        all_active_conns = self.get_all_active_connections()
+        snapshot = self.get_snapshot()
 
         protonvpn_conn_info = [False, None, None]
-        for active_conn in all_active_conns:
-            active_conn_props = self.get_active_connection_properties(active_conn)
-
-            try:
-                vpn_all_settings = self.get_settings_from_connection(
-                    active_conn_props["Connection"]
-                )
-            except dbus_excp.DBusException as e:
+        for active_conn, active_conn_props in snapshot.active_connections.items():
+            connection_path = str(active_conn_props["Connection"])
+            if connection_path not in snapshot.connections:
                 logger.info(
-                    "Couldn't get settings from connection {}: {}".format(
-                        active_conn, e
+                    "Couldn't get settings from connection {}".format(
+                        active_conn
                     )
                 )
                 continue
@@ -261,7 +499,7 @@ class NetworkManagerUnitWrapper:
             if (
                 active_conn_props["Type"] == "vpn"
             ) and (
-                vpn_all_settings["vpn"]["data"]["dev"]
+                snapshot.get_vpn_device(connection_path)
                 == self.virtual_device_name
             ):
                 protonvpn_conn_info[0] = True
@@ -282,48 +520,17 @@ class NetworkManagerUnitWrapper:
                 self.virtual_device_name
             )
         )
-        connections = self.get_all_connections()
-        for connection in connections:
-            try:
-                iface = self._get_connection_settings_interface(connection)
-                all_settings = self.get_settings_from_connection(
-                    connection
+        snapshot = self.get_snapshot()
+        for connection in snapshot.connection_paths_by_vpn_device.get(
+            self.virtual_device_name, []
+        ):
+            if snapshot.connections[connection]["connection"]["type"] == "vpn":
+                logger.info(
+                    "Found virtual device "
+                    + "'{}'.".format(self.virtual_device_name)
                 )
-            except dbus_excp.DBusException as e:
-                logger.exception(e)
-                continue
-            # all_settings[
-            #   connection dbus.Dictionary
-            #   vpn dbus.Dictionary
-            #   ipv4 dbus.Dictionary
-            #   ipv6 dbus.Dictionary
-            #   proxy dbus.Dictionary
-            # ]
-            if all_settings["connection"]["type"] == "vpn":
-                vpn_virtual_device = False
-                try:
-                    vpn_virtual_device = all_settings["vpn"]["data"]["dev"]
-                except KeyError:
-                    logger.debug(
-                        "VPN \"{}\" is missing \"dev\" parameter", format(
-                            all_settings["connection"]["id"]
-                        )
-                    )
-                    continue
-                except Exception as e:
-                    logger.exception(
-                        "[!] Unhandled exceptions: {}\n".format(e)
-                        + "Connection information: {}".format(all_settings)
-                    )
-                    continue
-
-                if vpn_virtual_device == self.virtual_device_name:
-                    logger.info(
-                        "Found virtual device "
-                        + "'{}'.".format(self.virtual_device_name)
-                    )
 
-                    return iface
+                return self._get_connection_settings_interface(connection)
 
         logger.error(
             "[!] Could not find interface belonging to '{}'.".format(
@@ -351,32 +558,21 @@ class NetworkManagerUnitWrapper:
             string: active connection path
         """
         logger.info("Getting active connection interface")
-        active_connections = self.get_all_active_connections()
+        active_connections = self.get_snapshot().active_connections
         logger.info(
             "All active conns in get_active_connection: {}".format(
-                active_connections
+                list(active_connections)
             )
         )
 
-        for active_conn in active_connections:
-            try:
-                active_conn_props = self.get_active_connection_properties(active_conn)
-            except TypeError as e:
-                logger.error(
-                    "No active connections were found. "
-                    + "Exception: {}.".format(e)
-                )
-                return None
-            except dbus_excp.DBusException as e:
-                logger.exception(e)
-                continue
-
+        for active_conn, active_conn_props in active_connections.items():
             logger.info("{}".format(active_conn_props))
+            devices = active_conn_props.get("Devices", [])
             if get_by_id and str(active_conn_props["Id"]) == get_by_id:
                 return active_conn
             elif get_by_settings_path and str(active_conn_props["Connection"]) == get_by_settings_path: # noqa
                 return active_conn
-            elif get_by_device_path and str(active_conn_props["Devices"].pop()) == get_by_device_path: # noqa
+            elif get_by_device_path and len(devices) > 0 and str(devices[-1]) == get_by_device_path: # noqa
                 return active_conn
             elif (
                 active_conn_props["Default"]
@@ -510,6 +706,40 @@ class NetworkManagerUnitWrapper:
             signal_name, method
         )
 
+    def connect_settings_object_to_signal(self, signal_name, method):
+        """Connect a signal to network manager settings object
+        (ie NewConnection, ConnectionRemoved).
+
+        Args:
+            signal_name (string): the name of the signal to listen to
+            method (func): the method that received the signal
+        """
+        logger.info("Connect network manager settings to signal: {} {}".format(signal_name, method))
+        interface = self.__dbus_wrapper.get_proxy_object_interface(
+            self.__get_proxy_object(SystemBusNMObjectPathEnum.NM_SETTINGS.value),
+            SystemBusNMInterfaceEnum.NM_SETTINGS.value
+        )
+        interface.connect_to_signal(
+            signal_name, method
+        )
+
+    def connect_network_manager_properties_changed(self, method):
+        """Connect org.freedesktop.DBus.Properties.PropertiesChanged
+        of network manager object.
+
+        Args:
+            method (func): called with interface name, changed
+                properties and invalidated properties
+
+        Returns:
+            dbus.connection.SignalMatch: to remove() when done
+        """
+        logger.info("Connect network manager properties changes: {}".format(method))
+        interface = self.get_network_manager_properties_interface()
+        return interface.connect_to_signal(
+            "PropertiesChanged", method
+        )
+
     def _get_network_manager_interface(self):
         """Get network manager interface.
 
@@ -552,6 +782,11 @@ class NetworkManagerUnitWrapper:
         )
         return devices_props.get("AvailableConnections", [])
 
+    def __get_properties_interface(self, path_to_object):
+        return self.__dbus_wrapper.get_proxy_object_properties_interface(
+            self.__get_proxy_object(path_to_object)
+        )
+
     def __get_proxy_object(self, path_to_object):
         return self.__dbus_wrapper.get_proxy_object(
             self.BUS_NAME,
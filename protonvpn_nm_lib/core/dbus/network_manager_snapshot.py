@@ -0,0 +1,80 @@
+import time
+
+
+class NetworkManagerSnapshot:
+    """Connections, active connections and devices of NetworkManager,
+    with their settings/properties, as fetched at one point in time.
+
+    Objects are stored by (string) path, and indexed by connection id,
+    uuid, interface name, VPN device and device.
+
+    Args:
+        connections (dict): settings path => settings
+        active_connections (dict): active connection path => properties
+        devices (dict): device path => properties
+    """
+    def __init__(self, connections, active_connections, devices):
+        self.created_at = time.time()
+        self.connections = connections
+        self.active_connections = active_connections
+        self.devices = devices
+
+        self.connection_paths_by_id = {}
+        self.connection_paths_by_uuid = {}
+        self.connection_paths_by_interface = {}
+        self.connection_paths_by_vpn_device = {}
+        for path, settings in connections.items():
+            connection = settings.get("connection", {})
+            self.connection_paths_by_id.setdefault(
+                str(connection.get("id")), path
+            )
+            self.connection_paths_by_uuid.setdefault(
+                str(connection.get("uuid")), path
+            )
+            if connection.get("interface-name"):
+                self.connection_paths_by_interface.setdefault(
+                    str(connection["interface-name"]), path
+                )
+
+            vpn_device = self.get_vpn_device(path)
+            if vpn_device:
+                self.connection_paths_by_vpn_device.setdefault(
+                    vpn_device, []
+                ).append(path)
+
+        self.active_connection_paths_by_connection = {}
+        self.active_connection_paths_by_id = {}
+        for path, properties in active_connections.items():
+            self.active_connection_paths_by_connection.setdefault(
+                str(properties.get("Connection")), path
+            )
+            self.active_connection_paths_by_id.setdefault(
+                str(properties.get("Id")), path
+            )
+
+        # Same as before: a connection belongs to the device
+        # it is the last available connection of
+        self.device_paths_by_connection = {}
+        for path, properties in devices.items():
+            available_connections = properties.get("AvailableConnections", [])
+            if len(available_connections) > 0:
+                self.device_paths_by_connection.setdefault(
+                    str(available_connections[-1]), path
+                )
+
+    def age(self):
+        return time.time() - self.created_at
+
+    def get_vpn_device(self, connection_path):
+        """Get the device (vpn.data.dev) of a VPN connection.
+
+        Returns:
+            string|None
+        """
+        settings = self.connections.get(connection_path, {})
+        try:
+            device = settings["vpn"]["data"]["dev"]
+        except (KeyError, TypeError):
+            return None
+
+        return str(device) if device else None
@@ -24,6 +24,9 @@ class ExecutionEnvironment(metaclass=Singleton):
         self.__accounting = None
         self.__netzone = None
 
+        self.__system_bus = None
+        self.__nm_client = None
+
     @property
     def keyring(self):
         """Return the keyring to use"""
@@ -64,7 +67,7 @@ class ExecutionEnvironment(metaclass=Singleton):
     def killswitch(self):
         """Return the session to the API"""
         if self.__killswitch is None:
-            from .killswitch import KillSwitch
+            from .killswitch.killswitch import KillSwitch
             self.__killswitch = KillSwitch()
         return self.__killswitch
 
@@ -76,7 +79,7 @@ class ExecutionEnvironment(metaclass=Singleton):
     def ipv6leak(self):
         """Return the session to the API"""
         if self.__ipv6leak is None:
-            from .killswitch import IPv6LeakProtection
+            from .killswitch.ipv6_leak_protection import IPv6LeakProtection
             self.__ipv6leak = IPv6LeakProtection()
         return self.__ipv6leak
 
@@ -132,6 +135,41 @@ class ExecutionEnvironment(metaclass=Singleton):
     def accounting(self, newvalue):
         self.__accounting = newvalue
 
+    @property
+    def system_bus(self):
+        """Return the D-Bus system bus connection, shared by
+        the kill switch and the IPv6 leak protection"""
+        if self.__system_bus is None:
+            import dbus
+            from dbus.mainloop.glib import DBusGMainLoop
+
+            # Additional loop needs to be create since SystemBus automatically
+            # picks the default loop, which is intialized with the CLI.
+            # Thus, to refrain SystemBus from using the default loop,
+            # one extra loop is needed only to be passed, while it is never used.
+            # https://dbus.freedesktop.org/doc/dbus-python/tutorial.html#setting-up-an-event-loop
+            self.__system_bus = dbus.SystemBus(mainloop=DBusGMainLoop())
+        return self.__system_bus
+
+    @system_bus.setter
+    def system_bus(self, newvalue):
+        self.__system_bus = newvalue
+
+    @property
+    def nm_client(self):
+        """Return the NetworkManager client (NM.Client)"""
+        if self.__nm_client is None:
+            import gi
+            gi.require_version("NM", "1.0")
+            from gi.repository import NM
+
+            self.__nm_client = NM.Client.new(None)
+        return self.__nm_client
+
+    @nm_client.setter
+    def nm_client(self, newvalue):
+        self.__nm_client = newvalue
+
 
     @property
     def user_agent(self):
@@ -1,4 +1,17 @@
-from .ipv6_leak_protection import IPv6LeakProtection
-from .killswitch import KillSwitch
-
+# KillSwitch and IPv6LeakProtection need dbus, they are only imported
+# when used so that the dbus free modules of the package, like routes,
+# can be imported without it
 __all__ = ["IPv6LeakProtection", "KillSwitch"]
+
+
+def __getattr__(name):
+    if name == "IPv6LeakProtection":
+        from .ipv6_leak_protection import IPv6LeakProtection
+        return IPv6LeakProtection
+    elif name == "KillSwitch":
+        from .killswitch import KillSwitch
+        return KillSwitch
+
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+    )
@@ -0,0 +1,106 @@
+import dbus
+
+from ...enums import KillSwitchInterfaceTrackerEnum
+from ...logger import logger
+
+
+class ConnectionStateTracker:
+    """Track whether some NetworkManager connections exist and are
+    running (active), by connection name.
+
+    By default, the state is synced again from NetworkManager on every
+    update(). With track_changes(), it is only synced once and then
+    again when NetworkManager signals a change of the connections or
+    active connections, so that update() is usually a no-op. Signals
+    are only delivered while a GLib main loop runs, so this is meant
+    for long running processes.
+
+    Changes made by the owner (add, delete, activate or deactivate a
+    connection) have to be followed by invalidate(), as the signals
+    aren't delivered while the owner blocks the main loop.
+
+    Args:
+        get_nm_wrapper (callable): returns the NetworkManagerUnitWrapper
+        conn_names (list(string)): names of the tracked connections
+    """
+    def __init__(self, get_nm_wrapper, conn_names):
+        self.__get_nm_wrapper = get_nm_wrapper
+        self.state = dict(
+            (
+                conn_name, {
+                    KillSwitchInterfaceTrackerEnum.EXISTS: False,
+                    KillSwitchInterfaceTrackerEnum.IS_RUNNING: False
+                }
+            ) for conn_name in conn_names
+        )
+        self.__is_tracking_changes = False
+        self.__is_outdated = True
+
+    def invalidate(self):
+        """Sync the state again on the next update()."""
+        self.__is_outdated = True
+        self.__get_nm_wrapper().invalidate_snapshot()
+
+    def track_changes(self):
+        """Only sync the state again when NetworkManager signals
+        a change.
+
+        Returns:
+            bool: if the signals could be connected
+        """
+        if self.__is_tracking_changes:
+            return True
+
+        nm_wrapper = self.__get_nm_wrapper()
+        try:
+            nm_wrapper.connect_settings_object_to_signal(
+                "NewConnection", self.__on_connections_changed
+            )
+            nm_wrapper.connect_settings_object_to_signal(
+                "ConnectionRemoved", self.__on_connections_changed
+            )
+            nm_wrapper.connect_network_manager_properties_changed(
+                self.__on_network_manager_properties_changed
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info(
+                "Unable to track connection changes: {}".format(e)
+            )
+            return False
+
+        self.__is_tracking_changes = True
+        self.invalidate()
+        return True
+
+    def __on_connections_changed(self, *_):
+        self.invalidate()
+
+    def __on_network_manager_properties_changed(
+        self, _interface, changed_properties, _invalidated_properties
+    ):
+        if "ActiveConnections" in changed_properties:
+            self.invalidate()
+
+    def update(self):
+        """Sync the state from NetworkManager, if it might be outdated.
+
+        Returns:
+            dict: state
+        """
+        if not self.__is_outdated:
+            return self.state
+
+        # Signals received during the sync will make it outdated again
+        self.__is_outdated = not self.__is_tracking_changes
+
+        snapshot = self.__get_nm_wrapper().get_snapshot()
+        existing_conn_names = snapshot.connection_paths_by_id
+        running_conn_names = snapshot.active_connection_paths_by_id
+
+        for conn_name, conn_state in self.state.items():
+            conn_state[KillSwitchInterfaceTrackerEnum.EXISTS] = \
+                conn_name in existing_conn_names
+            conn_state[KillSwitchInterfaceTrackerEnum.IS_RUNNING] = \
+                conn_name in running_conn_names
+
+        return self.state
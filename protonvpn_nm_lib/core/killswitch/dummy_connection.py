@@ -0,0 +1,111 @@
+import socket
+import struct
+import uuid
+from ipaddress import ip_interface, ip_network
+
+import dbus
+
+
+def dummy_connection_settings(
+    conn_name, interface_name, ipv4=None, ipv6=None, autoconnect=True
+):
+    """Build the settings of a dummy connection, to be added with
+    NetworkManager's Settings.AddConnection.
+
+    The IP settings are dicts with the keys:
+        addresses (list(string)): addresses in CIDR notation
+        gateway (string): (optional)
+        routes (list(string)): (optional) routes in CIDR notation
+        route_metric (int): (optional)
+        dns (list(string)): (optional) DNS servers
+        dns_priority (int|string): (optional)
+
+    Args:
+        conn_name (string): connection name (id)
+        interface_name (string): dummy interface name
+        ipv4 (dict): (optional) IPv4 settings, left to the
+            NetworkManager defaults if missing
+        ipv6 (dict): (optional) IPv6 settings, left to the
+            NetworkManager defaults if missing
+        autoconnect (bool): (optional) if False, the connection has
+            to be activated explicitly
+
+    Returns:
+        dbus.Dictionary
+    """
+    settings = dbus.Dictionary({
+        "connection": dbus.Dictionary({
+            "id": dbus.String(conn_name),
+            "uuid": dbus.String(str(uuid.uuid4())),
+            "type": dbus.String("dummy"),
+            "interface-name": dbus.String(interface_name),
+        }, signature="sv"),
+        "dummy": dbus.Dictionary({}, signature="sv"),
+    }, signature="sa{sv}")
+
+    if not autoconnect:
+        settings["connection"]["autoconnect"] = dbus.Boolean(False)
+
+    if ipv4 is not None:
+        settings["ipv4"] = _ip_settings(ipv4, socket.AF_INET)
+    if ipv6 is not None:
+        settings["ipv6"] = _ip_settings(ipv6, socket.AF_INET6)
+
+    return settings
+
+
+def _ip_settings(ip_config, family):
+    setting = dbus.Dictionary({
+        "method": dbus.String("manual"),
+        "address-data": dbus.Array([
+            _address_data(ip_interface(address), "address")
+            for address in ip_config["addresses"]
+        ], signature="a{sv}"),
+        "ignore-auto-dns": dbus.Boolean(True),
+    }, signature="sv")
+
+    if ip_config.get("gateway"):
+        setting["gateway"] = dbus.String(ip_config["gateway"])
+
+    if ip_config.get("routes"):
+        setting["route-data"] = dbus.Array([
+            _address_data(ip_network(route), "dest")
+            for route in ip_config["routes"]
+        ], signature="a{sv}")
+
+    if ip_config.get("route_metric") is not None:
+        setting["route-metric"] = dbus.Int64(int(ip_config["route_metric"]))
+
+    if ip_config.get("dns_priority") is not None:
+        setting["dns-priority"] = dbus.Int32(int(ip_config["dns_priority"]))
+
+    if ip_config.get("dns"):
+        if family == socket.AF_INET:
+            # Addresses in network byte order
+            setting["dns"] = dbus.Array([
+                dbus.UInt32(struct.unpack(
+                    "=I", socket.inet_pton(family, address)
+                )[0])
+                for address in ip_config["dns"]
+            ], signature="u")
+        else:
+            setting["dns"] = dbus.Array([
+                dbus.ByteArray(socket.inet_pton(family, address))
+                for address in ip_config["dns"]
+            ], signature="ay")
+
+    return setting
+
+
+def _address_data(network, address_key):
+    """Convert an IP interface/network to NetworkManager's address-data
+    and route-data format."""
+    if hasattr(network, "ip"):
+        address, prefix = network.ip, network.network.prefixlen
+    else:
+        address, prefix = network.network_address, network.prefixlen
+
+    return dbus.Dictionary({
+        address_key: dbus.String(str(address)),
+        "prefix": dbus.UInt32(prefix),
+    }, signature="sv")
@@ -1,5 +1,4 @@
 import dbus
-from dbus.mainloop.glib import DBusGMainLoop
 
 from ... import exceptions
 from ...constants import (IPv6_DUMMY_ADDRESS, IPv6_DUMMY_GATEWAY,
@@ -8,20 +7,18 @@ from ...constants import (IPv6_DUMMY_ADDRESS, IPv6_DUMMY_GATEWAY,
 from ...enums import KillSwitchActionEnum, KillSwitchInterfaceTrackerEnum
 from ...logger import logger
 from ..dbus.dbus_network_manager_wrapper import NetworkManagerUnitWrapper
+from ..environment import ExecutionEnvironment
 from ..subprocess_wrapper import subprocess
+from .connection_state_tracker import ConnectionStateTracker
+from .dummy_connection import dummy_connection_settings
 
 
 class IPv6LeakProtection:
     """Manages IPv6 leak protection connection/interfaces."""
     enable_ipv6_leak_protection = True
-
-    # Additional loop needs to be create since SystemBus automatically
-    # picks the default loop, which is intialized with the CLI.
-    # Thus, to refrain SystemBus from using the default loop,
-    # one extra loop is needed only to be passed, while it is never used.
-    # https://dbus.freedesktop.org/doc/dbus-python/tutorial.html#setting-up-an-event-loop
-    dbus_loop = DBusGMainLoop()
-    bus = dbus.SystemBus(mainloop=dbus_loop)
+    # Keep the connection between VPN connections, only activating
+    # and deactivating it, instead of deleting it and adding it again
+    reuse_profiles = False
 
     def __init__(
         self,
@@ -35,16 +32,35 @@ class IPv6LeakProtection:
         self.conn_name = conn_name
         self.ipv6_dummy_addrs = ipv6_dummy_addrs
         self.ipv6_dummy_gateway = ipv6_dummy_gateway
-        self.interface_state_tracker = {
-            self.conn_name: {
-                KillSwitchInterfaceTrackerEnum.EXISTS: False,
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING: False
-            }
-        }
-        self.nm_wrapper = nm_wrapper(self.bus)
+        # Connect to the bus only when needed
+        self.__nm_wrapper_class = nm_wrapper
+        self.__nm_wrapper = None
+        self.__connection_state = ConnectionStateTracker(
+            lambda: self.nm_wrapper, [self.conn_name]
+        )
+        self.interface_state_tracker = self.__connection_state.state
         logger.info("Intialized IPv6 leak protection manager")
         self.get_status_connectivity_check()
 
+    @property
+    def bus(self):
+        return ExecutionEnvironment().system_bus
+
+    @property
+    def nm_wrapper(self):
+        if self.__nm_wrapper is None:
+            self.__nm_wrapper = self.__nm_wrapper_class(self.bus)
+        return self.__nm_wrapper
+
+    def track_connection_changes(self):
+        """Keep the connection status from NetworkManager signals,
+        instead of syncing it on every operation.
+
+        Only for processes running a GLib main loop, see
+        ConnectionStateTracker.
+        """
+        return self.__connection_state.track_changes()
+
     def manage(self, action):
         """Manage IPv6 leak protection.
 
@@ -61,6 +77,10 @@ class IPv6LeakProtection:
         ):
             self.add_leak_protection()
         elif action == KillSwitchActionEnum.DISABLE:
+            if self.reuse_profiles:
+                self.deactivate_connection()
+                return
+
             try:
                 self.remove_leak_protection()
             except: # noqa
@@ -96,13 +116,74 @@ class IPv6LeakProtection:
         ] and not self.interface_state_tracker[self.conn_name][
             KillSwitchInterfaceTrackerEnum.IS_RUNNING
         ]:
-            self.manage(KillSwitchActionEnum.DISABLE)
+            if self.reuse_profiles and self.activate_profile():
+                return
+
+            try:
+                self.remove_leak_protection()
+            except: # noqa
+                self.deactivate_connection()
+
+            if self.add_connection(self.__connection_settings()):
+                return
+
             self.run_subprocess(
                 exceptions.EnableIPv6LeakProtectionError,
                 "Unable to add IPv6 leak protection connection/interface",
                 subprocess_command
             )
 
+    def __connection_settings(self, autoconnect=True):
+        return dummy_connection_settings(
+            self.conn_name,
+            self.iface_name,
+            ipv6=dict(
+                addresses=[self.ipv6_dummy_addrs],
+                gateway=self.ipv6_dummy_gateway,
+                route_metric=95,
+                dns_priority=KILLSWITCH_DNS_PRIORITY_VALUE,
+                dns=["::1"]
+            ),
+            autoconnect=autoconnect
+        )
+
+    def activate_profile(self):
+        """Activate the leak protection connection over D-Bus, adding
+        it first (in memory only) if needed.
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        if not self.interface_state_tracker[self.conn_name][
+            KillSwitchInterfaceTrackerEnum.EXISTS
+        ] and not self.add_connection(
+            self.__connection_settings(autoconnect=False), in_memory=True
+        ):
+            return False
+
+        conn_dict = self.nm_wrapper.search_for_connection(
+            self.conn_name,
+            return_device_path=True,
+            return_settings_path=True
+        )
+        if not conn_dict:
+            return False
+
+        self.__connection_state.invalidate()
+        try:
+            # Software devices (dummy) only exist while activated
+            self.nm_wrapper.activate_connection(
+                str(conn_dict["settings_path"]),
+                str(conn_dict.get("device_path") or "/")
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to activate {} over D-Bus: {}".format(
+                self.conn_name, e
+            ))
+            return False
+
+        return True
+
     def remove_leak_protection(self):
         """Remove leak protection connection/interface."""
         logger.info("Removing IPv6 leak protection")
@@ -114,6 +195,9 @@ class IPv6LeakProtection:
         if self.interface_state_tracker[self.conn_name][
             KillSwitchInterfaceTrackerEnum.EXISTS
         ]:
+            if self.remove_connection():
+                return
+
             try:
                 self.run_subprocess(
                     exceptions.DisableIPv6LeakProtectionError,
@@ -124,6 +208,54 @@ class IPv6LeakProtection:
                 logger.exception(e)
                 self.deactivate_connection()
 
+    def add_connection(self, connection_settings, in_memory=False):
+        """Add a connection over D-Bus.
+
+        Args:
+            connection_settings (dict): see dummy_connection_settings()
+            in_memory (bool): (optional) don't save it to disk
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        self.__connection_state.invalidate()
+        try:
+            self.nm_wrapper.add_connection(
+                connection_settings, in_memory=in_memory
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to add {} over D-Bus: {}".format(
+                connection_settings["connection"]["id"], e
+            ))
+            return False
+
+        return True
+
+    def remove_connection(self):
+        """Delete the leak protection connection over D-Bus.
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        conn_dict = self.nm_wrapper.search_for_connection(
+            self.conn_name, return_settings_path=True
+        )
+        if not conn_dict:
+            return False
+
+        self.__connection_state.invalidate()
+        try:
+            self.nm_wrapper.delete_connection(
+                str(conn_dict["settings_path"])
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to delete {} over D-Bus: {}".format(
+                self.conn_name, e
+            ))
+            return False
+
+        return True
+
     def deactivate_connection(self):
         """Deactivate a connection."""
         self.update_connection_status()
@@ -137,6 +269,7 @@ class IPv6LeakProtection:
             ] and active_conn_dict
         ):
             active_conn_path = str(active_conn_dict.get("active_conn_path"))
+            self.__connection_state.invalidate()
             try:
                 self.nm_wrapper.disconnect_connection(
                     active_conn_path
@@ -156,6 +289,7 @@ class IPv6LeakProtection:
             exception_msg (string): exception message
             *args (list): arguments to be passed to subprocess
         """
+        self.__connection_state.invalidate()
         subprocess_outpout = subprocess.run(
             *args, stderr=subprocess.PIPE, stdout=subprocess.PIPE
         )
@@ -179,43 +313,7 @@ class IPv6LeakProtection:
 
     def update_connection_status(self):
         """Update connection/interface status."""
-        all_conns = self.nm_wrapper.get_all_connections()
-        active_conns = self.nm_wrapper.get_all_active_connections()
-
-        self.interface_state_tracker[self.conn_name][
-            KillSwitchInterfaceTrackerEnum.EXISTS
-        ] = False
-
-        self.interface_state_tracker[self.conn_name][
-            KillSwitchInterfaceTrackerEnum.IS_RUNNING
-        ] = False
-
-        for conn in all_conns:
-            try:
-                conn_name = str(self.nm_wrapper.get_settings_from_connection(
-                    conn
-                )["connection"]["id"])
-            except dbus.exceptions.DBusException:
-                conn_name = "None"
-
-            if conn_name in self.interface_state_tracker:
-                self.interface_state_tracker[conn_name][
-                    KillSwitchInterfaceTrackerEnum.EXISTS
-                ] = True
-
-        for active_conn in active_conns:
-            try:
-                conn_name = str(self.nm_wrapper.get_active_connection_properties(
-                    conn
-                )["connection"]["id"])
-            except dbus.exceptions.DBusException:
-                conn_name = "None"
-
-            if conn_name in self.interface_state_tracker:
-                self.interface_state_tracker[conn_name][
-                    KillSwitchInterfaceTrackerEnum.IS_RUNNING
-                ] = True
-
+        self.__connection_state.update()
         logger.info("IPv6 status: {}".format(self.interface_state_tracker))
 
     def _ensure_connectivity_check_is_disabled(self):
@@ -1,30 +1,30 @@
-from ipaddress import ip_network
-
 import dbus
-from dbus.mainloop.glib import DBusGMainLoop
 
 from ... import exceptions
-from ...constants import (KILLSWITCH_CONN_NAME, KILLSWITCH_INTERFACE_NAME,
-                          ROUTED_CONN_NAME, ROUTED_INTERFACE_NAME,
+from ...constants import (KILLSWITCH_CONN_NAME,
+                          KILLSWITCH_INTERFACE_NAME, ROUTED_CONN_NAME,
+                          ROUTED_INTERFACE_NAME,
                           IPv4_DUMMY_ADDRESS, IPv4_DUMMY_GATEWAY,
                           IPv6_DUMMY_ADDRESS, IPv6_DUMMY_GATEWAY, KILLSWITCH_DNS_PRIORITY_VALUE)
 from ...enums import (KillSwitchActionEnum, KillSwitchInterfaceTrackerEnum,
-                      KillswitchStatusEnum)
+                      KillSwitchStateEnum, KillswitchStatusEnum)
 from ...logger import logger
 from ..dbus.dbus_network_manager_wrapper import NetworkManagerUnitWrapper
+from ..environment import ExecutionEnvironment
 from ..subprocess_wrapper import subprocess
+from .connection_state_tracker import ConnectionStateTracker
+from .dummy_connection import dummy_connection_settings
+from .routes import complement_routes, prebuild_complement_routes
+from .state_machine import KillSwitchStateMachine
 
 
 class KillSwitch:
-    # Additional loop needs to be create since SystemBus automatically
-    # picks the default loop, which is intialized with the CLI.
-    # Thus, to refrain SystemBus from using the default loop,
-    # one extra loop is needed only to be passed, while it is never used.
-    # https://dbus.freedesktop.org/doc/dbus-python/tutorial.html#setting-up-an-event-loop
-    dbus_loop = DBusGMainLoop()
-    bus = dbus.SystemBus(mainloop=dbus_loop)
-
     """Manages killswitch connection/interfaces."""
+    MAX_PREBUILT_ROUTES = 5
+    # Keep the routed connection between connections, updating it
+    # in memory, instead of deleting it and creating it again
+    reuse_profiles = False
+
     def __init__(
         self,
         nm_wrapper=NetworkManagerUnitWrapper,
@@ -45,21 +45,38 @@ class KillSwitch:
         self.ipv4_dummy_gateway = ipv4_dummy_gateway
         self.ipv6_dummy_addrs = ipv6_dummy_addrs
         self.ipv6_dummy_gateway = ipv6_dummy_gateway
-        self.nm_wrapper = nm_wrapper(self.bus)
-        self.interface_state_tracker = {
-            self.ks_conn_name: {
-                KillSwitchInterfaceTrackerEnum.EXISTS: False,
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING: False
-            },
-            self.routed_conn_name: {
-                KillSwitchInterfaceTrackerEnum.EXISTS: False,
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING: False
-            }
-        }
+        # Connect to the bus only when needed
+        self.__nm_wrapper_class = nm_wrapper
+        self.__nm_wrapper = None
+        self.__connection_state = ConnectionStateTracker(
+            lambda: self.nm_wrapper,
+            [self.ks_conn_name, self.routed_conn_name]
+        )
+        self.interface_state_tracker = self.__connection_state.state
+        self.state_machine = KillSwitchStateMachine(self)
 
         logger.info("Initialized killswitch manager")
         self.get_status_connectivity_check()
 
+    @property
+    def bus(self):
+        return ExecutionEnvironment().system_bus
+
+    @property
+    def nm_wrapper(self):
+        if self.__nm_wrapper is None:
+            self.__nm_wrapper = self.__nm_wrapper_class(self.bus)
+        return self.__nm_wrapper
+
+    def track_connection_changes(self):
+        """Keep the connection status from NetworkManager signals,
+        instead of syncing it on every operation.
+
+        Only for processes running a GLib main loop, see
+        ConnectionStateTracker.
+        """
+        return self.__connection_state.track_changes()
+
     def manage(self, action, server_ip=None):
         """Manage killswitch.
 
@@ -100,18 +117,7 @@ class KillSwitch:
         self.update_connection_status()
 
         if action == KillswitchStatusEnum.HARD:
-            try:
-                self.delete_connection(self.routed_conn_name)
-            except: # noqa
-                pass
-
-            if not self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.EXISTS
-            ]:
-                self.create_killswitch_connection()
-                return
-            else:
-                self.activate_connection(self.ks_conn_name)
+            self.state_machine.transition(KillSwitchStateEnum.BLOCKING)
         elif action in [
             KillswitchStatusEnum.SOFT, KillswitchStatusEnum.DISABLED
         ]:
@@ -121,163 +127,21 @@ class KillSwitch:
                 "Incorrect option for killswitch manager"
             )
 
-    def setup_pre_connection_ks(self, server_ip, pre_attempts=0):
-        """Assure pre-connection Kill Switch is setup correctly.
+    def setup_pre_connection_ks(self, server_ip):
+        """Route everything but the server IP(s) to the routed kill switch.
 
         Args:
             server_ip (list | string): Proton VPN server IP
-            pre_attempts (int): number of setup attempts
         """
-        self.update_connection_status()
-
-        if pre_attempts >= 5:
-            raise exceptions.KillswitchError(
-                "Unable to setup pre-connection ks. "
-                "Exceeded maximum attempts."
-            )
-
-        logger.info("Pre-setup attempts: {}".format(pre_attempts))
-
-        # happy path
-        if (
-            self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-            and not self.interface_state_tracker[self.routed_conn_name][
-                KillSwitchInterfaceTrackerEnum.EXISTS
-            ]
-        ):
-            logger.info("Following happy path for pre setup")
-            self.create_routed_connection(server_ip)
-            self.deactivate_connection(self.ks_conn_name)
-            return
-        elif (
-            not self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-            and self.interface_state_tracker[self.routed_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-        ):
-            logger.info("Both interfaces are correctly setup")
-            return
-
-        # check for routed ks and remove if present/running
-        if (
-            self.interface_state_tracker[self.routed_conn_name][
-                KillSwitchInterfaceTrackerEnum.EXISTS
-            ]
-            and self.interface_state_tracker[self.routed_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-        ):
-            logger.info("Deleting routed kill switch interface")
-            self.delete_connection(self.routed_conn_name)
-
-        # check if ks exists. Start it if it does
-        # if not then create and start it
-        if (
-            self.interface_state_tracker[
-                self.ks_conn_name
-            ][KillSwitchInterfaceTrackerEnum.EXISTS]
-        ):
-            logger.info("Activating kill switch interface")
-            self.activate_connection(self.ks_conn_name)
-        else:
-            logger.info("Creating kill switch interface")
-            self.create_killswitch_connection()
-
-        pre_attempts += 1
-        self.setup_pre_connection_ks(server_ip, pre_attempts=pre_attempts)
-
-    def setup_post_connection_ks(
-        self, _, post_attempts=0, activating_soft_connection=False
-    ):
-        """Assure post-connection Kill Switch is setup correctly.
-
-        Args:
-            post_attempts (int): number of setup attempts
-        """
-        self.update_connection_status()
-
-        if post_attempts >= 5:
-            raise exceptions.KillswitchError(
-                "Unable to setup post-connection ks. "
-                "Exceeded maximum attempts."
-            )
-
-        logger.info("Post-setup attempts: {}".format(post_attempts))
-
-        # happy path
-        if (
-            not self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-            and self.interface_state_tracker[self.routed_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-        ):
-            logger.info("Following happy path for post setup")
-            self.activate_connection(self.ks_conn_name)
-            self.delete_connection(self.routed_conn_name)
-
-            return
-        elif (
-            activating_soft_connection
-            and (
-                not self.interface_state_tracker[self.routed_conn_name][
-                    KillSwitchInterfaceTrackerEnum.IS_RUNNING
-                ] or not self.interface_state_tracker[self.routed_conn_name][
-                    KillSwitchInterfaceTrackerEnum.EXISTS
-                ]
-            )
-        ):
-            logger.info("Following happy path for soft-connection post setup")
-            self.activate_connection(self.ks_conn_name)
-            return
-        elif (
-            self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ] and (
-                not self.interface_state_tracker[self.routed_conn_name][
-                    KillSwitchInterfaceTrackerEnum.EXISTS
-                ] or not self.interface_state_tracker[self.routed_conn_name][
-                    KillSwitchInterfaceTrackerEnum.IS_RUNNING
-                ]
-            )
-        ):
-            logger.info("Both interfaces are correctly setup")
-            return
-
-        # check for ks and disable it if is running
-        if (
-            self.interface_state_tracker[self.ks_conn_name][
-                KillSwitchInterfaceTrackerEnum.IS_RUNNING
-            ]
-        ):
-            logger.info("Deactivating kill switch interface")
-            self.deactivate_connection(self.ks_conn_name)
+        self.state_machine.transition(KillSwitchStateEnum.ROUTED, server_ip)
 
-        # check if routed ks exists, if so then activate it
-        # else raise exception
-        if (
-            self.interface_state_tracker[self.routed_conn_name][KillSwitchInterfaceTrackerEnum.EXISTS] # noqa
-        ):
-            logger.info("Activating kill routed interface")
-            self.activate_connection(self.routed_conn_name)
-        else:
-            raise Exception("Routed connection does not exist")
-
-        post_attempts += 1
-        self.setup_post_connection_ks(
-            _, post_attempts=post_attempts,
-            activating_soft_connection=activating_soft_connection
-        )
+    def setup_post_connection_ks(self, _):
+        """Block everything but the VPN connection."""
+        self.state_machine.transition(KillSwitchStateEnum.BLOCKING)
 
     def setup_soft_connection(self, _):
         """Setup Kill Switch for --on setting."""
-        self.create_killswitch_connection()
-        self.setup_post_connection_ks(None, activating_soft_connection=True)
+        self.state_machine.transition(KillSwitchStateEnum.SOFT)
 
     def create_killswitch_connection(self):
         """Create killswitch connection/interface."""
@@ -300,6 +164,23 @@ class KillSwitch:
             "ipv4.dns", "0.0.0.0",
             "ipv6.dns", "::1"
         ]
+        connection_settings = dummy_connection_settings(
+            self.ks_conn_name, self.ks_interface_name,
+            ipv4=dict(
+                addresses=[self.ipv4_dummy_addrs],
+                gateway=self.ipv4_dummy_gateway,
+                route_metric=98,
+                dns_priority=KILLSWITCH_DNS_PRIORITY_VALUE,
+                dns=["0.0.0.0"]
+            ),
+            ipv6=dict(
+                addresses=[self.ipv6_dummy_addrs],
+                gateway=self.ipv6_dummy_gateway,
+                route_metric=98,
+                dns_priority=KILLSWITCH_DNS_PRIORITY_VALUE,
+                dns=["::1"]
+            )
+        )
         self.update_connection_status()
         if not self.interface_state_tracker[self.ks_conn_name][
             KillSwitchInterfaceTrackerEnum.EXISTS
@@ -307,23 +188,29 @@ class KillSwitch:
             self.create_connection(
                 self.ks_conn_name,
                 "Unable to activate {}".format(self.ks_conn_name),
-                subprocess_command, exceptions.CreateBlockingKillswitchError
+                subprocess_command, exceptions.CreateBlockingKillswitchError,
+                connection_settings
             )
 
-    def create_routed_connection(self, server_ip, try_route_addrs=False):
+    def create_routed_connection(
+        self, server_ip, try_route_addrs=False, hole_ips=None
+    ):
         """Create routed connection/interface.
 
+        Everything is routed to it, except the server IP(s) and the
+        client config hole IPs.
+
         Args:
-            server_ip (list(string)): the IP of the server to be connected
+            server_ip (string|list(string)): the IP(s) of the server
+                to be connected
+            hole_ips (list(string)): (optional) IPs to keep reachable,
+                from the cached client config by default
         """
-        if isinstance(server_ip, list):
-            server_ip = server_ip.pop()
-
-        subnet_list = list(ip_network('0.0.0.0/0').address_exclude(
-            ip_network(server_ip)
-        ))
+        if hole_ips is None:
+            hole_ips = self.get_hole_ips()
 
-        route_data = [str(ipv4) for ipv4 in subnet_list]
+        server_ips = server_ip if isinstance(server_ip, list) else [server_ip]
+        route_data = list(complement_routes(server_ips + hole_ips))
         route_data_str = ",".join(route_data)
 
         subprocess_command = [
@@ -346,7 +233,37 @@ class KillSwitch:
             "ipv6.dns", "::1"
         ]
 
+        connection_settings = dummy_connection_settings(
+            self.routed_conn_name, self.routed_interface_name,
+            ipv4=dict(
+                addresses=[self.ipv4_dummy_addrs],
+                routes=route_data,
+                route_metric=97,
+                dns_priority=KILLSWITCH_DNS_PRIORITY_VALUE,
+                dns=["0.0.0.0"]
+            ),
+            ipv6=dict(
+                addresses=[self.ipv6_dummy_addrs],
+                gateway=self.ipv6_dummy_gateway,
+                route_metric=97,
+                dns_priority=KILLSWITCH_DNS_PRIORITY_VALUE,
+                dns=["::1"]
+            ),
+            autoconnect=not self.reuse_profiles
+        )
+
+        if self.reuse_profiles and not try_route_addrs:
+            if self.save_profile(connection_settings):
+                self.activate_connection(self.routed_conn_name)
+                return
+
+            # Created again below, and activated by NetworkManager
+            self.delete_connection(self.routed_conn_name)
+            connection_settings["connection"].pop("autoconnect", None)
+
         if try_route_addrs:
+            # Only a workaround for nmcli
+            connection_settings = None
             subprocess_command = [
                 "nmcli", "c", "a", "type", "dummy",
                 "ifname", self.routed_interface_name,
@@ -372,22 +289,59 @@ class KillSwitch:
         try:
             self.create_connection(
                 self.routed_conn_name, exception_msg,
-                subprocess_command, exceptions.CreateRoutedKillswitchError
+                subprocess_command, exceptions.CreateRoutedKillswitchError,
+                connection_settings
             )
         except exceptions.CreateRoutedKillswitchError as e:
             if e.additional_context.returncode == 2 and not try_route_addrs:
-                return self.create_routed_connection(server_ip, True)
+                return self.create_routed_connection(
+                    server_ip, True, hole_ips
+                )
             else:
                 raise exceptions.CreateRoutedKillswitchError(exception_msg)
 
+    def prebuild_routes(self, server_ips):
+        """Compute the routes of the routed connection of each server
+        ahead of time, so that connecting to them doesn't have to.
+
+        Args:
+            server_ips (list(string)): IPs of the candidate servers, only
+                the first MAX_PREBUILT_ROUTES are prebuilt
+        """
+        prebuild_complement_routes(
+            server_ips[:self.MAX_PREBUILT_ROUTES], self.get_hole_ips()
+        )
+
+    def get_hole_ips(self):
+        """Get the IPs which have to stay reachable, from the client
+        config of the API session.
+
+        Returns:
+            list(string)
+        """
+        try:
+            client_config = ExecutionEnvironment().api_session.clientconfig
+            return list(client_config.hole_ips or [])
+        except Exception as e:
+            logger.info("Unable to get hole IPs: {}".format(e))
+            return []
+
     def create_connection(
         self, conn_name, exception_msg,
-        subprocess_command, exception
+        subprocess_command, exception, connection_settings=None
     ):
+        """Create a connection, over D-Bus if connection_settings
+        are provided, falling back to subprocess_command (nmcli)."""
         self.update_connection_status()
         if not self.interface_state_tracker[conn_name][
             KillSwitchInterfaceTrackerEnum.EXISTS
         ]:
+            if (
+                connection_settings is not None
+                and self.add_connection(connection_settings)
+            ):
+                return
+
             self.run_subprocess(
                 exception,
                 exception_msg,
@@ -415,9 +369,11 @@ class KillSwitch:
                 KillSwitchInterfaceTrackerEnum.IS_RUNNING
             ]
         ) and conn_dict:
-            device_path = str(conn_dict.get("device_path"))
+            # Software devices (dummy) only exist while activated
+            device_path = str(conn_dict.get("device_path") or "/")
             settings_path = str(conn_dict.get("settings_path"))
 
+            self.__connection_state.invalidate()
             try:
                 active_conn = self.nm_wrapper.activate_connection(
                     settings_path, device_path
@@ -454,6 +410,7 @@ class KillSwitch:
             ] and active_conn_dict
         ):
             active_conn_path = str(active_conn_dict.get("active_conn_path"))
+            self.__connection_state.invalidate()
             try:
                 self.nm_wrapper.disconnect_connection(
                     active_conn_path
@@ -477,12 +434,104 @@ class KillSwitch:
 
         self.update_connection_status()
         if self.interface_state_tracker[conn_name][KillSwitchInterfaceTrackerEnum.EXISTS]: # noqa
+            if self.remove_connection(conn_name):
+                return
+
             self.run_subprocess(
                 exceptions.DeleteKillswitchError,
                 "Unable to delete {}".format(conn_name),
                 subprocess_command
             )
 
+    def add_connection(self, connection_settings):
+        """Add a connection over D-Bus.
+
+        Args:
+            connection_settings (dict): see dummy_connection_settings()
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        self.__connection_state.invalidate()
+        try:
+            self.nm_wrapper.add_connection(connection_settings)
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to add {} over D-Bus: {}".format(
+                connection_settings["connection"]["id"], e
+            ))
+            return False
+
+        return True
+
+    def save_profile(self, connection_settings):
+        """Add a connection, or update it in place if it exists, over D-Bus.
+
+        The profile is only kept in memory, so that updating it doesn't
+        write to disk.
+
+        Args:
+            connection_settings (dict): see dummy_connection_settings()
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        conn_name = str(connection_settings["connection"]["id"])
+        conn_dict = self.nm_wrapper.search_for_connection(
+            conn_name, return_settings_path=True
+        )
+        try:
+            if conn_dict:
+                settings_path = str(conn_dict["settings_path"])
+                # The uuid of a connection can't change
+                connection_settings["connection"]["uuid"] = \
+                    self.nm_wrapper.get_snapshot().connections[
+                        settings_path
+                    ]["connection"]["uuid"]
+                self.__connection_state.invalidate()
+                self.nm_wrapper.update_connection(
+                    settings_path, connection_settings, in_memory=True
+                )
+            else:
+                self.__connection_state.invalidate()
+                self.nm_wrapper.add_connection(
+                    connection_settings, in_memory=True
+                )
+        except (dbus.exceptions.DBusException, KeyError) as e:
+            logger.info("Unable to save {} over D-Bus: {}".format(
+                conn_name, e
+            ))
+            return False
+
+        return True
+
+    def remove_connection(self, conn_name):
+        """Delete a connection over D-Bus.
+
+        Args:
+            conn_name (string): connection name (uid)
+
+        Returns:
+            bool: False if it failed, and nmcli should be used instead
+        """
+        conn_dict = self.nm_wrapper.search_for_connection(
+            conn_name, return_settings_path=True
+        )
+        if not conn_dict:
+            return False
+
+        self.__connection_state.invalidate()
+        try:
+            self.nm_wrapper.delete_connection(
+                str(conn_dict["settings_path"])
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to delete {} over D-Bus: {}".format(
+                conn_name, e
+            ))
+            return False
+
+        return True
+
     def deactivate_all_connections(self):
         """Deactivate all connections."""
         self.deactivate_connection(self.ks_conn_name)
@@ -490,44 +539,16 @@ class KillSwitch:
 
     def delete_all_connections(self, _=None):
         """Delete all connections."""
-        self.delete_connection(self.ks_conn_name)
-        self.delete_connection(self.routed_conn_name)
+        self.state_machine.transition(KillSwitchStateEnum.DISABLED)
+
+    def invalidate_connection_status(self):
+        """Sync the connection/interface status again on next update,
+        ie after a change made outside of the kill switch."""
+        self.__connection_state.invalidate()
 
     def update_connection_status(self):
         """Update connection/interface status."""
-        all_conns = self.nm_wrapper.get_all_connections()
-        active_conns = self.nm_wrapper.get_all_active_connections()
-        self.interface_state_tracker[self.ks_conn_name][KillSwitchInterfaceTrackerEnum.EXISTS] = False # noqa
-        self.interface_state_tracker[self.routed_conn_name][KillSwitchInterfaceTrackerEnum.EXISTS] = False  # noqa
-        self.interface_state_tracker[self.ks_conn_name][KillSwitchInterfaceTrackerEnum.IS_RUNNING] = False # noqa
-        self.interface_state_tracker[self.routed_conn_name][KillSwitchInterfaceTrackerEnum.IS_RUNNING] = False  # noqa
-
-        for conn in all_conns:
-            try:
-                conn_name = str(self.nm_wrapper.get_settings_from_connection(
-                    conn
-                )["connection"]["id"])
-            except dbus.exceptions.DBusException:
-                conn_name = "None"
-
-            if conn_name in self.interface_state_tracker:
-                self.interface_state_tracker[conn_name][
-                    KillSwitchInterfaceTrackerEnum.EXISTS
-                ] = True
-
-        for active_conn in active_conns:
-            try:
-                conn_name = str(self.nm_wrapper.get_active_connection_properties(
-                    active_conn
-                )["Id"])
-            except dbus.exceptions.DBusException:
-                conn_name = "None"
-
-            if conn_name in self.interface_state_tracker:
-                self.interface_state_tracker[conn_name][
-                    KillSwitchInterfaceTrackerEnum.IS_RUNNING
-                ] = True
-
+        self.__connection_state.update()
         logger.info("Tracker info: {}".format(self.interface_state_tracker))
 
     def run_subprocess(self, exception, exception_msg, *args):
@@ -538,6 +559,7 @@ class KillSwitch:
             exception_msg (string): exception message
             *args (list): arguments to be passed to subprocess
         """
+        self.__connection_state.invalidate()
         subprocess_outpout = subprocess.run(
             *args, stderr=subprocess.PIPE, stdout=subprocess.PIPE
         )
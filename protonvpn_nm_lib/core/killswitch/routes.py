@@ -0,0 +1,74 @@
+from functools import lru_cache
+from ipaddress import (IPv4Address, IPv4Network, collapse_addresses,
+                       ip_network, summarize_address_range)
+
+from ...logger import logger
+
+IPv4_ALL = IPv4Network("0.0.0.0/0")
+
+
+def complement_routes(excluded_ips):
+    """Get the routes covering all the IPv4 addresses except excluded_ips.
+
+    The routes are the smallest set of CIDR networks covering the
+    complement, and are memoized per set of excluded IPs. IPv6 addresses
+    are ignored, as only IPv4 is routed.
+
+    Args:
+        excluded_ips (list(string)): IPs or networks (CIDR notation)
+
+    Returns:
+        tuple(string): routes in CIDR notation
+
+    Raises:
+        ValueError: if one of excluded_ips isn't an IP or network
+    """
+    excluded_networks = set()
+    for excluded_ip in excluded_ips:
+        network = ip_network(excluded_ip, strict=False)
+        if network.version != 4:
+            logger.info("Ignoring IPv6 route exclusion {}".format(network))
+            continue
+
+        excluded_networks.add(network)
+
+    return _complement_routes(frozenset(excluded_networks))
+
+
+@lru_cache(maxsize=32)
+def _complement_routes(excluded_networks):
+    routes = []
+    # First address not yet covered or excluded
+    start = int(IPv4_ALL.network_address)
+    for network in collapse_addresses(excluded_networks):
+        if int(network.network_address) > start:
+            routes.extend(summarize_address_range(
+                IPv4Address(start),
+                network.network_address - 1
+            ))
+        start = int(network.broadcast_address) + 1
+
+    if start <= int(IPv4_ALL.broadcast_address):
+        routes.extend(summarize_address_range(
+            IPv4Address(start),
+            IPv4_ALL.broadcast_address
+        ))
+
+    return tuple(str(route) for route in routes)
+
+
+def prebuild_complement_routes(server_ips, hole_ips=()):
+    """Compute the routes of several servers ahead of time, ie for
+    the candidates of a failover.
+
+    Args:
+        server_ips (list(string)): server IPs, built separately
+        hole_ips (list(string)): (optional) IPs excluded for every server
+    """
+    for server_ip in server_ips:
+        try:
+            complement_routes([server_ip] + list(hole_ips))
+        except ValueError as e:
+            logger.info("Unable to prebuild routes for {}: {}".format(
+                server_ip, e
+            ))
@@ -0,0 +1,279 @@
+import threading
+import time
+
+import dbus
+
+from ... import exceptions
+from ...enums import KillSwitchInterfaceTrackerEnum, KillSwitchStateEnum
+from ...logger import logger
+
+
+class KillSwitchStateMachine:
+    """Move the kill switch from its current state to a target state.
+
+    States, from the blocking (ks_conn_name) and routed (routed_conn_name)
+    connections:
+        DISABLED: none of them is running
+        BLOCKING: the blocking one runs, the routed one doesn't
+        ROUTED: the routed one runs, the blocking one doesn't
+
+    As targets, DISABLED deletes both connections, and BLOCKING deletes
+    the routed one unless the kill switch reuses profiles. SOFT is
+    BLOCKING which keeps an inactive routed connection.
+
+    The steps to reach the target are planned once from the current
+    state and run in order. Steps which need a connection to be running
+    before going on (so that traffic is never left unblocked) wait for
+    NetworkManager to report it active, up to WAIT_TIMEOUT.
+
+    The duration of each step of the last transition is kept in
+    last_timings and logged.
+
+    Args:
+        killswitch (KillSwitch)
+    """
+    WAIT_TIMEOUT = 5  # seconds
+    POLL_INTERVAL = 0.05  # seconds
+
+    def __init__(self, killswitch):
+        self.__killswitch = killswitch
+        self.last_timings = []
+
+    def get_state(self):
+        """Get the current state.
+
+        Returns:
+            KillSwitchStateEnum
+        """
+        self.__killswitch.update_connection_status()
+        ks_running = self.__get_status(self.__killswitch.ks_conn_name)[1]
+        routed_running = self.__get_status(
+            self.__killswitch.routed_conn_name
+        )[1]
+
+        if ks_running and not routed_running:
+            return KillSwitchStateEnum.BLOCKING
+        elif routed_running and not ks_running:
+            return KillSwitchStateEnum.ROUTED
+        elif not ks_running and not routed_running:
+            return KillSwitchStateEnum.DISABLED
+
+        return KillSwitchStateEnum.UNKNOWN
+
+    def plan(self, target, server_ip=None):
+        """Get the steps leading from the current state to target.
+
+        Args:
+            target (KillSwitchStateEnum)
+            server_ip (string|list(string)): server IP(s), for ROUTED
+
+        Returns:
+            list(tuple(string, callable)): step names and steps
+        """
+        ks = self.__killswitch
+        ks_exists, ks_running = self.__get_status(ks.ks_conn_name)
+        routed_exists, routed_running = self.__get_status(
+            ks.routed_conn_name
+        )
+
+        if target == KillSwitchStateEnum.DISABLED:
+            steps = []
+            if ks_exists:
+                steps.append(("delete blocking", lambda: ks.delete_connection(
+                    ks.ks_conn_name
+                )))
+            if routed_exists:
+                steps.append(("delete routed", lambda: ks.delete_connection(
+                    ks.routed_conn_name
+                )))
+            return steps
+
+        if target == KillSwitchStateEnum.ROUTED:
+            if routed_running and not ks_running:
+                return []
+            if server_ip is None:
+                raise exceptions.KillswitchError(
+                    "Unable to route kill switch without a server IP"
+                )
+        elif target not in [
+            KillSwitchStateEnum.BLOCKING, KillSwitchStateEnum.SOFT
+        ]:
+            raise exceptions.KillswitchError(
+                "Incorrect kill switch state {}".format(target)
+            )
+
+        # Traffic is blocked before the routed connection is removed
+        steps = []
+        if not ks_exists:
+            steps.append((
+                "create blocking", ks.create_killswitch_connection
+            ))
+        elif not ks_running:
+            steps.append(("activate blocking", lambda: ks.activate_connection(
+                ks.ks_conn_name
+            )))
+        if not ks_running:
+            steps.append(("wait blocking", lambda: self.wait_for_connection(
+                ks.ks_conn_name
+            )))
+
+        if ks.reuse_profiles:
+            # Updated in place by create_routed_connection()
+            if routed_running:
+                steps.append((
+                    "deactivate routed", lambda: ks.deactivate_connection(
+                        ks.routed_conn_name
+                    )
+                ))
+        elif routed_exists and (
+            routed_running or target != KillSwitchStateEnum.SOFT
+        ):
+            steps.append(("delete routed", lambda: ks.delete_connection(
+                ks.routed_conn_name
+            )))
+
+        if target == KillSwitchStateEnum.ROUTED:
+            steps.extend([
+                ("create routed", lambda: ks.create_routed_connection(
+                    server_ip
+                )),
+                ("wait routed", lambda: self.wait_for_connection(
+                    ks.routed_conn_name
+                )),
+                ("deactivate blocking", lambda: ks.deactivate_connection(
+                    ks.ks_conn_name
+                )),
+            ])
+
+        return steps
+
+    def transition(self, target, server_ip=None):
+        """Move the kill switch to target.
+
+        Args:
+            target (KillSwitchStateEnum)
+            server_ip (string|list(string)): server IP(s), for ROUTED
+        """
+        initial_state = self.get_state()
+        steps = self.plan(target, server_ip)
+
+        self.last_timings = []
+        transition_start = time.monotonic()
+        try:
+            for step_name, step in steps:
+                step_start = time.monotonic()
+                step()
+                self.last_timings.append(
+                    (step_name, time.monotonic() - step_start)
+                )
+        finally:
+            logger.info(
+                "Kill switch transition {} -> {} took {:.3f}s: {}".format(
+                    initial_state.name, target.name,
+                    time.monotonic() - transition_start,
+                    ", ".join(
+                        "{} {:.3f}s".format(step_name, duration)
+                        for step_name, duration in self.last_timings
+                    ) or "nothing to do"
+                )
+            )
+
+    def wait_for_connection(self, conn_name):
+        """Wait for a connection to be active.
+
+        Changes are waited for with NetworkManager signals, or by polling
+        if a main loop is already running (ie in the reconnector daemon),
+        as a nested one would dispatch its other events. Polling is also
+        used outside of the main thread: signals are dispatched by the
+        default main context, which the application's main loop
+        might be running meanwhile.
+
+        Args:
+            conn_name (string): connection name
+
+        Raises:
+            KillswitchError: if it isn't active after WAIT_TIMEOUT
+        """
+        try:
+            from gi.repository import GLib
+        except ImportError:
+            GLib = None
+
+        if (
+            GLib is not None
+            and threading.current_thread() is threading.main_thread()
+            and GLib.main_depth() == 0
+        ):
+            is_running = self.__wait_for_signal(GLib, conn_name)
+        else:
+            is_running = self.__poll(conn_name)
+
+        if not is_running:
+            raise exceptions.KillswitchError(
+                "{} is still not active after {}s".format(
+                    conn_name, self.WAIT_TIMEOUT
+                )
+            )
+
+    def __wait_for_signal(self, GLib, conn_name):
+        loop = GLib.MainLoop()
+
+        def on_properties_changed(_interface, changed_properties, _):
+            if (
+                "ActiveConnections" in changed_properties
+                and self.__is_running(conn_name, refresh=True)
+            ):
+                loop.quit()
+
+        try:
+            signal_match = self.__killswitch.nm_wrapper.connect_network_manager_properties_changed( # noqa
+                on_properties_changed
+            )
+        except dbus.exceptions.DBusException as e:
+            logger.info("Unable to wait for signals: {}".format(e))
+            return self.__poll(conn_name)
+
+        try:
+            # Changes made before the signal was connected
+            if self.__is_running(conn_name, refresh=True):
+                return True
+
+            timed_out = []
+
+            def on_timeout():
+                timed_out.append(True)
+                loop.quit()
+
+            timeout_id = GLib.timeout_add(
+                int(self.WAIT_TIMEOUT * 1000), on_timeout
+            )
+            loop.run()
+            if not timed_out:
+                GLib.source_remove(timeout_id)
+        finally:
+            signal_match.remove()
+
+        return self.__is_running(conn_name, refresh=True)
+
+    def __poll(self, conn_name):
+        deadline = time.monotonic() + self.WAIT_TIMEOUT
+        while not self.__is_running(conn_name, refresh=True):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(self.POLL_INTERVAL)
+
+        return True
+
+    def __is_running(self, conn_name, refresh=False):
+        if refresh:
+            self.__killswitch.invalidate_connection_status()
+            self.__killswitch.update_connection_status()
+
+        return self.__get_status(conn_name)[1]
+
+    def __get_status(self, conn_name):
+        conn_state = self.__killswitch.interface_state_tracker[conn_name]
+        return (
+            conn_state[KillSwitchInterfaceTrackerEnum.EXISTS],
+            conn_state[KillSwitchInterfaceTrackerEnum.IS_RUNNING],
+        )
@@ -18,6 +18,10 @@ class ConnectionMetadataBackend(SubclassesMixin, metaclass=ABCMeta):
 
         return subclasses_dict[connection_metadata_backend]()
 
+    @abstractmethod
+    def batch():
+        """Context in which metadata is only written once, on exit."""
+
     @abstractmethod
     def save_servername():
         """Save servername metadata."""
@@ -2,6 +2,7 @@
 import json
 import os
 import time
+from contextlib import contextmanager
 
 from .... import exceptions
 from ....constants import (CACHE_METADATA_FILEPATH, CONNECTION_STATE_FILEPATH,
@@ -9,6 +10,7 @@ from ....constants import (CACHE_METADATA_FILEPATH, CONNECTION_STATE_FILEPATH,
 from ....enums import (ConnectionMetadataEnum, LastConnectionMetadataEnum,
                        MetadataActionEnum, MetadataEnum)
 from ....logger import logger
+from ...cache_store import CacheStore
 from .connection_metadata_backend import ConnectionMetadataBackend
 
 
@@ -27,7 +29,42 @@ class ConnectionMetadata(ConnectionMetadataBackend):
     }
 
     def __init__(self):
-        pass
+        # metadata type => ((mtime_ns, size), metadata) as last read
+        # or written, so that unchanged files are not parsed again
+        self.__read_cache = {}
+        # metadata type => metadata, while in batch()
+        self.__batch = None
+        self.__batch_modified = set()
+
+    @contextmanager
+    def batch(self):
+        """Hold metadata in memory while in the context and write each
+        modified metadata file only once, on exit.
+
+        Example:
+            with connection_metadata.batch():
+                connection_metadata.save_servername(servername)
+                connection_metadata.save_protocol(protocol)
+        """
+        if self.__batch is not None:
+            yield self
+            return
+
+        self.__batch = {}
+        self.__batch_modified = set()
+        try:
+            yield self
+        finally:
+            documents, modified = self.__batch, self.__batch_modified
+            self.__batch = None
+            self.__batch_modified = set()
+            for metadata_type in modified:
+                if documents[metadata_type] is None:
+                    self.remove_metadata_file(metadata_type, None)
+                else:
+                    self.write_metadata_to_file(
+                        metadata_type, documents[metadata_type]
+                    )
 
     def save_servername(self, servername):
         """Save connected servername metadata.
@@ -222,25 +259,60 @@ class ConnectionMetadata(ConnectionMetadataBackend):
             json/dict
         """
         logger.debug("Getting metadata from \"{}\"".format(metadata_type))
-        with open(self.METADATA_DICT[metadata_type]) as f:
-            metadata = json.load(f)
-            logger.debug("Successfully fetched metadata from file")
+        if self.__batch is not None and metadata_type in self.__batch:
+            metadata = self.__batch[metadata_type]
+            if metadata is None:
+                raise FileNotFoundError(self.METADATA_DICT[metadata_type])
             return metadata
 
+        filepath = self.METADATA_DICT[metadata_type]
+        signature = self.__signature(filepath)
+        cached = self.__read_cache.get(metadata_type)
+        if cached is not None and cached[0] == signature:
+            metadata = dict(cached[1])
+        else:
+            metadata = json.loads(CacheStore().read(filepath))
+            self.__read_cache[metadata_type] = (signature, dict(metadata))
+            logger.debug("Successfully fetched metadata from file")
+
+        if self.__batch is not None:
+            self.__batch[metadata_type] = metadata
+
+        return metadata
+
     def write_metadata_to_file(self, metadata_type, metadata):
         """Save metadata to file."""
-        with open(self.METADATA_DICT[metadata_type], "w") as f:
-            json.dump(metadata, f)
-            logger.debug(
-                "Successfully saved metadata to \"{}\"".format(metadata_type)
-            )
+        if self.__batch is not None:
+            self.__batch[metadata_type] = metadata
+            self.__batch_modified.add(metadata_type)
+            return
+
+        filepath = self.METADATA_DICT[metadata_type]
+        CacheStore().write(filepath, json.dumps(metadata))
+        self.__read_cache[metadata_type] = (
+            self.__signature(filepath), dict(metadata)
+        )
+        logger.debug(
+            "Successfully saved metadata to \"{}\"".format(metadata_type)
+        )
 
     def remove_metadata_file(self, metadata_type, _):
         """Remove metadata file."""
-        filepath = self.METADATA_DICT[metadata_type]
+        if self.__batch is not None:
+            self.__batch[metadata_type] = None
+            self.__batch_modified.add(metadata_type)
+            return
+
+        self.__read_cache.pop(metadata_type, None)
+        CacheStore().remove(self.METADATA_DICT[metadata_type])
+
+    def __signature(self, filepath):
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
 
-        if os.path.isfile(filepath):
-            os.remove(filepath)
+        return stat.st_mtime_ns, stat.st_size
 
     def ensure_metadata_type_is_valid(self, metadata_type):
         """Check metedata type."""
@@ -6,6 +6,7 @@ from .... import exceptions
 from ....constants import NETZONE_METADATA_FILEPATH
 from ....enums import MetadataActionEnum, MetadataEnum, NetzoneMetadataEnum
 from ....logger import logger
+from ...cache_store import CacheStore
 from ._base import NetzoneMetadataBackend
 
 
@@ -128,25 +129,24 @@ class DefaultNetzone(NetzoneMetadataBackend):
             json/dict
         """
         logger.debug("Getting metadata from \"{}\"".format(metadata_type))
-        with open(self.METADATA_DICT[metadata_type]) as f:
-            metadata = json.load(f)
-            logger.debug("Successfully fetched metadata from file")
-            return metadata
+        metadata = json.loads(
+            CacheStore().read(self.METADATA_DICT[metadata_type])
+        )
+        logger.debug("Successfully fetched metadata from file")
+        return metadata
 
     def __write_metadata_to_file(self, metadata_type, metadata):
         """Save metadata to file."""
-        with open(self.METADATA_DICT[metadata_type], "w") as f:
-            json.dump(metadata, f)
-            logger.debug(
-                "Successfully saved metadata to \"{}\"".format(metadata_type)
-            )
+        CacheStore().write(
+            self.METADATA_DICT[metadata_type], json.dumps(metadata)
+        )
+        logger.debug(
+            "Successfully saved metadata to \"{}\"".format(metadata_type)
+        )
 
     def __remove_metadata_file(self, metadata_type, _):
         """Remove metadata file."""
-        filepath = self.METADATA_DICT[metadata_type]
-
-        if os.path.isfile(filepath):
-            os.remove(filepath)
+        CacheStore().remove(self.METADATA_DICT[metadata_type])
 
     def __ensure_metadata_type_is_valid(self, metadata_type):
         """Check metedata type."""
@@ -31,6 +31,11 @@ class NotificationData:
         data["NotificationsUpdateTimestamp"] = time.time()
         self.__data = data
 
+    def touch_notifications_data(self):
+        """Mark the cached notifications as up to date, ie when the API
+        reported them as not modified."""
+        self.__data["NotificationsUpdateTimestamp"] = time.time()
+
     def get_notification(self, notification_type):
         try:
             _data = self.__data.get("Notifications", None)[0]
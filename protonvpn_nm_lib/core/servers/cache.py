@@ -0,0 +1,300 @@
+import json
+import struct
+import sys
+from array import array
+
+# Binary server list cache.
+#
+# Layout (little endian):
+# - header
+# - metadata: JSON object (timestamps and any other toplevel field)
+# - records: one fixed-width record per logical, holding the fields
+#   the ServerListIndex is built from. Load, score and status in the
+#   record take precedence over the ones of the blob.
+# - string table: offsets (strings_count + 1 uint32), then utf-8 data.
+#   Ids, names and countries are deduplicated in there.
+# - blobs: one JSON object per logical (the full API format), only
+#   decoded when the logical is accessed
+MAGIC = b"PVSL"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHxxIIII")
+# id, name, exit country (string table indices), tier, status,
+# any physical enabled, features, score, load, blob offset, blob length
+RECORD = struct.Struct("<IIIbbbxidiII")
+(
+    _ID, _NAME, _EXIT_COUNTRY, _TIER, _STATUS, _PHYSICALS_ENABLED,
+    _FEATURES, _SCORE, _LOAD, _BLOB_OFFSET, _BLOB_LENGTH
+) = range(11)
+
+
+def _uint32_array(buffer):
+    values = array("I")
+    values.frombytes(buffer)
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+def _index_fields(server):
+    return (
+        server.id, server.name, server.exit_country, server.tier,
+        server.features_bitmap, server.enabled, server.score
+    )
+
+
+def _apply_load(server, load, score, status):
+    server.load = load
+    server.score = score
+    server.enabled = status
+
+
+class MappedServerRecords:
+    """Read-only sequence of LogicalServer, backed by a binary cache.
+
+    Only the fixed-width records are read to build the index, a
+    LogicalServer is decoded from its JSON blob on first access and
+    then kept. Load updates of logicals which weren't decoded yet are
+    kept aside, without decoding them.
+
+    Use loads() to create it.
+    """
+    def __init__(self, buffer, count, metadata_length, strings_count,
+                 strings_length):
+        self.__buffer = buffer
+        self.__view = memoryview(buffer)
+        self.__count = count
+
+        records_start = HEADER.size + metadata_length
+        strings_index_start = records_start + count * RECORD.size
+        strings_start = strings_index_start + (strings_count + 1) * 4
+        self.__blobs_start = strings_start + strings_length
+
+        self.__records = self.__view[records_start:strings_index_start]
+        self.__strings_offsets = _uint32_array(
+            self.__view[strings_index_start:strings_start]
+        )
+        self.__strings = self.__view[strings_start:self.__blobs_start]
+        self.__decoded_strings = {}
+        self.__servers = [None] * count
+        self.__loads = {}
+
+        # Blobs are stored in the order of the records,
+        # so the last one ends the file
+        blobs_end = self.__blobs_start
+        if count > 0 and len(self.__records) == count * RECORD.size:
+            last_record = RECORD.unpack_from(
+                self.__records, (count - 1) * RECORD.size
+            )
+            blobs_end += last_record[_BLOB_OFFSET] + last_record[_BLOB_LENGTH]
+
+        if len(self.__view) < blobs_end:
+            raise ValueError("Truncated server cache")
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, position):
+        server = self.__servers[position]
+        if server is None:
+            from .list import LogicalServer
+            record = self.__record(position)
+            server = LogicalServer(json.loads(
+                self.__blob(record).tobytes().decode("utf-8")
+            ))
+            _apply_load(
+                server, record[_LOAD], record[_SCORE], record[_STATUS]
+            )
+            self.__servers[position] = server
+
+        return server
+
+    def __iter__(self):
+        for position in range(self.__count):
+            yield self[position]
+
+    def is_decoded(self, position):
+        return self.__servers[position] is not None
+
+    def __record(self, position):
+        record = RECORD.unpack_from(self.__records, position * RECORD.size)
+        load = self.__loads.get(position)
+        if load is not None:
+            record = list(record)
+            record[_LOAD], record[_SCORE], record[_STATUS] = load
+
+        return record
+
+    def __blob(self, record):
+        start = self.__blobs_start + record[_BLOB_OFFSET]
+        return self.__view[start:start + record[_BLOB_LENGTH]]
+
+    def __string(self, string_index):
+        string = self.__decoded_strings.get(string_index)
+        if string is None:
+            string = sys.intern(self.__strings[
+                self.__strings_offsets[string_index]:
+                self.__strings_offsets[string_index + 1]
+            ].tobytes().decode("utf-8"))
+            self.__decoded_strings[string_index] = string
+
+        return string
+
+    def get_load(self, position):
+        """Get load, score and status of a logical, without decoding it.
+
+        Returns:
+            tuple(int, float, int)
+        """
+        if self.is_decoded(position):
+            server = self.__servers[position]
+            return server.load, server.score, server.status
+
+        record = self.__record(position)
+        return record[_LOAD], record[_SCORE], record[_STATUS]
+
+    def update_load(self, position, load, score, status):
+        """Update load, score and status of a logical, without decoding it.
+
+        Returns:
+            tuple(float, bool): new score and enabled state
+        """
+        if self.is_decoded(position):
+            server = self.__servers[position]
+            _apply_load(server, load, score, status)
+            return server.score, server.enabled
+
+        self.__loads[position] = (int(load), float(score), status)
+        record = self.__record(position)
+        return record[_SCORE], bool(
+            record[_STATUS] == 1 and record[_PHYSICALS_ENABLED]
+        )
+
+    def raw(self, position):
+        """Get the record and JSON blob of an undecoded logical.
+
+        Returns:
+            tuple(tuple, list, bytes): index fields, record
+                (see RECORD) and JSON blob
+        """
+        record = self.__record(position)
+        return (
+            self.__string(record[_ID]), self.__string(record[_NAME]),
+            self.__string(record[_EXIT_COUNTRY]), record[_TIER],
+            record[_FEATURES],
+            bool(record[_STATUS] == 1 and record[_PHYSICALS_ENABLED]),
+            record[_SCORE]
+        ), record, self.__blob(record)
+
+    def index_fields(self):
+        """Iterate over the fields ServerListIndex is built from,
+        without decoding the logicals which weren't accessed yet."""
+        for position in range(self.__count):
+            if self.is_decoded(position):
+                yield _index_fields(self.__servers[position])
+            else:
+                yield self.raw(position)[0]
+
+
+def dumps(metadata, servers):
+    """Serialize a server list into the binary cache format.
+
+    Args:
+        metadata (dict): toplevel fields of the server list
+        servers (list(LogicalServer)|MappedServerRecords)
+
+    Returns:
+        bytes
+    """
+    strings = {}
+    string_offsets = array("I", [0])
+    string_chunks = []
+
+    def string_index(value):
+        index = strings.get(value)
+        if index is None:
+            encoded = value.encode("utf-8")
+            index = strings[value] = len(string_chunks)
+            string_chunks.append(encoded)
+            string_offsets.append(string_offsets[-1] + len(encoded))
+
+        return index
+
+    records = []
+    blobs = []
+    blobs_length = 0
+    is_mapped = isinstance(servers, MappedServerRecords)
+    for position in range(len(servers)):
+        if is_mapped and not servers.is_decoded(position):
+            # Copy the entry as is, no need to decode it
+            fields, record, blob = servers.raw(position)
+            status = record[_STATUS]
+            physicals_enabled = record[_PHYSICALS_ENABLED]
+            load = record[_LOAD]
+        else:
+            server = servers[position]
+            fields = _index_fields(server)
+            status = server.status
+            physicals_enabled = any(
+                x.enabled for x in server.physical_servers
+            )
+            load = server.load
+            blob = json.dumps(server.data).encode("utf-8")
+
+        (
+            logical_id, name, exit_country, tier,
+            features, _, score
+        ) = fields
+        records.append(RECORD.pack(
+            string_index(logical_id), string_index(name),
+            string_index(exit_country), tier, status, physicals_enabled,
+            features, score, load, blobs_length, len(blob)
+        ))
+        blobs.append(blob)
+        blobs_length += len(blob)
+
+    encoded_metadata = json.dumps(metadata).encode("utf-8")
+    header = HEADER.pack(
+        MAGIC, VERSION, len(servers), len(encoded_metadata),
+        len(string_chunks), string_offsets[-1]
+    )
+    if sys.byteorder == "big":
+        string_offsets.byteswap()
+
+    return b"".join(
+        [header, encoded_metadata] + records
+        + [string_offsets.tobytes()] + string_chunks + blobs
+    )
+
+
+def loads(buffer):
+    """Load a binary cache, without decoding the logicals.
+
+    Args:
+        buffer (bytes|mmap.mmap): binary cache content, which has to
+            stay valid (and unmodified) as long as the records are used
+
+    Returns:
+        tuple(dict, MappedServerRecords): metadata and records
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Truncated server cache")
+
+    (
+        magic, version, count, metadata_length,
+        strings_count, strings_length
+    ) = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a server cache")
+    if version != VERSION:
+        raise ValueError(
+            "Unsupported server cache version {}".format(version)
+        )
+
+    metadata = json.loads(bytes(
+        buffer[HEADER.size:HEADER.size + metadata_length]
+    ).decode("utf-8"))
+    return metadata, MappedServerRecords(
+        buffer, count, metadata_length, strings_count, strings_length
+    )
@@ -0,0 +1,283 @@
+from array import array
+
+from ...enums import FeatureEnum
+
+
+class ServerCriteria:
+    """Declarative filter criteria for a ServerList view.
+
+    Unlike a plain condition callable, criteria can be answered from the
+    precomputed ServerListIndex by intersecting posting lists, without
+    instantiating a LogicalServer per logical.
+
+    Args:
+        max_tier (int): (optional) only servers with tier <= max_tier
+        exit_country (string): (optional) exit country code
+        features (int): (optional) bitmask of features that must be present
+        excluded_features (int): (optional) bitmask of features
+            that must not be present
+        name (string): (optional) servername (case insensitive)
+        enabled (bool): (optional) only enabled servers
+    """
+    __slots__ = (
+        "max_tier", "exit_country", "features",
+        "excluded_features", "name", "enabled", "empty"
+    )
+
+    def __init__(
+        self, max_tier=None, exit_country=None, features=0,
+        excluded_features=0, name=None, enabled=False
+    ):
+        self.max_tier = max_tier
+        self.exit_country = None if exit_country is None else exit_country.upper() # noqa
+        self.features = int(features)
+        self.excluded_features = int(excluded_features)
+        self.name = None if name is None else name.lower()
+        self.enabled = enabled
+        self.empty = False
+
+    def merge(self, other):
+        """Return new criteria matching both self and other."""
+        max_tiers = [t for t in (self.max_tier, other.max_tier) if t is not None]
+        merged = ServerCriteria(
+            max_tier=min(max_tiers) if max_tiers else None,
+            exit_country=self.exit_country or other.exit_country,
+            features=self.features | other.features,
+            excluded_features=self.excluded_features | other.excluded_features,
+            name=self.name or other.name,
+            enabled=self.enabled or other.enabled
+        )
+        # Contradicting criteria can not match anything
+        merged.empty = bool(self.empty or other.empty or (
+            self.exit_country and other.exit_country
+            and self.exit_country != other.exit_country
+        ) or (
+            self.name and other.name and self.name != other.name
+        ) or merged.features & merged.excluded_features)
+        return merged
+
+    @property
+    def feature_mask(self):
+        """Bits to check, all required and excluded features."""
+        return self.features | self.excluded_features
+
+    def as_condition(self):
+        """Compile the criteria into a condition on a LogicalServer.
+
+        Returns:
+            callable
+        """
+        if self.empty:
+            return lambda server: False
+
+        mask = self.feature_mask
+        required = self.features
+        max_tier = self.max_tier
+        exit_country = self.exit_country
+        name = self.name
+        enabled = self.enabled
+
+        def condition(server):
+            return server.features_bitmap & mask == required and (
+                max_tier is None or server.tier <= max_tier
+            ) and (
+                exit_country is None
+                or server.exit_country.upper() == exit_country
+            ) and (
+                name is None or server.name.lower() == name
+            ) and (
+                not enabled or server.enabled
+            )
+
+        return condition
+
+    def __repr__(self):
+        return "ServerCriteria<{}>".format(", ".join(
+            "{}={!r}".format(attr, getattr(self, attr))
+            for attr in self.__slots__
+        ))
+
+
+class ServerListIndex:
+    """Columnar index of the toplevel logicals.
+
+    It is built once per logicals payload and holds one column per
+    frequently queried field (position in the column == position in
+    the toplevel LogicalServers list), plus posting lists per
+    name, exit country and feature.
+    """
+    FEATURE_FLAGS = [
+        int(feature) for feature in FeatureEnum.list() if feature != 0
+    ]
+
+    def __init__(self, logicals):
+        self.__reset(len(logicals))
+        for position, logical in enumerate(logicals):
+            self.__add(
+                position, logical.id, logical.name, logical.exit_country,
+                logical.tier, logical.features_bitmap, logical.enabled,
+                logical.score
+            )
+
+    @classmethod
+    def from_fields(cls, size, fields):
+        """Build the index from raw fields instead of LogicalServer.
+
+        Args:
+            size (int): number of logicals
+            fields (iterable): tuples of (id, name, exit country, tier,
+                features bitmap, enabled, score)
+
+        Returns:
+            ServerListIndex
+        """
+        index = cls.__new__(cls)
+        index.__reset(size)
+        for position, logical_fields in enumerate(fields):
+            index.__add(position, *logical_fields)
+
+        return index
+
+    def __reset(self, size):
+        self.size = size
+        self.ids = []
+        self.position_by_id = {}
+
+        self.tiers = array("b")
+        self.features = array("l")
+        self.enabled = array("b")
+        self.scores = array("d")
+        self.exit_countries = []
+
+        self.by_name = {}
+        self.by_exit_country = {}
+        self.by_feature = dict((flag, set()) for flag in self.FEATURE_FLAGS)
+
+    def __add(
+        self, position, logical_id, name, exit_country,
+        tier, features, enabled, score
+    ):
+        exit_country = exit_country.upper()
+
+        self.ids.append(logical_id)
+        self.position_by_id[logical_id] = position
+
+        self.tiers.append(tier)
+        self.features.append(features)
+        self.enabled.append(enabled)
+        self.scores.append(score)
+        self.exit_countries.append(exit_country)
+
+        self.by_name.setdefault(name.lower(), set()).add(position)
+        self.by_exit_country.setdefault(exit_country, set()).add(position)
+        for flag in self.FEATURE_FLAGS:
+            if features & flag:
+                self.by_feature[flag].add(position)
+
+    def patch(self, position, score, enabled):
+        """Update the load related columns of a single logical.
+
+        Only score and status can change with a load update, so the
+        posting lists don't have to be touched.
+
+        Args:
+            position (int): toplevel position of the logical
+            score (float): new score
+            enabled (bool): new enabled state
+
+        Returns:
+            tuple(float|None, bool): previous score if it changed
+                (None otherwise) and whether enabled state changed
+        """
+        previous_score = self.scores[position]
+        if score != previous_score:
+            self.scores[position] = score
+        else:
+            previous_score = None
+
+        enabled_changed = enabled != self.enabled[position]
+        self.enabled[position] = enabled
+
+        return previous_score, enabled_changed
+
+    def matches(self, criteria, position):
+        """Check a single logical against the criteria.
+
+        Args:
+            criteria (ServerCriteria)
+            position (int): toplevel position of the logical
+
+        Returns:
+            bool
+        """
+        return not criteria.empty and (
+            criteria.name is None
+            or position in self.by_name.get(criteria.name, ())
+        ) and (
+            criteria.exit_country is None
+            or self.exit_countries[position] == criteria.exit_country
+        ) and (
+            criteria.max_tier is None
+            or self.tiers[position] <= criteria.max_tier
+        ) and (
+            self.features[position] & criteria.feature_mask
+            == criteria.features
+        ) and (
+            not criteria.enabled or bool(self.enabled[position])
+        )
+
+    def lookup(self, criteria, ordered=True):
+        """Get the positions matching the criteria.
+
+        Args:
+            criteria (ServerCriteria)
+            ordered (bool): (optional) sort the positions
+
+        Returns:
+            list(int): toplevel positions
+        """
+        if criteria.empty:
+            return []
+
+        candidates = None
+
+        def intersect(current, posting):
+            if current is None:
+                return set(posting)
+            return current.intersection(posting)
+
+        if criteria.name is not None:
+            candidates = set(self.by_name.get(criteria.name, ()))
+
+        if criteria.exit_country is not None:
+            candidates = intersect(
+                candidates,
+                self.by_exit_country.get(criteria.exit_country, ())
+            )
+
+        for flag in self.FEATURE_FLAGS:
+            if criteria.features & flag:
+                candidates = intersect(candidates, self.by_feature[flag])
+
+        if criteria.features & ~sum(self.FEATURE_FLAGS):
+            # Unknown feature required, nothing can match
+            candidates = set()
+
+        if candidates is None:
+            candidates = range(self.size)
+
+        max_tier = criteria.max_tier
+        mask = criteria.feature_mask
+        required = criteria.features
+        tiers = self.tiers
+        features = self.features
+        enabled = self.enabled
+        positions = [
+            position for position in candidates
+            if (max_tier is None or tiers[position] <= max_tier)
+            and features[position] & mask == required
+            and (not criteria.enabled or enabled[position])
+        ]
+        if ordered:
+            positions.sort()
+        return positions
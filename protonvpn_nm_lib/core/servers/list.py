@@ -1,5 +1,9 @@
+import heapq
 import json
 import random
+import socket
+import struct
+import sys
 import time
 import weakref
 
@@ -7,47 +11,142 @@ from ... import exceptions
 from ...enums import FeatureEnum
 from ...logger import logger
 from ..environment import ExecutionEnvironment
+from . import cache
+from .index import ServerCriteria, ServerListIndex
 # For simplification, we'll use format as coming from the API here,
 # although that might not be a good approach for genericity
 
 
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _pack_ip(ip):
+    """Pack a dotted IPv4 address into an int.
+
+    Anything which does not round-trip (IPv6, malformed, None) is kept
+    as is.
+    """
+    try:
+        packed = struct.unpack("!I", socket.inet_aton(ip))[0]
+    except (OSError, TypeError):
+        return ip
+
+    return packed if _unpack_ip(packed) == ip else ip
+
+
+def _unpack_ip(ip):
+    if isinstance(ip, int):
+        return socket.inet_ntoa(struct.pack("!I", ip))
+
+    return ip
+
+
+def _extra_keys(data, known_keys):
+    """Get the fields not stored in dedicated slots, if any."""
+    extra = dict(
+        (key, value) for key, value in data.items()
+        if key not in known_keys
+    )
+    return extra or None
+
+
+# Tuples of absent keys, shared between the records
+_absent_keys_tuples = {}
+
+
+def _absent_keys(data, optional_keys):
+    """Get the optional fields missing from data, so that they are
+    left out of the rebuilt dict too."""
+    absent = tuple(key for key in optional_keys if key not in data)
+    return _absent_keys_tuples.setdefault(absent, absent)
+
+
+def _remove_keys(data, keys):
+    for key in keys:
+        del data[key]
+
+    return data
+
+
 class PhysicalServer:
+    """
+    PhysicalServer is a compact record of a physical server.
+
+    IPv4 addresses are stored packed as ints, the original dict is
+    only rebuilt on demand by data.
+    """
+    __slots__ = (
+        "_id", "_entry_ip", "_exit_ip", "_domain", "_status",
+        "_generation", "_label", "_services_down_reason", "_extra",
+        "_absent"
+    )
+    KEYS = frozenset([
+        "ID", "EntryIP", "ExitIP", "Domain", "Status",
+        "Generation", "Label", "ServicesDownReason"
+    ])
+    OPTIONAL_KEYS = ("ID", "Generation", "Label", "ServicesDownReason")
+
     def __init__(self, data):
-        self._data = data
+        self._id = data.get("ID")
+        self._entry_ip = _pack_ip(data["EntryIP"])
+        self._exit_ip = _pack_ip(data["ExitIP"])
+        self._domain = data["Domain"]
+        self._status = data["Status"]
+        self._generation = data.get("Generation")
+        self._label = _intern(data.get("Label"))
+        self._services_down_reason = data.get("ServicesDownReason")
+        self._extra = _extra_keys(data, self.KEYS)
+        self._absent = _absent_keys(data, self.OPTIONAL_KEYS)
 
     @property
     def entry_ip(self):
-        return self._data["EntryIP"]
+        return _unpack_ip(self._entry_ip)
 
     @property
     def exit_ip(self):
-        return self._data["ExitIP"]
+        return _unpack_ip(self._exit_ip)
 
     @property
     def domain(self):
-        return self._data["Domain"]
+        return self._domain
 
     # Domain can be set to new value when
     # searching for matching domain
     @domain.setter
     def domain(self, newvalue):
-        self._data["Domain"] = newvalue
+        self._domain = newvalue
 
     @property
     def enabled(self):
-        return self._data["Status"] == 1
+        return self._status == 1
 
     @property
     def generation(self):
-        return self._data["Generation"]
+        return self._generation
 
     @property
     def label(self):
-        return self._data["Label"]
+        return self._label
 
     @property
     def services_down_reason(self):
-        return self._data["ServicesDownReason"]
+        return self._services_down_reason
+
+    @property
+    def data(self):
+        data = dict(self._extra) if self._extra else {}
+        data.update({
+            "ID": self._id,
+            "EntryIP": self.entry_ip,
+            "ExitIP": self.exit_ip,
+            "Domain": self._domain,
+            "Status": self._status,
+            "Generation": self._generation,
+            "Label": self._label,
+            "ServicesDownReason": self._services_down_reason,
+        })
+        return _remove_keys(data, self._absent)
 
     def get_configuration(self, proto):
         from ..vpn import VPNConfiguration
@@ -62,69 +161,128 @@ class PhysicalServer:
 
 class LogicalServer:
     """
-    LogicalServer is a view of ServerList.
+    LogicalServer is a compact record of a logical server.
 
-    Due to the way Python works, data is basically a reference
-    to the inside of the ServerList data.
-    Beware that this is intended to be a short-lived object,
-    if ServerList reloads completely, a LogicalServer will not
-    retain its bound to the list.
+    The toplevel ServerList converts its payload into these records
+    once, and all its views hand out the same instances.
+    Beware that if ServerList reloads completely, a LogicalServer will
+    not retain its bound to the list.
+    The API dict format is only rebuilt on demand by data.
     """
+    __slots__ = (
+        "_id", "_name", "_entry_country", "_exit_country", "_host_country",
+        "_domain", "_features", "_region", "_city", "_tier", "_score",
+        "_load", "_status", "_location", "_servers", "_extra",
+        "_absent", "_unpacked_features"
+    )
+    KEYS = frozenset([
+        "ID", "Name", "EntryCountry", "ExitCountry", "HostCountry",
+        "Domain", "Features", "Region", "City", "Tier", "Score",
+        "Load", "Status", "Location", "Servers"
+    ])
+    OPTIONAL_KEYS = ("HostCountry", "Domain", "Region", "City", "Location")
+
     def __init__(self, data):
-        self._data = data
+        self._id = data["ID"]
+        self._name = data["Name"]
+        self._entry_country = _intern(data["EntryCountry"])
+        self._exit_country = _intern(data["ExitCountry"])
+        self._host_country = _intern(data.get("HostCountry"))
+        self._domain = data.get("Domain")
+        self._features = int(data["Features"])
+        self._region = _intern(data.get("Region"))
+        self._city = _intern(data.get("City"))
+        self._tier = data["Tier"]
+        self._score = float(data["Score"])
+        self._load = data["Load"]
+        self._status = data["Status"]
+        location = data.get("Location")
+        self._location = None if location is None else (
+            location["Lat"], location["Long"]
+        )
+        self._servers = tuple(PhysicalServer(x) for x in data["Servers"])
+        self._extra = _extra_keys(data, self.KEYS)
+        self._absent = _absent_keys(data, self.OPTIONAL_KEYS)
+        self._unpacked_features = None
 
     @property
     def id(self):
-        return self._data["ID"]
+        return self._id
 
     # Score, load and status can be modified (needed to update loads)
     @property
     def load(self):
-        return self._data["Load"]
+        return self._load
 
     @load.setter
     def load(self, newvalue):
-        self._data["Load"] = int(newvalue)
+        self._load = int(newvalue)
 
     @property
     def score(self):
-        return self._data["Score"]
+        return self._score
 
     @score.setter
     def score(self, newvalue):
-        self._data["Score"] = float(newvalue)
+        self._score = float(newvalue)
 
     @property
     def enabled(self):
-        return self._data["Status"] == 1 and any(
-            x.enabled for x in self.physical_servers
+        return self._status == 1 and any(
+            x.enabled for x in self._servers
         )
 
     @enabled.setter
     def enabled(self, newvalue):
-        self._data["Status"] = newvalue
+        self._status = newvalue
+
+    @property
+    def status(self):
+        return self._status
 
     # Every other propriety is readonly
     @property
     def name(self):
-        return self._data["Name"]
+        return self._name
 
     @property
     def entry_country(self):
-        return self._data["EntryCountry"]
+        return self._entry_country
 
     @property
     def exit_country(self):
-        return self._data["ExitCountry"]
+        return self._exit_country
 
     @property
     def host_country(self):
-        return self._data["HostCountry"]
+        return self._host_country
 
     # We do not expose on purpose the domain, it should be deprecated soob
     @property
     def features(self):
-        return self.__unpack_bitmap_features(self._data["Features"])
+        # Features only change with a new payload, which
+        # creates new records, so the list can be kept
+        if self._unpacked_features is None:
+            self._unpacked_features = self.__unpack_bitmap_features(
+                self._features
+            )
+
+        return self._unpacked_features
+
+    @property
+    def features_bitmap(self):
+        return self._features
+
+    def has_feature(self, feature):
+        """Check if the server has the feature(s), with a bitmask test.
+
+        Args:
+            feature (FeatureEnum|int): one or several ORed features
+
+        Returns:
+            bool
+        """
+        return self._features & feature == feature
 
     def __unpack_bitmap_features(self, server_value):
         server_features = [
@@ -137,34 +295,54 @@ class LogicalServer:
 
     @property
     def region(self):
-        return self._data["Region"]
+        return self._region
 
     @property
     def city(self):
-        return self._data["City"]
+        return self._city
 
     @property
     def tier(self):
-        return self._data["Tier"]
+        return self._tier
 
     @property
     def latitude(self):
-        return self._data["Location"]["Lat"]
+        return self._location[0]
 
     @property
     def longitude(self):
-        return self._data["Location"]["Long"]
+        return self._location[1]
 
     @property
     def data(self):
-        return self._data.copy()
+        data = dict(self._extra) if self._extra else {}
+        data.update({
+            "ID": self._id,
+            "Name": self._name,
+            "EntryCountry": self._entry_country,
+            "ExitCountry": self._exit_country,
+            "HostCountry": self._host_country,
+            "Domain": self._domain,
+            "Features": self._features,
+            "Region": self._region,
+            "City": self._city,
+            "Tier": self._tier,
+            "Score": self._score,
+            "Load": self._load,
+            "Status": self._status,
+            "Location": None if self._location is None else {
+                "Lat": self._location[0], "Long": self._location[1]
+            },
+            "Servers": [x.data for x in self._servers],
+        })
+        return _remove_keys(data, self._absent)
 
     @property
     def physical_servers(self):
-        return [PhysicalServer(x) for x in self._data["Servers"]]
+        return self._servers
 
     def get_random_physical_server(self):
-        enabled_servers = [x for x in self.physical_servers if x.enabled]
+        enabled_servers = [x for x in self._servers if x.enabled]
         if len(enabled_servers) == 0:
             logger.error("List of physical servers is empty")
             raise exceptions.EmptyServerListError("No servers could be found")
@@ -172,7 +350,7 @@ class LogicalServer:
         return random.choice(enabled_servers)
 
     def __repr__(self):
-        return 'LogicalServer<{}>'.format(self._data.get("Name", "??"))
+        return 'LogicalServer<{}>'.format(self._name)
 
 
 class ServerList:
@@ -187,29 +365,45 @@ class ServerList:
     All of these classes refer have an _ids property, which is the list of
     toplevel indices (logicals) this class has access to.
 
-    When the toplevel
+    The toplevel list converts the LogicalServers of its payload into
+    LogicalServer records once (the rest of the payload is kept in _data).
+    It also owns a ServerListIndex, built once per payload,
+    which sublists created with filter_by() use to resolve their
+    ServerCriteria without evaluating a condition on every logical.
     """
+    # Above len(view) // INCREMENTAL_REPAIR_RATIO changed servers, a load
+    # update re-sorts a view instead of repairing it in place
+    INCREMENTAL_REPAIR_RATIO = 8
+
     def __init__(
         self, toplevel=None,
         condition=None,
         sort_key=None,
-        sort_reverse=False
+        sort_reverse=False,
+        criteria=None
     ):
         if toplevel is not None:
             assert isinstance(toplevel, self.__class__)
             self._toplevel = toplevel
             self._toplevel._views.add(self)
             self._condition = condition
+            self._criteria = criteria
             self._views = set()
         else:
             assert condition is None
+            assert criteria is None
 
             self._toplevel = None
             self._condition = None
-            self.__data = {'LogicalServers': {}}
+            self._criteria = None
+            self.__data = {}
+            self.__servers = []
+            self.__index = None
+            self.__domains_by_exit_ip = None
             self._views = weakref.WeakSet()
 
         self._sort_key = sort_key
+        self._sort_column = None
         self._sort_reverse = sort_reverse
 
         self.refresh_indexes()
@@ -221,6 +415,20 @@ class ServerList:
         else:
             return self._toplevel.__data
 
+    @property
+    def _servers(self):
+        if self.is_toplevel:
+            return self.__servers
+        else:
+            return self._toplevel.__servers
+
+    @property
+    def _index(self):
+        if self.is_toplevel:
+            return self.__index
+        else:
+            return self._toplevel.__index
+
     @property
     def is_toplevel(self):
         return self._toplevel is None
@@ -242,15 +450,63 @@ class ServerList:
 
     def json_dumps(self):
         self.ensure_toplevel()
-        return json.dumps(self._data)
+        data = dict(self._data)
+        data["LogicalServers"] = [x.data for x in self._servers]
+        return json.dumps(data)
 
     def json_loads(self, data):
         self.ensure_toplevel()
-        self.__data = json.loads(data)
+        self.__load(json.loads(data))
 
         # Refresh indexes
         self.refresh_indexes()
 
+    def binary_dumps(self):
+        """Serialize the list into the binary cache format.
+
+        Returns:
+            bytes
+        """
+        self.ensure_toplevel()
+        return cache.dumps(self._data, self._servers)
+
+    def binary_loads(self, buffer):
+        """Load the list from the binary cache format.
+
+        Logicals are only decoded when accessed, so the buffer (usually
+        a read-only mmap of the cache file) has to stay unmodified for
+        the lifetime of the list.
+
+        Args:
+            buffer (bytes|mmap.mmap)
+        """
+        self.ensure_toplevel()
+        self.__data, self.__servers = cache.loads(buffer)
+
+        # Refresh indexes
+        self.refresh_indexes()
+
+    def copy(self):
+        """Get a new toplevel list with the same data.
+
+        The copy can be updated without modifying this list or its
+        views, ie while another thread uses them.
+
+        Returns:
+            ServerList
+        """
+        self.ensure_toplevel()
+        server_list = ServerList()
+        server_list.binary_loads(self.binary_dumps())
+        return server_list
+
+    def __load(self, data):
+        """Convert the logicals of the payload into records."""
+        self.__servers = [
+            LogicalServer(logical) for logical in data.pop("LogicalServers")
+        ]
+        self.__data = data
+
     def update_logical_data(self, data):
         assert 'Code' in data
         assert 'LogicalServers' in data
@@ -260,7 +516,7 @@ class ServerList:
         if data["Code"] != 1000:
             raise ValueError("Invalid data with code != 1000")
 
-        self.__data = data
+        self.__load(data)
         # We update both LastLogicalUpdate and LastLoadUpdate, as Load contains
         self.__data["LogicalsUpdateTimestamp"] = time.time()
         self.__data["LoadsUpdateTimestamp"] = time.time()
@@ -277,33 +533,192 @@ class ServerList:
             raise ValueError("Invalid data with code != 1000")
 
         self.__data["LoadsUpdateTimestamp"] = time.time()
+        self.__apply_load_data(data["LogicalServers"])
+
+    def json_dumps_load_data(self):
+        """Serialize only the load data (load, score and status) of the
+        list, keyed by logical ID.
 
-        for s in data["LogicalServers"]:
-            if s["ID"] not in self._logicals_by_id:
+        This is much smaller than the whole list, and can be merged back
+        with json_loads_load_data() as long as logicals weren't updated.
+        """
+        self.ensure_toplevel()
+        servers = self._servers
+        if isinstance(servers, cache.MappedServerRecords):
+            get_load = servers.get_load
+        else:
+            def get_load(position):
+                server = servers[position]
+                return server.load, server.score, server.status
+
+        return json.dumps({
+            "LogicalsUpdateTimestamp": self.logicals_update_timestamp,
+            "LoadsUpdateTimestamp": self.loads_update_timestamp,
+            "LogicalServers": dict(
+                (logical_id, get_load(position))
+                for position, logical_id in enumerate(self._index.ids)
+            )
+        }, separators=(",", ":"))
+
+    def json_loads_load_data(self, data):
+        """Merge load data serialized by json_dumps_load_data().
+
+        Load data saved for other logicals (which have been updated
+        since) is ignored.
+
+        Returns:
+            bool: whether load data was merged
+        """
+        self.ensure_toplevel()
+        data = json.loads(data)
+        if data["LogicalsUpdateTimestamp"] != self.logicals_update_timestamp:
+            return False
+
+        self.__data["LoadsUpdateTimestamp"] = data["LoadsUpdateTimestamp"]
+        self.__apply_load_data(
+            {"ID": logical_id, "Load": load, "Score": score, "Status": status}
+            for logical_id, (load, score, status)
+            in data["LogicalServers"].items()
+        )
+        return True
+
+    def __apply_load_data(self, logicals):
+        index = self._index
+        servers = self._servers
+        is_mapped = isinstance(servers, cache.MappedServerRecords)
+        previous_scores = {}
+        toggled = set()
+        for s in logicals:
+            position = index.position_by_id.get(s["ID"])
+            if position is None:
                 # This server doesn't exists in the cached list
                 continue
-            server = self[s["ID"]]
-
-            server.load = s.get("Load", server.load)
-            server.score = s.get("Score", server.score)
-            server.enabled = s.get("Status", server.enabled)
 
-        # Required to sort lists again if needed
-        self.refresh_indexes()
+            if is_mapped:
+                # Avoid decoding the logical only to update its load
+                load, score, status = servers.get_load(position)
+                score, enabled = servers.update_load(
+                    position, s.get("Load", load),
+                    s.get("Score", score), s.get("Status", status)
+                )
+            else:
+                server = servers[position]
+
+                server.load = s.get("Load", server.load)
+                server.score = s.get("Score", server.score)
+                server.enabled = s.get("Status", server.enabled)
+                score, enabled = server.score, server.enabled
+
+            previous_score, enabled_changed = index.patch(
+                position, score, enabled
+            )
+            if previous_score is not None:
+                previous_scores[position] = previous_score
+            if enabled_changed:
+                toggled.add(position)
+
+        # Only scalar columns changed: instead of re-filtering and
+        # re-sorting everything, repair the views that depend on them
+        for v in [self] + list(self._views):
+            v._repair_after_load_update(previous_scores, toggled)
+
+    def _repair_after_load_update(self, previous_scores, toggled):
+        """Repair membership and order after a load update.
+
+        Args:
+            previous_scores (dict): position => score before the update,
+                for the logicals whose score changed
+            toggled (set): positions whose enabled state changed
+        """
+        if self._condition is not None:
+            # An arbitrary condition might depend on any of the
+            # updated fields, so it has to be fully re-evaluated
+            self.refresh_indexes()
+            return
+
+        index = self._index
+        ids = index.ids
+
+        leaving = set()
+        joining = set()
+        if self._criteria is not None and self._criteria.enabled:
+            for position in toggled:
+                is_member = ids[position] in self._logicals_by_id
+                should_be_member = index.matches(self._criteria, position)
+                if is_member and not should_be_member:
+                    leaving.add(position)
+                elif should_be_member and not is_member:
+                    joining.add(position)
+
+        moving = set()
+        if self._sort_column is not None:
+            moving = set(
+                position for position in previous_scores
+                if ids[position] in self._logicals_by_id
+            ).difference(leaving)
+
+        if not leaving and not joining and not moving:
+            if self._sort_key is not None:
+                self._sort()
+            return
+
+        for position in leaving:
+            del self._logicals_by_id[ids[position]]
+        for position in joining:
+            self._logicals_by_id[ids[position]] = position
+
+        if (
+            self._sort_key is not None
+            or len(leaving) + len(joining) + len(moving)
+            > len(self._ids) // self.INCREMENTAL_REPAIR_RATIO
+        ):
+            # Too many changes (or opaque sort key), sorting
+            # everything at once is cheaper
+            self._ids = [
+                position for position in self._ids
+                if position not in leaving
+            ]
+            self._ids.extend(joining)
+            self._sort()
+            return
+
+        for position in leaving.union(moving):
+            self._ids.remove(position)
+        for position in joining.union(moving):
+            self.__insort(position)
+
+    def __insort(self, position):
+        """Insert a toplevel position into the (already sorted) _ids."""
+        key = self.__get_column_key()
+        value = key(position)
+        low, high = 0, len(self._ids)
+        while low < high:
+            middle = (low + high) // 2
+            if key(self._ids[middle]) < value:
+                low = middle + 1
+            else:
+                high = middle
+        self._ids.insert(low, position)
 
     def refresh_indexes(self):
+        if self.is_toplevel:
+            # Build the columnar index once for all the views
+            if isinstance(self.__servers, cache.MappedServerRecords):
+                self.__index = ServerListIndex.from_fields(
+                    len(self.__servers), self.__servers.index_fields()
+                )
+            else:
+                self.__index = ServerListIndex(self.__servers)
+            self.__domains_by_exit_ip = None
+
+        # Re-apply filter criteria and condition (if any)
+        self._ids = list(self.__select(self._criteria))
+
         # Create indexes
-        self._ids = []
-        self._logicals_by_id = {}
-        self._logicals_by_name = {}
-
-        # Re-apply filter condition (if any)
-        for logical_id, logical in enumerate(self._data["LogicalServers"]):
-            server = LogicalServer(logical)
-            if self._condition is None or self._condition(server):
-                self._logicals_by_id[logical["ID"]] = logical_id
-                self._logicals_by_name[logical["ID"]] = logical_id
-                self._ids.append(logical_id)
+        ids = self._index.ids
+        self._logicals_by_id = dict(
+            (ids[logical_id], logical_id) for logical_id in self._ids
+        )
 
         # Re-apply filter condition on children (if any)
         for v in self._views:
@@ -312,6 +727,28 @@ class ServerList:
         # Sort (if needed)
         self._sort()
 
+    def __select(self, criteria, ordered=True):
+        """Iterate over the toplevel positions matching both the
+        criteria and the condition of this list.
+
+        Args:
+            criteria (ServerCriteria|None)
+            ordered (bool): (optional) yield positions in toplevel order
+        """
+        if criteria is None:
+            candidates = range(len(self._servers))
+        else:
+            candidates = self._index.lookup(criteria, ordered)
+
+        if self._condition is None:
+            return iter(candidates)
+
+        servers = self._servers
+        return (
+            logical_id for logical_id in candidates
+            if self._condition(servers[logical_id])
+        )
+
     def __len__(self):
         return len(self._ids)
 
@@ -321,7 +758,7 @@ class ServerList:
         else:
             internal_idx = self._ids[idx]
 
-        return LogicalServer(self._data["LogicalServers"][internal_idx])
+        return self._servers[internal_idx]
 
     def __iter__(self):
         for idx in range(len(self)):
@@ -338,16 +775,63 @@ class ServerList:
     def filter(self, condition):
         if self.is_toplevel:
             return ServerList(self, condition)
+        elif self._condition is None:
+            return ServerList(
+                self._toplevel, condition, criteria=self._criteria
+            )
         else:
             return ServerList(
                 self._toplevel,
-                lambda x: self._condition(x) and condition(x)
+                lambda x: self._condition(x) and condition(x),
+                criteria=self._criteria
+            )
+
+    def filter_by(self, **kwargs):
+        """Filter the list with ServerCriteria, using the toplevel index.
+
+        This is much cheaper than filter() as no condition has to be
+        evaluated per logical server.
+
+        Example: get servers in Switzerland with P2P, within the user tier:
+        sl.filter_by(
+            exit_country="CH", features=FeatureEnum.P2P,
+            max_tier=ExecutionEnvironment().api_session.vpn_tier
+        )
+
+        Args:
+            see ServerCriteria
+        """
+        criteria = ServerCriteria(**kwargs)
+        if self.is_toplevel:
+            return ServerList(self, criteria=criteria)
+        else:
+            if self._criteria is not None:
+                criteria = self._criteria.merge(criteria)
+
+            return ServerList(
+                self._toplevel, self._condition, criteria=criteria
             )
 
+    @staticmethod
+    def make_condition(**kwargs):
+        """Compile criteria into a condition usable with filter().
+
+        Feature requirements and exclusions are checked with a single
+        bitmask test per server.
+
+        Example: combine criteria with a custom condition:
+        is_p2p = ServerList.make_condition(features=FeatureEnum.P2P)
+        sl.filter(lambda x: is_p2p(x) and x.load < 50)
+
+        Args:
+            see ServerCriteria
+        """
+        return ServerCriteria(**kwargs).as_condition()
+
     def filter_servers_by_tier(self):
         # Filter servers bye tier
-        server_list = list(self.filter(
-            lambda server: server.tier <= ExecutionEnvironment().api_session.vpn_tier # noqa
+        server_list = list(self.filter_by(
+            max_tier=ExecutionEnvironment().api_session.vpn_tier
         ))
         return server_list
 
@@ -358,21 +842,45 @@ class ServerList:
 
     def get_fastest_server(self):
         # Get the fastest enabled server
-        self.__ensure_cache_exists()
-        servers_ordered = list(
-            self.filter(
-                lambda server: server.enabled
-                and server.tier <= ExecutionEnvironment().api_session.vpn_tier
-            ).sort(
-                lambda server: server.score
-            )
-        )
-        if len(servers_ordered) == 0:
+        servers = self.get_fastest_servers(1)
+        if len(servers) == 0:
             logger.error("List of logical servers is empty")
             raise exceptions.EmptyServerListError(
                 "No logical server could be found"
             )
-        return servers_ordered[0]
+        return servers[0]
+
+    def get_fastest_servers(self, k):
+        """Get the k fastest enabled servers within the user tier.
+
+        Only the k best scores are selected (with a heap over the index
+        score column), the rest of the list is neither sorted nor
+        wrapped in LogicalServer objects. Useful to get failover
+        candidates.
+
+        Args:
+            k (int): maximum number of servers to return
+
+        Returns:
+            list(LogicalServer): ordered from fastest to slowest
+        """
+        self.__ensure_cache_exists()
+        criteria = ServerCriteria(
+            max_tier=ExecutionEnvironment().api_session.vpn_tier,
+            enabled=True
+        )
+        if self._criteria is not None:
+            criteria = self._criteria.merge(criteria)
+
+        scores = self._index.scores
+        servers = self._servers
+        return [
+            servers[logical_id]
+            for logical_id in heapq.nsmallest(
+                k, self.__select(criteria, ordered=False),
+                key=lambda i: (scores[i], i)
+            )
+        ]
 
     def __ensure_cache_exists(self):
         """Ensure that cache exists."""
@@ -386,24 +894,36 @@ class ServerList:
                 raise exceptions.ServerCacheNotFound("Server cache not found")
 
     def match_server_domain(self, physical_server):
-        domain = physical_server.domain
-
-        for logical_server in self:
-            if FeatureEnum.SECURE_CORE not in logical_server.features:
-                servers = logical_server.physical_servers
-                servers = [
-                    _physical_server
-                    for _physical_server
-                    in servers
-                    if _physical_server.exit_ip == physical_server.exit_ip
-                ]
-
-                if len(servers) > 0:
-                    domain = servers.pop().domain
-                    break
-
+        domain = self._domains_by_exit_ip.get(
+            physical_server.exit_ip, physical_server.domain
+        )
         physical_server.domain = domain
 
+    @property
+    def _domains_by_exit_ip(self):
+        """Map of exit IP to the domain of the first non secure core
+        server using it, built lazily once per payload."""
+        if not self.is_toplevel:
+            return self._toplevel._domains_by_exit_ip
+
+        if self.__domains_by_exit_ip is None:
+            domains = {}
+            for logical_server in self.__servers:
+                if logical_server.has_feature(FeatureEnum.SECURE_CORE):
+                    continue
+
+                # The last physical server of the first logical wins
+                logical_domains = dict(
+                    (x.exit_ip, x.domain)
+                    for x in logical_server.physical_servers
+                )
+                for exit_ip, domain in logical_domains.items():
+                    domains.setdefault(exit_ip, domain)
+
+            self.__domains_by_exit_ip = domains
+
+        return self.__domains_by_exit_ip
+
     def sort(self, key=None, reverse=False):
         """
         Sort, in place, the current ServerList, and return it.
@@ -413,18 +933,46 @@ class ServerList:
         """
 
         self._sort_key = key
+        self._sort_column = None
+        self._sort_reverse = reverse
+        return self._sort()
+
+    def sort_by_score(self, reverse=False):
+        """Sort, in place, the current ServerList by score, and return it.
+
+        Unlike sort(lambda x: x.score), this sorts on the index score
+        column, and the order is repaired incrementally on load updates.
+        """
+        self._sort_key = None
+        self._sort_column = "scores"
         self._sort_reverse = reverse
         return self._sort()
 
+    def __get_column_key(self):
+        if self._sort_column is None:
+            # Unsorted lists are kept in toplevel order
+            if self._sort_reverse:
+                return lambda i: -i
+            else:
+                return lambda i: i
+
+        # Ties are broken on the toplevel position so that a full sort
+        # and an incremental repair always yield the same order
+        column = getattr(self._index, self._sort_column)
+        if self._sort_reverse:
+            return lambda i: (-column[i], i)
+        else:
+            return lambda i: (column[i], i)
+
     def _sort(self):
         """Sort (or re-sort) the list"""
-        if self._sort_key is None:
+        if self._sort_column is not None:
+            self._ids.sort(key=self.__get_column_key())
+        elif self._sort_key is None:
             self._ids.sort(reverse=self._sort_reverse)
         else:
             self._ids.sort(
-                key=lambda i: self._sort_key(
-                    LogicalServer(self._data["LogicalServers"][i])
-                ),
+                key=lambda i: self._sort_key(self._servers[i]),
                 reverse=self._sort_reverse
             )
 
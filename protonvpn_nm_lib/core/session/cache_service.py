@@ -0,0 +1,90 @@
+import json
+import os
+import socket
+
+from ...constants import CACHE_SERVICE_SOCKET_PATH
+from ...logger import logger
+
+# Resources which can be refreshed by the cache service
+RESOURCES = ("servers", "clientconfig", "streaming", "notifications")
+
+
+class CacheServiceClient:
+    """Client of the cache service (see daemon/cache_service.py).
+
+    The cache service owns the API refreshes of the cached resources for
+    all the processes of the user: a process asks it to refresh an
+    expired resource, and then reloads the cache written by the service
+    instead of requesting the API itself. The service also decides when
+    resources expire, so that processes don't each use their own
+    (randomized) expiry.
+
+    The protocol is one JSON request per connection, answered with
+    one JSON response, both terminated by a newline.
+
+    Args:
+        socket_path (string): (optional) path of the service socket
+    """
+    TIMEOUT = 30  # Refreshes wait for the API
+
+    def __init__(self, socket_path=CACHE_SERVICE_SOCKET_PATH):
+        self.socket_path = socket_path
+
+    @classmethod
+    def find(cls, socket_path=CACHE_SERVICE_SOCKET_PATH):
+        """Get a client if the cache service seems to be running.
+
+        Returns:
+            CacheServiceClient|None
+        """
+        if not os.path.exists(socket_path):
+            return None
+
+        return cls(socket_path)
+
+    def refresh(self, resource):
+        """Ask the service to refresh a resource if it expired.
+
+        Args:
+            resource (string): one of RESOURCES
+
+        Returns:
+            float|None: when the service will fetch the resource again,
+                None if it couldn't refresh it
+        """
+        response = self.__request(
+            {"Action": "refresh", "Resource": resource}
+        )
+        if response is None:
+            return None
+
+        return response.get("NextFetch")
+
+    def reset(self):
+        """Make the service reload its session, ie after login
+        or logout.
+
+        Returns:
+            bool: if the service handled the request
+        """
+        return self.__request({"Action": "reset"}) is not None
+
+    def __request(self, request):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.TIMEOUT)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as f:
+                    response = json.loads(f.readline().decode("utf-8"))
+        except (OSError, ValueError) as e:
+            logger.info("Cache service is unavailable: {}".format(e))
+            return None
+
+        if response.get("Error"):
+            logger.info("Cache service could not handle {}: {}".format(
+                request, response["Error"]
+            ))
+            return None
+
+        return response
@@ -0,0 +1,105 @@
+import threading
+
+from ...logger import logger
+
+
+class RefreshScheduler:
+    """Run cache refreshes in a background worker.
+
+    A refresh of a resource which is already pending or running is not
+    scheduled again (single-flight). Once a refresh completed, the
+    registered callbacks are called with the resource name.
+
+    Callbacks are called from the worker thread: GUI frontends should
+    forward them to their main loop (ie GLib.idle_add).
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__executor = None
+        self.__in_flight = {}
+        self.__callbacks = []
+
+    def add_callback(self, callback):
+        """Call callback(resource) whenever a refresh completed."""
+        with self.__lock:
+            self.__callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        with self.__lock:
+            self.__callbacks.remove(callback)
+
+    def schedule(self, resource, refresh):
+        """Schedule refresh() in the background, unless a refresh of
+        resource is already in flight.
+
+        Args:
+            resource (string): name of the refreshed resource
+            refresh (callable)
+
+        Returns:
+            concurrent.futures.Future: resolves to True if the refresh
+                succeeded
+        """
+        with self.__lock:
+            future = self.__in_flight.get(resource)
+            if future is not None:
+                return future
+
+            if self.__executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self.__executor = ThreadPoolExecutor(max_workers=1)
+
+            logger.info("Scheduling refresh of {}".format(resource))
+            future = self.__executor.submit(self.__run, resource, refresh)
+            self.__in_flight[resource] = future
+            return future
+
+    def wait(self, resource, timeout=None):
+        """Wait for the in flight refresh of resource, if any.
+
+        Returns:
+            bool: False if the refresh did not complete in time
+        """
+        from concurrent.futures import TimeoutError
+
+        with self.__lock:
+            future = self.__in_flight.get(resource)
+
+        if future is None:
+            return True
+
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            return False
+
+        return True
+
+    def shutdown(self, wait=True):
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __run(self, resource, refresh):
+        try:
+            refresh()
+        except Exception as e:
+            logger.info("Could not refresh {}: {}".format(resource, e))
+            return False
+        finally:
+            with self.__lock:
+                self.__in_flight.pop(resource, None)
+
+        with self.__lock:
+            callbacks = list(self.__callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(resource)
+            except Exception as e:
+                logger.exception(e)
+
+        return True
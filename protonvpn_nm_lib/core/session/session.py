@@ -1,9 +1,14 @@
+import functools
+import json
+import mmap
 import os
 import random
+import threading
 import time
 
 from ...constants import (API_URL, APP_VERSION, NETZONE_METADATA_FILEPATH,
-                          CACHED_SERVERLIST, CLIENT_CONFIG,
+                          CACHED_SERVERLIST, CACHED_SERVERLIST_BINARY,
+                          CACHED_SERVERLIST_LOADS, CLIENT_CONFIG,
                           CONNECTION_STATE_FILEPATH,
                           LAST_CONNECTION_METADATA_FILEPATH,
                           NOTIFICATIONS_FILE_PATH, PROTON_XDG_CACHE_HOME,
@@ -22,6 +27,7 @@ from ...exceptions import (API403Error, API5002Error, API5003Error,
                            JSONDataError, NetworkConnectionError,
                            UnknownAPIError, UnreacheableAPIError)
 from ...logger import logger
+from ..cache_store import CacheStore
 from ..environment import ExecutionEnvironment
 
 
@@ -39,7 +45,7 @@ class ErrorStrategy:
             result = self._func(session, *args, **kwargs)
         except ProtonAPIError as e:
             logger.exception(e)
-            self.__handle_api_error(e, session, *args, **kwargs)
+            result = self.__handle_api_error(e, session, *args, **kwargs)
         except ConnectionTimeOutError as e:
             logger.exception(e)
             raise APITimeoutError("Connection to API timed out")
@@ -149,9 +155,22 @@ class ErrorStrategyLogout(ErrorStrategy):
 
 
 class ErrorStrategyNormalCall(ErrorStrategy):
+    def __init__(self, func):
+        super().__init__(func)
+        # Refresh generation of the session when the call started,
+        # per thread
+        self.__call_state = threading.local()
+
+    def __call__(self, session, *args, **kwargs):
+        self.__call_state.refresh_generation = session.refresh_generation
+        return super().__call__(session, *args, **kwargs)
+
     def _handle_401(self, error, session, *args, **kwargs):
         logger.info("Catched 401 error, will refresh session and retry")
-        session.refresh()
+        # Unless another thread refreshed it after the call started
+        session.refresh(
+            if_not_refreshed_since=self.__call_state.refresh_generation
+        )
         # Retry (without error handling this time)
         return self._call_without_error_handling(session, *args, **kwargs)
 
@@ -242,22 +261,57 @@ class APISession:
     LOADS_CACHE_TIME_EXPIRE = 900  # 15min in seconds
     RANDOM_FRACTION = 0.22  # Generate a value of the timeout, +/- up to 22%, at random
     TIMEOUT = (3.05, 3.05)
-
-    def __init__(self, api_url=None, enforce_pinning=True):
+    PREFETCH_TIMEOUT = 15  # Combined deadline of the prefetch at login
+    # Cache files of the resources refreshed by the cache service
+    CACHE_FILEPATHS = {
+        "servers": (CACHED_SERVERLIST_BINARY, CACHED_SERVERLIST_LOADS),
+        "clientconfig": (CLIENT_CONFIG,),
+        "streaming": (STREAMING_SERVICES,),
+        "notifications": (NOTIFICATIONS_FILE_PATH,),
+    }
+    # The server cache is several MB and can be fetched again, so it
+    # isn't flushed to disk on every save unless enabled
+    fsync_servers_cache = False
+
+    def __init__(
+        self, api_url=None, enforce_pinning=True, use_cache_service=True
+    ):
         if api_url is None:
             self._api_url = API_URL
 
         self._enforce_pinning = enforce_pinning
 
+        # Refresh the caches through the cache service, if it's running
+        self.__cache_service = None
+        # Resource => next fetch of the service
+        self.__cache_service_next_fetch = {}
+        # Resource => signature of the cache files when last loaded
+        self.__cache_signatures = {}
+        if use_cache_service:
+            from .cache_service import CacheServiceClient
+            self.__cache_service = CacheServiceClient.find()
+
+        # Serializes the session refreshes, see refresh()
+        self.__refresh_lock = threading.Lock()
+        self.__refresh_generation = 0
+        # Headers of the last response, per thread
+        self.__last_response = threading.local()
+        # Cache filepath => validators of the fetched (but not yet
+        # cached) resource
+        self.__pending_validators = {}
+
         self.__session_create()
 
         self.__proton_user = None
         self.__vpn_data = None
         self.__vpn_logicals = None
+        # When the cached logicals were last reported as not modified
+        self.__logicals_checked_timestamp = 0.
         self.__clientconfig = None
         self.__streaming_services = None
         self.__streaming_icons = None
         self.__notification_data = None
+        self.__refresh_scheduler = None
 
         # Load session
         try:
@@ -281,6 +335,7 @@ class APISession:
         )
         self.__proton_api.enable_alternative_routing = ExecutionEnvironment()\
             .settings.alternative_routing.value
+        self.__install_response_hook()
 
     def __keyring_load_session(self):
         """
@@ -338,8 +393,127 @@ class APISession:
         )
         self.__proton_api.enable_alternative_routing = ExecutionEnvironment()\
             .settings.alternative_routing.value
+        self.__install_response_hook()
         self.__proton_user = keyring_data_user['proton_username']
 
+    def __install_response_hook(self):
+        """Keep the headers of the responses, as api_request() only
+        returns the JSON body and they are needed for the validators
+        of conditional requests."""
+        requests_session = getattr(self.__proton_api, "s", None)
+        if requests_session is None:
+            return
+
+        def keep_headers(response, *args, **kwargs):
+            self.__last_response.status_code = response.status_code
+            self.__last_response.headers = response.headers
+
+        requests_session.hooks["response"].append(keep_headers)
+
+    def __conditional_api_request(
+        self, endpoint, cache_filepath, is_cached, additional_headers=None
+    ):
+        """Request an endpoint, unless the cached resource is unchanged.
+
+        The validators (ETag and Last-Modified) of the response are
+        stored next to the cache by __save_validators(), and sent back
+        with the next request of the resource.
+
+        Args:
+            endpoint (string): API endpoint
+            cache_filepath (string): cache file of the resource
+            is_cached (bool): if the resource is cached, otherwise
+                a conditional request is pointless
+            additional_headers (dict): (optional)
+
+        Returns:
+            dict|None: API response, None if the resource is not modified
+        """
+        headers = dict(additional_headers or {})
+        if is_cached:
+            validators = self.__load_validators(cache_filepath)
+            if validators.get("ETag"):
+                headers["If-None-Match"] = validators["ETag"]
+            if validators.get("Last-Modified"):
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        self.__last_response.status_code = None
+        self.__last_response.headers = None
+        try:
+            data = self.__proton_api.api_request(
+                endpoint, additional_headers=headers or None
+            )
+        except Exception as e:
+            # proton-client fails to decode the empty body of a 304,
+            # and raises an error with the status code instead
+            if (
+                getattr(e, "code", None) != 304
+                and self.__last_response.status_code != 304
+            ):
+                raise
+
+            logger.info("{} is not modified".format(endpoint))
+            return None
+
+        response_headers = self.__last_response.headers or {}
+        self.__pending_validators[cache_filepath] = dict(
+            (header, response_headers[header])
+            for header in ("ETag", "Last-Modified")
+            if response_headers.get(header)
+        )
+        return data
+
+    def __save_validators(self, cache_filepath):
+        """Store the validators of a resource, once its cache is saved."""
+        validators = self.__pending_validators.pop(cache_filepath, None)
+        if validators is None:
+            return
+
+        validators_filepath = self.__validators_filepath(cache_filepath)
+        if validators:
+            CacheStore().write(validators_filepath, json.dumps(validators))
+        else:
+            CacheStore().remove(validators_filepath)
+
+    def __touch_validators(self, cache_filepath):
+        """Record that a cached resource was reported as not modified,
+        next to its validators rather than by rewriting the cache.
+
+        Returns:
+            float: timestamp of the check
+        """
+        timestamp = time.time()
+        validators = self.__load_validators(cache_filepath)
+        if validators:
+            validators["CheckedTimestamp"] = timestamp
+            try:
+                CacheStore().write(
+                    self.__validators_filepath(cache_filepath),
+                    json.dumps(validators)
+                )
+            except Exception as e:
+                logger.info("Could not save validators for {}: {}".format(
+                    cache_filepath, e
+                ))
+
+        return timestamp
+
+    def __load_validators(self, cache_filepath):
+        try:
+            return json.loads(CacheStore().read(
+                self.__validators_filepath(cache_filepath)
+            ))
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.info("Invalid validators for {}: {}".format(
+                cache_filepath, e
+            ))
+            return {}
+
+    def __validators_filepath(self, cache_filepath):
+        return cache_filepath + ".validators"
+
     def __keyring_clear_session(self):
         for k in [
             KeyringEnum.DEFAULT_KEYRING_SESSIONDATA,
@@ -390,7 +564,8 @@ class APISession:
 
         logger.info("Remove cache files")
         filepaths_to_remove = [
-            CACHED_SERVERLIST, CLIENT_CONFIG, NETZONE_METADATA_FILEPATH,
+            CACHED_SERVERLIST, CACHED_SERVERLIST_BINARY,
+            CACHED_SERVERLIST_LOADS, CLIENT_CONFIG, NETZONE_METADATA_FILEPATH,
             LAST_CONNECTION_METADATA_FILEPATH, CONNECTION_STATE_FILEPATH,
             STREAMING_ICONS_CACHE_TIME_PATH, STREAMING_SERVICES,
             PROTON_XDG_CACHE_HOME_STREAMING_ICONS, NOTIFICATIONS_FILE_PATH,
@@ -399,20 +574,54 @@ class APISession:
         for fp in filepaths_to_remove:
             self.remove_cache(fp)
 
+        for fp in [
+            CACHED_SERVERLIST_BINARY, CLIENT_CONFIG,
+            STREAMING_SERVICES, NOTIFICATIONS_FILE_PATH
+        ]:
+            self.remove_cache(self.__validators_filepath(fp))
+        self.__pending_validators = {}
+        self.__reset_cache_service()
+
         # Re-create a new
         self.__session_create()
 
         return True
 
+    @property
+    def refresh_generation(self):
+        """Number of times the session was refreshed."""
+        return self.__refresh_generation
+
     @ErrorStrategyRefresh
-    def refresh(self):
-        self.ensure_valid()
+    def refresh(self, if_not_refreshed_since=None):
+        """Refresh the session, and store it in the keyring.
 
-        self.__proton_api.refresh()
-        # We need to store again the session data
-        ExecutionEnvironment().keyring[
-            KeyringEnum.DEFAULT_KEYRING_SESSIONDATA.value
-        ] = self.__proton_api.dump()
+        Refreshes are serialized, as concurrent requests (ie
+        the prefetch at login) can all get a 401 at once.
+
+        Args:
+            if_not_refreshed_since (int): (optional) refresh_generation
+                when the request that got a 401 was made, the session
+                isn't refreshed again if it was in the meantime
+        """
+        with self.__refresh_lock:
+            if (
+                if_not_refreshed_since is not None
+                and if_not_refreshed_since != self.__refresh_generation
+            ):
+                logger.info("Session was refreshed in the meantime")
+                return True
+
+            self.ensure_valid()
+
+            self.__proton_api.refresh()
+            # We need to store again the session data
+            ExecutionEnvironment().keyring[
+                KeyringEnum.DEFAULT_KEYRING_SESSIONDATA.value
+            ] = self.__proton_api.dump()
+            self.__refresh_generation += 1
+
+        self.__reset_cache_service()
 
         return True
 
@@ -446,16 +655,61 @@ class APISession:
 
         self.__proton_user = username
 
-        # just by calling the properties, it automatically triggers to cache the data
-        _ = [
-            self.servers, self.clientconfig,
-            self.streaming, self.streaming_icons,
-            self._vpn_data
-        ]
-        self.get_all_notifications()
+        # The service has to use the new session
+        self.__reset_cache_service()
+        self.__prefetch()
 
         return True
 
+    def __prefetch(self):
+        """Fetch and cache all the session resources concurrently.
+
+        Just by calling the properties, it automatically triggers to cache
+        the data. Each one does its own request, so they are run in
+        parallel with a combined deadline: whatever isn't ready by then
+        keeps on being cached in the background.
+        VPN data is required, so its errors are raised.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
+        # Resolve the lazy environment properties used by all the
+        # requests before, so that threads do not race to create them
+        env = ExecutionEnvironment()
+        _ = [env.settings, env.connection_backend]
+
+        def streaming():
+            # Icons are fetched from the streaming services
+            _ = [self.streaming, self.streaming_icons]
+
+        tasks = [
+            ("VPN data", lambda: self._vpn_data),
+            ("servers", lambda: self.servers),
+            ("client config", lambda: self.clientconfig),
+            ("streaming", streaming),
+            ("notifications", self.get_all_notifications),
+        ]
+        executor = ThreadPoolExecutor(max_workers=len(tasks))
+        futures = [
+            (name, executor.submit(task)) for name, task in tasks
+        ]
+        done, _ = wait(
+            [future for _, future in futures], timeout=self.PREFETCH_TIMEOUT
+        )
+        executor.shutdown(wait=False)
+
+        for name, future in futures:
+            if future not in done:
+                logger.info("Prefetching {} did not complete in time".format(
+                    name
+                ))
+            elif future.exception() is not None:
+                logger.info("Could not prefetch {}: {}".format(
+                    name, future.exception()
+                ))
+
+        # Wait for it, if it didn't complete in time
+        futures[0][1].result()
+
     @property
     def is_valid(self):
         """
@@ -566,13 +820,148 @@ class APISession:
     def vpn_tier(self):
         return self._vpn_data['tier']
 
+    def enable_background_refresh(self):
+        """Serve cached resources immediately, and refresh the expired
+        ones in a background worker (stale-while-revalidate), instead of
+        blocking the caller on the API.
+
+        Refreshed server lists are built aside and replace the current
+        one, which (like its views) is left as is: get servers again once
+        notified of the refresh.
+
+        Returns:
+            RefreshScheduler: to register callbacks for new data
+        """
+        if self.__refresh_scheduler is None:
+            from .refresh_scheduler import RefreshScheduler
+            self.__refresh_scheduler = RefreshScheduler()
+
+        return self.__refresh_scheduler
+
+    def disable_background_refresh(self):
+        if self.__refresh_scheduler is not None:
+            self.__refresh_scheduler.shutdown(wait=False)
+            self.__refresh_scheduler = None
+
+    def get_next_fetch(self, resource):
+        """Get when a cached resource expires.
+
+        Args:
+            resource (string): servers, clientconfig, streaming,
+                streaming_icons or notifications (loaded beforehand)
+
+        Returns:
+            float: timestamp
+        """
+        if resource == "servers":
+            return min(self.__next_fetch_logicals, self.__next_fetch_load)
+        elif resource == "clientconfig":
+            return self.__next_fetch_client_config
+        elif resource == "streaming":
+            return self.__next_fetch_streaming_service
+        elif resource == "streaming_icons":
+            return self.__next_fetch_streaming_icons
+        elif resource == "notifications":
+            return self.__next_fetch_notifications
+
+        raise ValueError("Unknown resource {}".format(resource))
+
+    def __refresh(self, resource, update_if_needed, load_cache):
+        """Update a cached resource if needed.
+
+        Args:
+            resource (string): resource name
+            update_if_needed (callable): update_*_if_needed method
+            load_cache (callable): (re)loads the resource from its cache
+        """
+        from .cache_service import RESOURCES
+
+        get_next_fetch = functools.partial(self.get_next_fetch, resource)
+        if self.__cache_service is not None and resource in RESOURCES:
+            get_next_fetch = functools.partial(
+                self.__get_cache_service_next_fetch, resource
+            )
+            update_if_needed = self.__cache_service_updater(
+                resource, update_if_needed, get_next_fetch, load_cache
+            )
+
+        if self.__refresh_scheduler is None:
+            update_if_needed()
+        elif get_next_fetch() < time.time():
+            self.__refresh_scheduler.schedule(resource, update_if_needed)
+
+    def __get_cache_service_next_fetch(self, resource):
+        # Once known, the service decides when the resource expires
+        next_fetch = self.__cache_service_next_fetch.get(resource)
+        if next_fetch is None:
+            return self.get_next_fetch(resource)
+
+        return next_fetch
+
+    def __cache_service_updater(
+        self, resource, update_if_needed, get_next_fetch, load_cache
+    ):
+        """Wrap update_if_needed to have the cache service update the
+        resource, and then reload it from the cache written by the
+        service if it changed. Falls back to update_if_needed."""
+        def update():
+            if get_next_fetch() >= time.time():
+                return
+
+            cache_service = self.__cache_service
+            next_fetch = None
+            if cache_service is not None:
+                next_fetch = cache_service.refresh(resource)
+
+            if next_fetch is not None:
+                self.__cache_service_next_fetch[resource] = next_fetch
+                if (
+                    self.__get_cache_signature(resource)
+                    != self.__cache_signatures.get(resource)
+                ):
+                    load_cache()
+                return
+
+            # Don't try again with every resource
+            self.__cache_service = None
+            self.__cache_service_next_fetch = {}
+            update_if_needed()
+
+        return update
+
+    def __get_cache_signature(self, resource):
+        """Get the signature (inode, mtime and size) of the cache files
+        of a resource, which changes whenever they are written.
+
+        Returns:
+            tuple
+        """
+        signature = []
+        for filepath in self.CACHE_FILEPATHS[resource]:
+            try:
+                stat = os.stat(filepath)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append(
+                    (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                )
+
+        return tuple(signature)
+
+    def __reset_cache_service(self):
+        if self.__cache_service is not None:
+            self.__cache_service.reset()
+
     def __generate_random_component(self):
         # 1 +/- 0.22*random
         return (1 + self.RANDOM_FRACTION * (2 * random.random() - 1))
 
     def _update_next_fetch_logicals(self):
-        self.__next_fetch_logicals = self \
-            .__vpn_logicals.logicals_update_timestamp + \
+        self.__next_fetch_logicals = max(
+            self.__vpn_logicals.logicals_update_timestamp,
+            self.__logicals_checked_timestamp
+        ) + \
             self.FULL_CACHE_TIME_EXPIRE * self.__generate_random_component()
 
     def _update_next_fetch_loads(self):
@@ -603,6 +992,8 @@ class APISession:
     @ErrorStrategyNormalCall
     def update_servers_if_needed(self, force=False):
         changed = False
+        logicals_changed = False
+        loads_changed = False
 
         if not self.__ensure_that_api_can_be_reached():
             return
@@ -612,36 +1003,62 @@ class APISession:
         if netzone_address:
             additional_headers = {"X-PM-netzone": netzone_address}
 
+        # Refreshed in the background, the list might be in use by
+        # another thread: the updated one is built aside and swapped in
+        copy_on_write = self.__refresh_scheduler is not None
+        server_list = self.__vpn_logicals
+
+        loads_fetched = False
         if self.__next_fetch_logicals < time.time() or force:
             # Update logicals
             logger.info("Fetching logicals")
             self.__ensure_that_alt_routing_can_be_skipped()
-            self.__vpn_logicals.update_logical_data(
-                self.__proton_api.api_request(
-                    APIEndpointEnum.LOGICALS.value,
-                    additional_headers=additional_headers
-                )
+            logicals = self.__conditional_api_request(
+                APIEndpointEnum.LOGICALS.value, CACHED_SERVERLIST_BINARY,
+                server_list.logicals_update_timestamp > 0,
+                additional_headers=additional_headers
             )
+            if logicals is None:
+                # Loads might have changed anyway, they
+                # are fetched below if they expired
+                self.__logicals_checked_timestamp = self.__touch_validators(
+                    CACHED_SERVERLIST_BINARY
+                )
+            else:
+                if copy_on_write:
+                    from ..servers import ServerList
+                    server_list = ServerList()
+                server_list.update_logical_data(logicals)
+                # Logicals also contain the loads
+                loads_fetched = True
+                logicals_changed = True
             changed = True
-        elif self.__next_fetch_load < time.time():
+
+        if not loads_fetched and self.__next_fetch_load < time.time():
             # Update loads
             logger.info("Fetching loads")
             self.__ensure_that_alt_routing_can_be_skipped()
-            self.__vpn_logicals.update_load_data(
-                self.__proton_api.api_request(
-                    APIEndpointEnum.LOADS.value,
-                    additional_headers=additional_headers
-                )
+            loads = self.__proton_api.api_request(
+                APIEndpointEnum.LOADS.value,
+                additional_headers=additional_headers
             )
+            if copy_on_write and server_list is self.__vpn_logicals:
+                server_list = server_list.copy()
+            server_list.update_load_data(loads)
+            loads_changed = True
             changed = True
 
         if changed:
+            self.__vpn_logicals = server_list
             self._update_next_fetch_logicals()
             self._update_next_fetch_loads()
 
             try:
-                with open(CACHED_SERVERLIST, "w") as f:
-                    f.write(self.__vpn_logicals.json_dumps())
+                if logicals_changed:
+                    self.__save_servers_cache(server_list)
+                    self.__save_validators(CACHED_SERVERLIST_BINARY)
+                elif loads_changed:
+                    self.__save_servers_loads_cache(server_list)
             except Exception as e:
                 # This is not fatal, we only were not capable
                 # of storing the cache.
@@ -654,25 +1071,13 @@ class APISession:
     @property
     def servers(self):
         if self.__vpn_logicals is None:
-            from ..servers import ServerList
-
-            # Create a new server list
-            self.__vpn_logicals = ServerList()
-
-            # Try to load from file
-            try:
-                with open(CACHED_SERVERLIST, "r") as f:
-                    self.__vpn_logicals.json_loads(f.read())
-            except FileNotFoundError:
-                # This is not fatal,
-                # we only were not capable of loading the cache.
-                logger.info("Could not load server cache")
-
-            self._update_next_fetch_logicals()
-            self._update_next_fetch_loads()
+            self.__load_servers()
 
         try:
-            self.update_servers_if_needed()
+            self.__refresh(
+                "servers", self.update_servers_if_needed,
+                self.__reload_servers
+            )
         except APISessionIsNotValidError:
             raise
         except: # noqa
@@ -681,6 +1086,119 @@ class APISession:
         # self.streaming
         return self.__vpn_logicals
 
+    def __load_servers(self):
+        from ..servers import ServerList
+
+        signature = self.__get_cache_signature("servers")
+        if self.__vpn_logicals is None or self.__refresh_scheduler is not None:
+            # Create a new server list, only published once loaded
+            # as another thread might be using the current one
+            server_list = ServerList()
+        else:
+            # Reloaded in place, which updates its views
+            server_list = self.__vpn_logicals
+
+        # Try to load from file
+        try:
+            self.__load_servers_cache(server_list)
+        except FileNotFoundError:
+            # This is not fatal,
+            # we only were not capable of loading the cache.
+            logger.info("Could not load server cache")
+
+        self.__vpn_logicals = server_list
+        self.__cache_signatures["servers"] = signature
+        self.__logicals_checked_timestamp = self.__load_validators(
+            CACHED_SERVERLIST_BINARY
+        ).get("CheckedTimestamp", 0.)
+        self._update_next_fetch_logicals()
+        self._update_next_fetch_loads()
+
+    def __reload_servers(self):
+        """Load the server cache again, once written by the cache service.
+
+        If only the loads changed, they are merged into the current list
+        rather than loading everything again.
+        """
+        signature = self.__get_cache_signature("servers")
+        previous_signature = self.__cache_signatures.get("servers")
+        if previous_signature is None or previous_signature[0] != signature[0]:
+            self.__load_servers()
+            return
+
+        server_list = self.__vpn_logicals
+        if self.__refresh_scheduler is not None:
+            server_list = server_list.copy()
+
+        try:
+            with open(CACHED_SERVERLIST_LOADS, "r") as f:
+                server_list.json_loads_load_data(f.read())
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.info("Could not load server loads cache {}".format(e))
+
+        self.__vpn_logicals = server_list
+        self.__cache_signatures["servers"] = signature
+        self._update_next_fetch_loads()
+
+    def __save_servers_cache(self, server_list):
+        # The cache file might be mmaped by this (or another) process,
+        # CacheStore replaces it and never truncates it in place
+        CacheStore().write(
+            CACHED_SERVERLIST_BINARY, server_list.binary_dumps(),
+            fsync=self.fsync_servers_cache
+        )
+
+        # Loads are now part of the main cache
+        CacheStore().remove(CACHED_SERVERLIST_LOADS)
+
+    def __save_servers_loads_cache(self, server_list):
+        # Only loads changed: store them aside rather
+        # than rewriting the whole server cache
+        CacheStore().write(
+            CACHED_SERVERLIST_LOADS,
+            server_list.json_dumps_load_data()
+        )
+
+    def __load_servers_cache(self, server_list):
+        """Load the server list from the binary cache, and merge the
+        loads stored aside.
+
+        Falls back to the JSON cache of previous versions, which is then
+        migrated to the binary format.
+        """
+        try:
+            with open(CACHED_SERVERLIST_BINARY, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            server_list.binary_loads(buffer)
+        except FileNotFoundError:
+            self.__migrate_servers_json_cache(server_list)
+            return
+        except ValueError as e:
+            logger.info("Could not load binary server cache {}".format(e))
+            self.__migrate_servers_json_cache(server_list)
+            return
+
+        try:
+            with open(CACHED_SERVERLIST_LOADS, "r") as f:
+                server_list.json_loads_load_data(f.read())
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            logger.info("Could not load server loads cache {}".format(e))
+
+    def __migrate_servers_json_cache(self, server_list):
+        with open(CACHED_SERVERLIST, "r") as f:
+            server_list.json_loads(f.read())
+
+        try:
+            self.__save_servers_cache(server_list)
+        except Exception as e:
+            logger.info("Could not migrate server cache {}".format(e))
+        else:
+            self.remove_cache(CACHED_SERVERLIST)
+
     @ErrorStrategyNormalCall
     def update_client_config_if_needed(self, force=False):
         changed = False
@@ -692,16 +1210,23 @@ class APISession:
             # Update client config
             logger.info("Fetching client config")
             self.__ensure_that_alt_routing_can_be_skipped()
-            self.__clientconfig.update_client_config_data(
-                self.__proton_api.api_request(APIEndpointEnum.CLIENT_CONFIG.value)
+            client_config = self.__conditional_api_request(
+                APIEndpointEnum.CLIENT_CONFIG.value, CLIENT_CONFIG,
+                self.__clientconfig.client_config_timestamp > 0
             )
+            if client_config is None:
+                self.__clientconfig.touch_client_config_data()
+            else:
+                self.__clientconfig.update_client_config_data(client_config)
             changed = True
 
         if changed:
             self._update_next_fetch_client_config()
             try:
-                with open(CLIENT_CONFIG, "w") as f:
-                    f.write(self.__clientconfig.json_dumps())
+                CacheStore().write(
+                    CLIENT_CONFIG, self.__clientconfig.json_dumps()
+                )
+                self.__save_validators(CLIENT_CONFIG)
             except Exception as e:
                 # This is not fatal, we only were not capable
                 # of storing the cache.
@@ -722,29 +1247,38 @@ class APISession:
     @property
     def clientconfig(self):
         if self.__clientconfig is None:
-            from ..client_config import ClientConfig
-
-            # Create a new client config
-            self.__clientconfig = ClientConfig()
-
-            # Try to load from file
-            try:
-                with open(CLIENT_CONFIG, "r") as f:
-                    self.__clientconfig.json_loads(f.read())
-            except FileNotFoundError:
-                # This is not fatal,
-                # we only were not capable of loading the cache.
-                logger.info("Could not load client config cache")
-
-            self._update_next_fetch_client_config()
+            self.__load_client_config()
 
         try:
-            self.update_client_config_if_needed()
+            self.__refresh(
+                "clientconfig", self.update_client_config_if_needed,
+                self.__load_client_config
+            )
         except: # noqa
             pass
 
         return self.__clientconfig
 
+    def __load_client_config(self):
+        from ..client_config import ClientConfig
+
+        signature = self.__get_cache_signature("clientconfig")
+        # Create a new client config
+        clientconfig = ClientConfig()
+
+        # Try to load from file
+        try:
+            with open(CLIENT_CONFIG, "r") as f:
+                clientconfig.json_loads(f.read())
+        except FileNotFoundError:
+            # This is not fatal,
+            # we only were not capable of loading the cache.
+            logger.info("Could not load client config cache")
+
+        self.__clientconfig = clientconfig
+        self.__cache_signatures["clientconfig"] = signature
+        self._update_next_fetch_client_config()
+
     @ErrorStrategyNormalCall
     def update_streaming_data_if_needed(self, force=False):
         changed = False
@@ -756,16 +1290,25 @@ class APISession:
             # Update streaming services
             logger.info("Fetching streaming data")
             self.__ensure_that_alt_routing_can_be_skipped()
-            self.__streaming_services.update_streaming_services_data(
-                self.__proton_api.api_request(APIEndpointEnum.STREAMING_SERVICES.value)
+            streaming_services = self.__conditional_api_request(
+                APIEndpointEnum.STREAMING_SERVICES.value, STREAMING_SERVICES,
+                self.__streaming_services.streaming_services_timestamp > 0
             )
+            if streaming_services is None:
+                self.__streaming_services.touch_streaming_services_data()
+            else:
+                self.__streaming_services.update_streaming_services_data(
+                    streaming_services
+                )
             changed = True
 
         if changed:
             self._update_next_fetch_streaming_services()
             try:
-                with open(STREAMING_SERVICES, "w") as f:
-                    f.write(self.__streaming_services.json_dumps())
+                CacheStore().write(
+                    STREAMING_SERVICES, self.__streaming_services.json_dumps()
+                )
+                self.__save_validators(STREAMING_SERVICES)
             except Exception as e:
                 # This is not fatal, we only were not capable
                 # of storing the cache.
@@ -778,24 +1321,13 @@ class APISession:
     @property
     def streaming(self):
         if self.__streaming_services is None:
-            from ..streaming import Streaming
-
-            # create new Streaming object
-            self.__streaming_services = Streaming()
-
-            # Try to load from file
-            try:
-                with open(STREAMING_SERVICES, "r") as f:
-                    self.__streaming_services.json_loads(f.read())
-            except FileNotFoundError:
-                # This is not fatal,
-                # we only were not capable of loading the cache.
-                logger.info("Could not load streaming cache")
-
-            self._update_next_fetch_streaming_services()
+            self.__load_streaming()
 
         try:
-            self.update_streaming_data_if_needed()
+            self.__refresh(
+                "streaming", self.update_streaming_data_if_needed,
+                self.__load_streaming
+            )
         except: # noqa
             pass
 
@@ -803,6 +1335,26 @@ class APISession:
 
         return self.__streaming_services
 
+    def __load_streaming(self):
+        from ..streaming import Streaming
+
+        signature = self.__get_cache_signature("streaming")
+        # create new Streaming object
+        streaming_services = Streaming()
+
+        # Try to load from file
+        try:
+            with open(STREAMING_SERVICES, "r") as f:
+                streaming_services.json_loads(f.read())
+        except FileNotFoundError:
+            # This is not fatal,
+            # we only were not capable of loading the cache.
+            logger.info("Could not load streaming cache")
+
+        self.__streaming_services = streaming_services
+        self.__cache_signatures["streaming"] = signature
+        self._update_next_fetch_streaming_services()
+
     def update_streaming_icons_if_needed(self, force=False):
         if not self.__ensure_that_api_can_be_reached():
             return
@@ -814,8 +1366,10 @@ class APISession:
 
             self._update_next_fetch_streaming_icons()
             try:
-                with open(STREAMING_ICONS_CACHE_TIME_PATH, "w") as f:
-                    f.write(self.__streaming_icons.json_dumps())
+                CacheStore().write(
+                    STREAMING_ICONS_CACHE_TIME_PATH,
+                    self.__streaming_icons.json_dumps()
+                )
             except Exception as e:
                 # This is not fatal, we only were not capable
                 # of storing the cache.
@@ -826,20 +1380,13 @@ class APISession:
     @property
     def _notifications(self):
         if self.__notification_data is None:
-            from ..notification import NotificationData
-
-            self.__notification_data = NotificationData()
-
-            try:
-                with open(NOTIFICATIONS_FILE_PATH, "r") as f:
-                    self.__notification_data.json_loads(f.read())
-            except FileNotFoundError:
-                logger.info("Could not load notifications cache")
-
-            self._update_next_fetch_notifications()
+            self.__load_notifications()
 
         try:
-            self._update_notifications_if_needed()
+            self.__refresh(
+                "notifications", self._update_notifications_if_needed,
+                self.__load_notifications
+            )
         except APISessionIsNotValidError:
             raise
         except: # noqa
@@ -847,6 +1394,22 @@ class APISession:
 
         return self.__notification_data
 
+    def __load_notifications(self):
+        from ..notification import NotificationData
+
+        signature = self.__get_cache_signature("notifications")
+        notification_data = NotificationData()
+
+        try:
+            with open(NOTIFICATIONS_FILE_PATH, "r") as f:
+                notification_data.json_loads(f.read())
+        except FileNotFoundError:
+            logger.info("Could not load notifications cache")
+
+        self.__notification_data = notification_data
+        self.__cache_signatures["notifications"] = signature
+        self._update_next_fetch_notifications()
+
     @ErrorStrategyNormalCall
     def _update_notifications_if_needed(self, force=False):
         changed = False
@@ -856,16 +1419,26 @@ class APISession:
 
         if self.__next_fetch_notifications < time.time() or force:
             logger.info("Fetching new notifications")
-            self.__notification_data.update_notifications_data(
-                self.__proton_api.api_request(APIEndpointEnum.NOTIFICATIONS.value)
+            notifications = self.__conditional_api_request(
+                APIEndpointEnum.NOTIFICATIONS.value, NOTIFICATIONS_FILE_PATH,
+                self.__notification_data.notifications_timestamp > 0
             )
+            if notifications is None:
+                self.__notification_data.touch_notifications_data()
+            else:
+                self.__notification_data.update_notifications_data(
+                    notifications
+                )
             changed = True
 
         if changed:
             self._update_next_fetch_notifications()
             try:
-                with open(NOTIFICATIONS_FILE_PATH, "w") as f:
-                    f.write(self.__notification_data.json_dumps())
+                CacheStore().write(
+                    NOTIFICATIONS_FILE_PATH,
+                    self.__notification_data.json_dumps()
+                )
+                self.__save_validators(NOTIFICATIONS_FILE_PATH)
             except Exception as e:
                 # This is not fatal, we only were not capable
                 # of storing the cache.
@@ -988,26 +1561,38 @@ class APISession:
     @property
     def streaming_icons(self):
         if self.__streaming_icons is None:
-            from ..streaming import StreamingIcons
+            self.__load_streaming_icons()
 
-            # create new StreamingIcon object
-            self.__streaming_icons = StreamingIcons()
-            try:
-                with open(STREAMING_ICONS_CACHE_TIME_PATH, "r") as f:
-                    self.__streaming_icons.json_loads(f.read())
-            except FileNotFoundError:
-                # This is not fatal,
-                # we only were not capable of loading the cache.
-                logger.info("Could not load streaming time cache")
+        try:
+            self.__refresh(
+                "streaming_icons", self.update_streaming_icons_if_needed,
+                self.__load_streaming_icons
+            )
+        except APISessionIsNotValidError:
+            raise
+        except Exception as e:
+            # Cached icons are used meanwhile
+            logger.exception(
+                "Could not refresh streaming icons: {}".format(e)
+            )
 
-            self._update_next_fetch_streaming_icons()
+        return self.__streaming_icons
+
+    def __load_streaming_icons(self):
+        from ..streaming import StreamingIcons
 
+        # create new StreamingIcon object
+        streaming_icons = StreamingIcons()
         try:
-            self.update_streaming_icons_if_needed()
-        except: # noqa
-            pass
+            with open(STREAMING_ICONS_CACHE_TIME_PATH, "r") as f:
+                streaming_icons.json_loads(f.read())
+        except FileNotFoundError:
+            # This is not fatal,
+            # we only were not capable of loading the cache.
+            logger.info("Could not load streaming time cache")
 
-        return self.__streaming_icons
+        self.__streaming_icons = streaming_icons
+        self._update_next_fetch_streaming_icons()
 
     @property
     def vpn_ports_openvpn_udp(self):
@@ -53,6 +53,11 @@ class Streaming:
         data["StreamingServicesUpdateTimestamp"] = time.time()
         self.__data = data
 
+    def touch_streaming_services_data(self):
+        """Mark the cached streaming services as up to date, ie when the
+        API reported them as not modified."""
+        self.__data["StreamingServicesUpdateTimestamp"] = time.time()
+
     @property
     def streaming_services_timestamp(self):
         try:
@@ -1,6 +1,7 @@
 import os
 import platform
 import subprocess as _subprocess
+import threading
 
 
 class SubprocessWrapper:
@@ -29,19 +30,56 @@ class SubprocessWrapper:
         return stat_info.st_uid == 0 and stat_info.st_gid == 0
 
     def __init__(self):
+        # Executables are only searched for when first run:
+        # binary_short_name => (full secure path, stat signature)
         self._path_to_binaries = {}
-        self.__search_for_matching_executables()
-        self.__ensure_executables_exist()
+        self.__lock = threading.Lock()
 
-    def __search_for_matching_executables(self):
-        """Searches for matching executables.
+    def __get_executable_path(self, binary):
+        """Get the full secure path of binary.
 
-        While searching, it will attempt to match the
-        executables provided in _acceptable_binaries and ensure that
-        those executables are root owned.
+        The path found is kept, and only checked again to be the same
+        (root owned) file when reused.
 
-        It builds self._path_to_binaries, where
-        binary_short_name => full secure path.
+        Returns:
+            string: full path of the executable
+        """
+        with self.__lock:
+            cached = self._path_to_binaries.get(binary)
+
+        if cached is not None:
+            binary_path, signature = cached
+            if self.__signature(binary_path) == signature:
+                return binary_path
+
+        binary_path = self.__search_for_matching_executable(binary)
+        with self.__lock:
+            self._path_to_binaries[binary] = (
+                binary_path, self.__signature(binary_path)
+            )
+
+        return binary_path
+
+    def __signature(self, path):
+        """Identify a root owned file, None otherwise."""
+        try:
+            stat_info = os.stat(path)
+        except OSError:
+            return None
+
+        if stat_info.st_uid != 0 or stat_info.st_gid != 0:
+            return None
+
+        return stat_info.st_dev, stat_info.st_ino, stat_info.st_mtime_ns
+
+    def __search_for_matching_executable(self, binary):
+        """Searches for a matching executable.
+
+        It looks for binary in the root-owned directories of the
+        system path, and ensures that the executable is root owned.
+
+        Returns:
+            string: full secure path of the executable
         """
         # Look for root-owned directories in the system path in order
         for path in os.environ.get('PATH', '').split(os.path.pathsep):
@@ -50,38 +88,21 @@ class SubprocessWrapper:
             if not self.is_root_owned(path):
                 continue
 
-            # Check for all the binaries that we haven't matched yet
-            for binary in self._acceptable_binaries.difference(
-                self._path_to_binaries.keys()
-            ):
-                binary_path_candidate = os.path.join(path, binary)
-                if not os.path.isfile(binary_path_candidate):
-                    continue
-
-                if not self.is_root_owned(binary_path_candidate):
-                    continue
+            binary_path_candidate = os.path.join(path, binary)
+            if not os.path.isfile(binary_path_candidate):
+                continue
 
-                # We're happy with that one, store it
-                self._path_to_binaries[binary] = binary_path_candidate
+            if not self.is_root_owned(binary_path_candidate):
+                continue
 
-            # Shortcut: if we don't have any executable left to find,
-            # we can exit the loop
-            if len(self._path_to_binaries) == len(self._acceptable_binaries):
-                break
+            # We're happy with that one
+            return binary_path_candidate
 
-    def __ensure_executables_exist(self):
-        """Ensure that executables exist, by comparing the length of
-        self._path_to_binaries to self._acceptable_binaries.
-        """
-        # Were we unable to find executables? This is bad
-        if len(self._path_to_binaries) != len(self._acceptable_binaries):
-            missing_executables = self._acceptable_binaries.difference(
-                self._path_to_binaries.keys()
-            )
-            raise RuntimeError(
-                "Couldn't find acceptable "
-                "executables for {}".format(missing_executables)
-            )
+        # Were we unable to find the executable? This is bad
+        raise RuntimeError(
+            "Couldn't find acceptable "
+            "executables for {}".format({binary})
+        )
 
     def run(
         self, args, input=None, stdout=None, stderr=None,
@@ -98,13 +119,13 @@ class SubprocessWrapper:
         ):
             raise ValueError("args should be a non-empty list of string")
 
-        if args[0] not in self._path_to_binaries:
+        if args[0] not in self._acceptable_binaries:
             raise ValueError(
                 "{!r} is not an acceptable binary".format(args[0])
             )
 
         # Replace the path with the one we wanted
-        args[0] = self._path_to_binaries[args[0]]
+        args[0] = self.__get_executable_path(args[0])
 
         # Python below 3.7.0 does not support capture_output
         if platform.python_version() < "3.7.0":
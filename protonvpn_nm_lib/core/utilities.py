@@ -1,7 +1,6 @@
 import subprocess
 from ..logger import logger
 from .. import exceptions
-import requests
 from ..enums import KillswitchStatusEnum, ProtocolEnum, ConnectionTypeEnum
 from ..constants import FLAT_SUPPORTED_PROTOCOLS
 import re
@@ -157,7 +156,10 @@ class Utilities:
         connection_metadata, servername,
         protocol, physical_server
     ):
-        connection_metadata.save_servername(servername)
-        connection_metadata.save_protocol(protocol)
-        connection_metadata.save_display_server_ip(physical_server.exit_ip)
-        connection_metadata.save_server_ip(physical_server.entry_ip)
+        with connection_metadata.batch():
+            connection_metadata.save_servername(servername)
+            connection_metadata.save_protocol(protocol)
+            connection_metadata.save_display_server_ip(
+                physical_server.exit_ip
+            )
+            connection_metadata.save_server_ip(physical_server.entry_ip)
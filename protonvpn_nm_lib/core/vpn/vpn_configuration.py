@@ -1,9 +1,7 @@
 import os
 import tempfile
 from abc import ABCMeta, abstractmethod
-
-import jinja2
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
 
 from ... import exceptions
 from ...constants import OPENVPN_TEMPLATE, PROTON_XDG_CACHE_HOME, TEMPLATES
@@ -14,6 +12,40 @@ from ..environment import ExecutionEnvironment
 from ..utils import SubclassesMixin
 
 
+# Compiled once, when a configuration is first rendered
+_openvpn_template = None
+
+
+def _get_openvpn_template():
+    global _openvpn_template
+    if _openvpn_template is None:
+        from jinja2 import Environment, FileSystemLoader
+
+        j2 = Environment(loader=FileSystemLoader(TEMPLATES))
+        _openvpn_template = j2.get_template(OPENVPN_TEMPLATE)
+
+    return _openvpn_template
+
+
+@lru_cache(maxsize=32)
+def _render_openvpn_configuration(openvpn_protocol, entry_ip, openvpn_ports):
+    """Render an OpenVPN configuration, once per server and ports.
+
+    Args:
+        openvpn_protocol (string): tcp or udp
+        entry_ip (string): server entry IP
+        openvpn_ports (tuple(int))
+
+    Returns:
+        string: configuration file
+    """
+    return _get_openvpn_template().render({
+        "openvpn_protocol": openvpn_protocol,
+        "serverlist": [entry_ip],
+        "openvpn_ports": list(openvpn_ports),
+    })
+
+
 class VPNConfiguration(SubclassesMixin, metaclass=ABCMeta):
     """VPNConfiguration class.
 
@@ -45,6 +77,11 @@ class VPNConfiguration(SubclassesMixin, metaclass=ABCMeta):
 
         return protocol_dict[protocol](physical_server, *a, **kw)
 
+    @property
+    def entry_ip(self):
+        """Entry IP of the physical server"""
+        return self._physical_server.entry_ip
+
     @abstractmethod
     def generate(self):
         pass
@@ -122,22 +159,19 @@ class VPNConfigurationOpenVPN(VPNConfiguration):
 
         logger.info("Generating OpenVPN configuration")
 
-        j2_values = {
-            "openvpn_protocol": self.openvpn_protocol_name,
-            "serverlist": [self._physical_server.entry_ip],
-            "openvpn_ports": self.ports,
-        }
-
-        j2 = Environment(loader=FileSystemLoader(TEMPLATES))
-
-        template = j2.get_template(OPENVPN_TEMPLATE)
-
         try:
-            return template.render(j2_values)
-        except jinja2.exceptions.TemplateNotFound as e:
-            logger.exception("[!] jinja2.TemplateNotFound: {}".format(e))
-            raise jinja2.exceptions.TemplateNotFound(e)
+            return _render_openvpn_configuration(
+                self.openvpn_protocol_name,
+                self.entry_ip,
+                tuple(self.ports)
+            )
         except Exception as e:
+            # Only imported when rendering, which failed
+            import jinja2
+            if isinstance(e, jinja2.exceptions.TemplateNotFound):
+                logger.exception("[!] jinja2.TemplateNotFound: {}".format(e))
+                raise jinja2.exceptions.TemplateNotFound(e)
+
             logger.exception("[!] Unknown exception: {}".format(e))
             capture_exception(e)
 
@@ -0,0 +1,144 @@
+"""Shared cache service.
+
+Owns the API session caches (server list, client config, streaming
+services and notifications) for all the processes of the user: instead
+of each process deciding on its own to request the API, they ask this
+service through a Unix socket, and then load the caches it wrote.
+
+The service only answers refresh requests, not server queries: the
+clients decode the server list themselves, from the binary cache which
+is mmaped and decoded lazily (see ServerList), so this is about as cheap
+as parsing a query response and keeps the server API in process.
+
+The library falls back to in-process refreshes if the service isn't
+running.
+
+Run with: python3 -m protonvpn_nm_lib.daemon.cache_service
+"""
+import json
+import os
+import socketserver
+import threading
+
+from protonvpn_nm_lib.constants import CACHE_SERVICE_SOCKET_PATH
+from protonvpn_nm_lib.core.environment import ExecutionEnvironment
+from protonvpn_nm_lib.core.session.cache_service import RESOURCES
+from protonvpn_nm_lib.logger import logger
+
+# Session property which loads and refreshes each resource
+RESOURCE_PROPERTIES = {
+    "servers": "servers",
+    "clientconfig": "clientconfig",
+    "streaming": "streaming",
+    "notifications": "_notifications",
+}
+assert set(RESOURCE_PROPERTIES) == set(RESOURCES)
+
+
+class CacheRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            response = self.server.handle_request_data(request)
+        except Exception as e:
+            logger.exception(e)
+            response = {"Error": str(e) or type(e).__name__}
+
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class CacheService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server refreshing the session caches on request.
+
+    Requests are handled one at a time: concurrent refreshes of the
+    same resource end up in a single API request, as the ones waiting
+    find the resource up to date.
+
+    Args:
+        socket_path (string): (optional) path of the socket
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path=CACHE_SERVICE_SOCKET_PATH):
+        self.__lock = threading.Lock()
+        self.__session = None
+
+        try:
+            # Left behind by a service which didn't exit cleanly
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+
+        socket_dir = os.path.dirname(socket_path)
+        if not os.path.isdir(socket_dir):
+            os.makedirs(socket_dir)
+
+        super().__init__(socket_path, CacheRequestHandler)
+        # Only the user is allowed to talk to the service
+        os.chmod(socket_path, 0o600)
+
+    @property
+    def session(self):
+        if self.__session is None:
+            from protonvpn_nm_lib.core.session import APISession
+
+            # The service refreshes the caches itself
+            self.__session = APISession(use_cache_service=False)
+            ExecutionEnvironment().api_session = self.__session
+
+        return self.__session
+
+    def handle_request_data(self, request):
+        """Handle a decoded request.
+
+        Args:
+            request (dict)
+
+        Returns:
+            dict: response
+        """
+        action = request.get("Action")
+        with self.__lock:
+            if action == "refresh":
+                return self.__refresh(request.get("Resource"))
+            elif action == "reset":
+                logger.info("Resetting session")
+                self.__session = None
+                return {}
+
+        raise ValueError("Unknown action {}".format(action))
+
+    def __refresh(self, resource):
+        try:
+            property_name = RESOURCE_PROPERTIES[resource]
+        except KeyError:
+            raise ValueError("Unknown resource {}".format(resource))
+
+        logger.info("Refreshing {}".format(resource))
+        # The properties load the caches and refresh them if needed
+        getattr(self.session, property_name)
+        return {"NextFetch": self.session.get_next_fetch(resource)}
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    service = CacheService()
+    logger.info("Cache service listening on {}".format(
+        service.server_address
+    ))
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,11 @@ killswitch = env.killswitch
 ipv6_leak_protection = env.ipv6leak
 settings = env.settings
 
+# This daemon runs a main loop, so the kill switch can follow
+# NetworkManager signals instead of polling the connections
+killswitch.track_connection_changes()
+ipv6_leak_protection.track_connection_changes()
+
 from protonvpn_nm_lib.core.dbus.dbus_login1_wrapper import Login1UnitWrapper
 from protonvpn_nm_lib.core.dbus.dbus_network_manager_wrapper import \
     NetworkManagerUnitWrapper
@@ -187,6 +192,7 @@ class ProtonVPNReconnector:
             state (int): NMVpnConnectionState
             reason (int): NMActiveConnectionStateReason
         """
+        self.nm_wrapper.invalidate_snapshot()
         state = VPNConnectionStateEnum(state)
         reason = VPNConnectionReasonEnum(reason)
         logger.info(
@@ -385,6 +391,9 @@ class ProtonVPNReconnector:
         if self.is_user_session_locked:
             return
 
+        # Called on NetworkManager changes: don't reuse a snapshot
+        # taken before them
+        self.nm_wrapper.invalidate_snapshot()
         vpn_interface = self.nm_wrapper.get_vpn_interface()
 
         try:
@@ -213,6 +213,14 @@ class KillSwitchInterfaceTrackerEnum(Enum):
     IS_RUNNING = 1
 
 
+class KillSwitchStateEnum(Enum):
+    DISABLED = "disabled"
+    BLOCKING = "blocking"
+    ROUTED = "routed"
+    SOFT = "soft"
+    UNKNOWN = "unknown"
+
+
 class KillSwitchActionEnum(Enum):
     PRE_CONNECTION = "pre_connection",
     POST_CONNECTION = "post_connection",
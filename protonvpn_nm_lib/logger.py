@@ -7,6 +7,16 @@ from .constants import LOGGER_NAME, PROTON_XDG_CACHE_HOME_LOGS
 import time
 
 
+class LogFileHandler(RotatingFileHandler):
+    """Rotating file handler that creates the log directory
+    when the file is first opened, instead of when the logger
+    is created."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
 def get_logger():
     """Create the logger."""
     FORMATTER = logging.Formatter(
@@ -14,9 +24,6 @@ def get_logger():
     )
     FORMATTER.converter = time.gmtime
 
-    if not os.path.isdir(PROTON_XDG_CACHE_HOME_LOGS):
-        os.makedirs(PROTON_XDG_CACHE_HOME_LOGS)
-
     LOGFILE = os.path.join(PROTON_XDG_CACHE_HOME_LOGS, "protonvpn.log")
 
     logger = logging.getLogger(LOGGER_NAME)
@@ -34,9 +41,10 @@ def get_logger():
         logger.addHandler(console_handler)
 
     logger.setLevel(logging_level)
-    # Starts a new file at 3MB size limit
-    file_handler = RotatingFileHandler(
-        LOGFILE, maxBytes=3145728, backupCount=3
+    # Starts a new file at 3MB size limit. The file is only
+    # opened (and its directory created) once something is logged
+    file_handler = LogFileHandler(
+        LOGFILE, maxBytes=3145728, backupCount=3, delay=True
     )
     file_handler.setFormatter(FORMATTER)
     logger.addHandler(file_handler)
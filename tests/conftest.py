@@ -0,0 +1,45 @@
+import pytest
+
+
+def logical_payload(position, **fields):
+    """Build the API payload of a logical server.
+
+    Args:
+        position (int): makes the ID, name, domain and IPs unique
+        fields: override the default fields
+
+    Returns:
+        dict
+    """
+    logical = {
+        "ID": "id-{}".format(position),
+        "Name": "CH#{}".format(position),
+        "EntryCountry": "CH",
+        "ExitCountry": "CH",
+        "HostCountry": None,
+        "Domain": "ch-{}.protonvpn.net".format(position),
+        "Features": 0,
+        "Region": None,
+        "City": "Zurich",
+        "Tier": 2,
+        "Score": float(position),
+        "Load": 10,
+        "Status": 1,
+        "Location": {"Lat": 47.4, "Long": 8.5},
+        "Servers": [{
+            "ID": "physical-{}".format(position),
+            "EntryIP": "10.0.{}.1".format(position),
+            "ExitIP": "10.0.{}.2".format(position),
+            "Domain": "node-ch-{}.protonvpn.net".format(position),
+            "Status": 1,
+            "Label": "0",
+        }],
+    }
+    logical.update(fields)
+    return logical
+
+
+@pytest.fixture(scope="session")
+def make_logical():
+    """Factory of logical server payloads, see logical_payload()."""
+    return logical_payload
@@ -0,0 +1,173 @@
+import os
+import types
+
+import pytest
+
+# The connection backend package imports dbus and NM
+pytest.importorskip("dbus")
+pytest.importorskip("gi")
+
+from protonvpn_nm_lib.core.connection_backend.nm_client.openvpn import (
+    build_openvpn_connection
+)
+from protonvpn_nm_lib.core.vpn.vpn_configuration import (
+    _render_openvpn_configuration
+)
+
+BuildOpenVPNConnection = build_openvpn_connection.BuildOpenVPNConnection
+
+# Directives of the template the OpenVPN plugin doesn't import,
+# as its service always passes them to openvpn
+IGNORED_DIRECTIVES = {
+    "client", "nobind", "resolv-retry", "persist-key", "persist-tun"
+}
+
+
+def import_directives(configuration, tmp_path):
+    """Translate a configuration file to data items, as the import of
+    NetworkManager's OpenVPN plugin does for the directives of the
+    template.
+
+    Returns:
+        dict
+    """
+    vpn_data = {}
+    lines = iter(configuration.splitlines())
+    for line in lines:
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("<"):
+            directive = line.strip("<>")
+            inline_file = tmp_path / directive
+            content = []
+            for line in lines:
+                if line == "</{}>".format(directive):
+                    break
+                content.append(line + "\n")
+            inline_file.write_text("".join(content))
+            vpn_data[directive] = str(inline_file)
+            continue
+
+        directive, *args = line.split()
+        if directive in IGNORED_DIRECTIVES:
+            continue
+        elif directive == "dev":
+            vpn_data["dev-type"] = args[0]
+        elif directive == "proto":
+            if args[0] == "tcp":
+                vpn_data["proto-tcp"] = "yes"
+        elif directive == "remote":
+            vpn_data["remote"] = ", ".join(
+                filter(None, [vpn_data.get("remote"), ":".join(args)])
+            )
+        elif directive == "remote-random":
+            vpn_data["remote-random"] = "yes"
+        elif directive == "auth-user-pass":
+            vpn_data["connection-type"] = "password"
+        elif directive == "tun-mtu":
+            vpn_data["tunnel-mtu"] = args[0]
+        elif directive == "reneg-sec":
+            vpn_data["reneg-seconds"] = args[0]
+        elif directive in ("cipher", "verb", "mssfix", "remote-cert-tls"):
+            vpn_data[directive] = args[0]
+        else:
+            raise AssertionError("Unknown directive {}".format(directive))
+
+    return vpn_data
+
+
+def read_inline_files(vpn_data):
+    vpn_data = dict(vpn_data)
+    for directive in ("ca", "tls-crypt"):
+        with open(vpn_data[directive]) as f:
+            vpn_data[directive] = f.read()
+
+    return vpn_data
+
+
+@pytest.fixture
+def cert_dir(monkeypatch, tmp_path):
+    cert_dir = tmp_path / "nm-openvpn"
+    for name, filename in [
+        ("OPENVPN_CA_FILEPATH", "ProtonVPN-ca.pem"),
+        ("OPENVPN_TLS_CRYPT_FILEPATH", "ProtonVPN-tls-crypt.pem"),
+    ]:
+        monkeypatch.setattr(
+            build_openvpn_connection, name, str(cert_dir / filename)
+        )
+    monkeypatch.setattr(
+        build_openvpn_connection, "NM_OPENVPN_CERT_DIR", str(cert_dir)
+    )
+    build_openvpn_connection._get_inline_files.cache_clear()
+    build_openvpn_connection._checked_inline_files.clear()
+
+    yield cert_dir
+
+    build_openvpn_connection._get_inline_files.cache_clear()
+    build_openvpn_connection._checked_inline_files.clear()
+
+
+def vpn_configuration(openvpn_protocol_name):
+    return types.SimpleNamespace(
+        entry_ip="185.159.157.1",
+        ports=[443, 7770, 8443],
+        openvpn_protocol_name=openvpn_protocol_name,
+    )
+
+
+def rendered_configuration(vpn_configuration):
+    return _render_openvpn_configuration(
+        vpn_configuration.openvpn_protocol_name,
+        vpn_configuration.entry_ip,
+        tuple(vpn_configuration.ports)
+    )
+
+
+@pytest.mark.parametrize("openvpn_protocol_name", ["tcp", "udp"])
+def test_vpn_data_matches_the_template(
+    openvpn_protocol_name, cert_dir, tmp_path
+):
+    configuration = vpn_configuration(openvpn_protocol_name)
+
+    vpn_data = BuildOpenVPNConnection.get_vpn_data(configuration)
+
+    assert read_inline_files(vpn_data) == read_inline_files(
+        import_directives(rendered_configuration(configuration), tmp_path)
+    )
+
+
+def test_inline_files_are_private(cert_dir):
+    vpn_data = BuildOpenVPNConnection.get_vpn_data(vpn_configuration("udp"))
+
+    for directive in ("ca", "tls-crypt"):
+        assert vpn_data[directive].startswith(str(cert_dir))
+        assert os.stat(vpn_data[directive]).st_mode & 0o777 == 0o600
+
+
+def test_vpn_data_matches_the_editor_plugin(cert_dir, tmp_path):
+    from gi.repository import NM
+
+    try:
+        plugin = NM.VpnPluginInfo.list_find_by_name(
+            NM.VpnPluginInfo.list_load(), "openvpn"
+        )
+        editor_plugin = plugin.load_editor_plugin()
+    except Exception:
+        pytest.skip("NetworkManager's OpenVPN plugin isn't installed")
+
+    configuration = vpn_configuration("tcp")
+    configuration_filepath = tmp_path / "ProtonVPN.ovpn"
+    configuration_filepath.write_text(rendered_configuration(configuration))
+
+    vpn_settings = editor_plugin.import_(
+        str(configuration_filepath)
+    ).get_setting_vpn()
+    imported_vpn_data = dict(
+        (key, vpn_settings.get_data_item(key))
+        for key in vpn_settings.get_data_keys()
+    )
+
+    assert read_inline_files(
+        BuildOpenVPNConnection.get_vpn_data(configuration)
+    ) == read_inline_files(imported_vpn_data)
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from protonvpn_nm_lib.core import cache_store
+from protonvpn_nm_lib.core.cache_store import CacheStore
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        fsyncs.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(cache_store.os, "fsync", fsync)
+    return fsyncs
+
+
+def test_write_and_read(tmp_path, fsyncs):
+    filepath = str(tmp_path / "cache.json")
+
+    CacheStore().write(filepath, "{\"a\": 1}")
+
+    assert CacheStore().read(filepath) == "{\"a\": 1}"
+    assert CacheStore().read(filepath, binary=True) == b"{\"a\": 1}"
+    assert len(fsyncs) == 1
+    assert os.listdir(str(tmp_path)) == ["cache.json"]
+
+
+def test_write_without_fsync(tmp_path, fsyncs):
+    filepath = str(tmp_path / "cache.bin")
+
+    CacheStore().write(filepath, b"\x00" * 16, fsync=False)
+
+    assert CacheStore().read(filepath, binary=True) == b"\x00" * 16
+    assert fsyncs == []
+
+
+def test_failed_write_keeps_previous_content(tmp_path, monkeypatch):
+    filepath = str(tmp_path / "cache.json")
+    CacheStore().write(filepath, "previous")
+
+    def replace(src, dst):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(cache_store.os, "replace", replace)
+    with pytest.raises(OSError):
+        CacheStore().write(filepath, "new")
+
+    assert CacheStore().read(filepath) == "previous"
+    assert os.listdir(str(tmp_path)) == ["cache.json"]
+
+
+def test_replaces_instead_of_truncating(tmp_path):
+    filepath = str(tmp_path / "cache.bin")
+    CacheStore().write(filepath, b"previous")
+
+    with open(filepath, "rb") as f:
+        CacheStore().write(filepath, b"new")
+        # An open (or mmaped) file keeps the previous content
+        assert f.read() == b"previous"
+
+    assert CacheStore().read(filepath, binary=True) == b"new"
+
+
+def test_unchanged_content_is_not_written(tmp_path, fsyncs):
+    filepath = str(tmp_path / "cache.json")
+    CacheStore().write(filepath, "content")
+    inode = os.stat(filepath).st_ino
+
+    CacheStore().write(filepath, "content")
+
+    assert os.stat(filepath).st_ino == inode
+    assert len(fsyncs) == 1
+
+
+def test_externally_modified_file_is_written(tmp_path):
+    filepath = str(tmp_path / "cache.json")
+    CacheStore().write(filepath, "content")
+    with open(filepath, "w") as f:
+        f.write("modified elsewhere")
+
+    CacheStore().write(filepath, "content")
+
+    assert CacheStore().read(filepath) == "content"
+
+
+def test_remove(tmp_path):
+    filepath = str(tmp_path / "cache.json")
+    CacheStore().write(filepath, "content")
+
+    CacheStore().remove(filepath)
+    CacheStore().remove(filepath)
+
+    assert not os.path.exists(filepath)
+    with pytest.raises(FileNotFoundError):
+        CacheStore().read(filepath)
+
+    # Written again even though the content didn't change
+    CacheStore().write(filepath, "content")
+    assert CacheStore().read(filepath) == "content"
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from protonvpn_nm_lib.core.cache_store import CacheStore
+from protonvpn_nm_lib.core.metadata.connection.default_connection_metadata import (
+    ConnectionMetadata
+)
+from protonvpn_nm_lib.enums import MetadataEnum, ProtocolEnum
+
+
+@pytest.fixture
+def metadata_files(monkeypatch, tmp_path):
+    metadata_files = dict(
+        (metadata_type, str(tmp_path / "{}.json".format(metadata_type.value)))
+        for metadata_type in ConnectionMetadata.METADATA_DICT
+    )
+    monkeypatch.setattr(ConnectionMetadata, "METADATA_DICT", metadata_files)
+    return metadata_files
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    writes = []
+    write = CacheStore.write
+
+    def count_write(self, filepath, content, fsync=True):
+        writes.append(filepath)
+        write(self, filepath, content, fsync)
+
+    monkeypatch.setattr(CacheStore, "write", count_write)
+    return writes
+
+
+def save_connection(connection_metadata):
+    connection_metadata.save_servername("CH#1")
+    connection_metadata.save_protocol(ProtocolEnum.UDP)
+    connection_metadata.save_display_server_ip("10.0.1.2")
+    connection_metadata.save_server_ip("10.0.1.1")
+    connection_metadata.save_connect_time()
+
+
+def load(filepath):
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def test_batch_writes_each_file_once(metadata_files, writes):
+    connection_metadata = ConnectionMetadata()
+
+    with connection_metadata.batch():
+        save_connection(connection_metadata)
+        assert writes == []
+        assert connection_metadata.get_connection_metadata(
+            MetadataEnum.CONNECTION
+        )["connected_server"] == "CH#1"
+
+    assert sorted(writes) == sorted([
+        metadata_files[MetadataEnum.CONNECTION],
+        metadata_files[MetadataEnum.LAST_CONNECTION],
+    ])
+    connection = load(metadata_files[MetadataEnum.CONNECTION])
+    assert connection["connected_server"] == "CH#1"
+    assert connection["connected_protocol"] == "udp"
+    assert connection["display_server_ip"] == "10.0.1.2"
+    assert "connected_time" in connection
+    assert load(metadata_files[MetadataEnum.LAST_CONNECTION]) == {
+        "connected_server": "CH#1",
+        "connected_protocol": "udp",
+        "last_connect_ip": "10.0.1.1",
+    }
+
+
+def test_same_content_as_without_batch(metadata_files, writes):
+    save_connection(ConnectionMetadata())
+    files = dict(
+        (metadata_type, load(filepath))
+        for metadata_type, filepath in metadata_files.items()
+        if metadata_type != MetadataEnum.SERVER_CACHE
+    )
+    unbatched_writes = len(writes)
+    connection_metadata = ConnectionMetadata()
+    connection_metadata.remove_all_metadata()
+    del writes[:]
+
+    with connection_metadata.batch():
+        save_connection(connection_metadata)
+
+    assert unbatched_writes > len(writes) == 2
+    for metadata_type, metadata in files.items():
+        batched_metadata = load(metadata_files[metadata_type])
+        batched_metadata.pop("connected_time", None)
+        metadata.pop("connected_time", None)
+        assert batched_metadata == metadata
+
+
+def test_nested_batch_writes_on_outer_exit(metadata_files, writes):
+    connection_metadata = ConnectionMetadata()
+
+    with connection_metadata.batch():
+        with connection_metadata.batch():
+            connection_metadata.save_servername("CH#1")
+        assert writes == []
+        connection_metadata.save_servername("CH#2")
+
+    assert len(writes) == 2
+    assert load(metadata_files[MetadataEnum.CONNECTION]) == {
+        "connected_server": "CH#2"
+    }
+
+
+def test_removed_in_batch(metadata_files, writes):
+    connection_metadata = ConnectionMetadata()
+    save_connection(connection_metadata)
+    del writes[:]
+
+    with connection_metadata.batch():
+        connection_metadata.remove_all_metadata()
+        assert connection_metadata.get_connection_metadata(
+            MetadataEnum.CONNECTION
+        ) == {}
+        connection_metadata.save_servername("CH#2")
+
+    assert len(writes) == 2
+    assert load(metadata_files[MetadataEnum.CONNECTION]) == {
+        "connected_server": "CH#2"
+    }
+    assert load(metadata_files[MetadataEnum.LAST_CONNECTION]) == {
+        "connected_server": "CH#2"
+    }
+
+
+def test_batch_is_written_on_error(metadata_files, writes):
+    connection_metadata = ConnectionMetadata()
+
+    with pytest.raises(ValueError):
+        with connection_metadata.batch():
+            connection_metadata.save_servername("CH#1")
+            raise ValueError()
+
+    assert load(metadata_files[MetadataEnum.CONNECTION]) == {
+        "connected_server": "CH#1"
+    }
@@ -0,0 +1,177 @@
+import pytest
+
+from protonvpn_nm_lib.core.dbus.network_manager_snapshot import (
+    NetworkManagerSnapshot
+)
+
+NM_PATH = "/org/freedesktop/NetworkManager"
+
+
+def network_manager_state():
+    return {
+        "connections": {
+            "/c/1": {
+                "connection": {
+                    "id": "wifi", "uuid": "uuid-1",
+                    "type": "802-11-wireless",
+                },
+            },
+            "/c/2": {
+                "connection": {
+                    "id": "ProtonVPN CH#1", "uuid": "uuid-2", "type": "vpn",
+                },
+                "vpn": {"data": {"dev": "proton0"}},
+            },
+        },
+        "active_connections": {
+            "/a/1": {"Id": "wifi", "Connection": "/c/1"},
+            "/a/2": {"Id": "ProtonVPN CH#1", "Connection": "/c/2"},
+        },
+        "devices": {
+            "/d/1": {"AvailableConnections": ["/c/1"]},
+        },
+    }
+
+
+class FakeProxyObject:
+    """Answer the NetworkManager calls made by the wrapper from the
+    state of the bus."""
+    def __init__(self, bus, path):
+        self.bus = bus
+        self.path = path
+
+    def get_dbus_method(self, member, dbus_interface=None):
+        def method(*args, reply_handler=None, error_handler=None):
+            self.bus.calls.append((self.path, member))
+            try:
+                reply = self.reply(member, dbus_interface, args)
+            except Exception as e:
+                if error_handler is None:
+                    raise
+                error_handler(e)
+            else:
+                if reply_handler is None:
+                    return reply
+                reply_handler(reply)
+
+        return method
+
+    def reply(self, member, dbus_interface, args):
+        import dbus
+
+        state = self.bus.state
+        if member == "GetAll" and self.path == NM_PATH:
+            return {
+                "ActiveConnections": list(state["active_connections"]),
+                "AllDevices": list(state["devices"]),
+            }
+        elif member == "GetAll" and args[0].endswith(".Active"):
+            return state["active_connections"][self.path]
+        elif member == "GetAll":
+            return state["devices"][self.path]
+        elif member == "ListConnections":
+            return (
+                list(state["connections"])
+                + state.get("removed_connections", [])
+            )
+        elif member == "GetSettings":
+            if self.path not in state["connections"]:
+                raise dbus.exceptions.DBusException("Removed connection")
+            return state["connections"][self.path]
+        elif member == "Delete":
+            del state["connections"][self.path]
+            return None
+
+        raise AssertionError("Unexpected call {}".format(member))
+
+
+class FakeBus:
+    def __init__(self):
+        self.calls = []
+        self.state = network_manager_state()
+
+    def get_object(self, bus_name, object_path):
+        return FakeProxyObject(self, object_path)
+
+
+@pytest.fixture
+def wrapper_class():
+    pytest.importorskip("dbus")
+    from protonvpn_nm_lib.core.dbus.dbus_network_manager_wrapper import (
+        NetworkManagerUnitWrapper
+    )
+    return NetworkManagerUnitWrapper
+
+
+def test_snapshot_indexes():
+    state = network_manager_state()
+    snapshot = NetworkManagerSnapshot(
+        state["connections"], state["active_connections"], state["devices"]
+    )
+
+    assert snapshot.connection_paths_by_id["ProtonVPN CH#1"] == "/c/2"
+    assert snapshot.connection_paths_by_uuid["uuid-1"] == "/c/1"
+    assert snapshot.connection_paths_by_vpn_device == {"proton0": ["/c/2"]}
+    assert snapshot.active_connection_paths_by_connection["/c/2"] == "/a/2"
+    assert snapshot.active_connection_paths_by_id["wifi"] == "/a/1"
+    assert snapshot.device_paths_by_connection == {"/c/1": "/d/1"}
+    assert snapshot.get_vpn_device("/c/1") is None
+
+
+def test_lookups_share_the_snapshot(wrapper_class):
+    bus = FakeBus()
+    wrapper = wrapper_class(bus)
+
+    result = wrapper.search_for_connection(
+        "ProtonVPN", interface_name="proton0", is_active=True,
+        return_active_conn_path=True
+    )
+    calls = len(bus.calls)
+    assert wrapper.get_connection_device_path("/c/1") == "/d/1"
+    assert wrapper.get_vpn_interface() is not None
+
+    assert result["active_conn_path"] == "/a/2"
+    # NetworkManager properties, connections, then one call per object
+    assert calls == 2 + 2 + 2 + 1
+    assert len(bus.calls) == calls
+
+
+def test_snapshot_is_taken_again_when_too_old(wrapper_class):
+    wrapper = wrapper_class(FakeBus())
+    snapshot = wrapper.get_snapshot()
+
+    assert wrapper.get_snapshot() is snapshot
+
+    snapshot.created_at -= wrapper_class.SNAPSHOT_TTL + 1
+    assert wrapper.get_snapshot() is not snapshot
+
+
+def test_changes_invalidate_the_snapshot(wrapper_class):
+    wrapper = wrapper_class(FakeBus())
+    snapshot = wrapper.get_snapshot()
+
+    wrapper.delete_connection("/c/1")
+
+    new_snapshot = wrapper.get_snapshot()
+    assert new_snapshot is not snapshot
+    assert "wifi" not in new_snapshot.connection_paths_by_id
+
+
+def test_removed_connections_are_left_out(wrapper_class):
+    bus = FakeBus()
+    # Listed, but removed before its settings are fetched
+    bus.state["removed_connections"] = ["/c/3"]
+
+    snapshot = wrapper_class(bus).get_snapshot()
+
+    assert sorted(snapshot.connections) == ["/c/1", "/c/2"]
+
+
+def test_all_snapshots_are_invalidated(wrapper_class):
+    wrappers = [wrapper_class(FakeBus()), wrapper_class(FakeBus())]
+    snapshots = [wrapper.get_snapshot() for wrapper in wrappers]
+
+    wrapper_class.invalidate_all_snapshots()
+
+    for wrapper, snapshot in zip(wrappers, snapshots):
+        assert wrapper.get_snapshot() is not snapshot
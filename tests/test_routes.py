@@ -0,0 +1,59 @@
+from ipaddress import IPv4Network, collapse_addresses, ip_network
+
+import pytest
+
+from protonvpn_nm_lib.core.killswitch.routes import (
+    complement_routes, prebuild_complement_routes
+)
+
+
+def expected_routes(excluded_ips):
+    routes = [IPv4Network("0.0.0.0/0")]
+    for excluded_ip in excluded_ips:
+        excluded = ip_network(excluded_ip, strict=False)
+        if excluded.version != 4:
+            continue
+
+        remaining = []
+        for route in routes:
+            if excluded.subnet_of(route):
+                remaining.extend(route.address_exclude(excluded))
+            elif not route.subnet_of(excluded):
+                remaining.append(route)
+        routes = remaining
+
+    return [str(route) for route in collapse_addresses(routes)]
+
+
+@pytest.mark.parametrize("excluded_ips", [
+    [],
+    ["185.159.157.1"],
+    ["185.159.157.1", "62.112.9.168", "104.245.144.186"],
+    ["0.0.0.0", "255.255.255.255"],
+    ["10.0.0.0/8", "10.1.2.3", "10.0.0.0/9"],
+    ["192.168.0.0/24", "192.168.1.0/24"],
+    ["192.168.1.7/16"],
+    ["185.159.157.1", "2a07:b944::2:1"],
+])
+def test_complement_routes(excluded_ips):
+    routes = complement_routes(excluded_ips)
+
+    assert list(routes) == expected_routes(excluded_ips)
+
+
+def test_excluding_everything():
+    assert complement_routes(["0.0.0.0/0"]) == ()
+    assert complement_routes(["0.0.0.0/1", "128.0.0.0/1"]) == ()
+
+
+def test_invalid_ip():
+    with pytest.raises(ValueError):
+        complement_routes(["185.159.157.1", "not an IP"])
+
+
+def test_prebuild_ignores_invalid_ips():
+    prebuild_complement_routes(["185.159.157.1", "not an IP"], ["10.0.0.1"])
+
+    assert complement_routes(["185.159.157.1", "10.0.0.1"]) == tuple(
+        expected_routes(["185.159.157.1", "10.0.0.1"])
+    )
@@ -0,0 +1,159 @@
+import json
+import mmap
+
+import pytest
+
+from protonvpn_nm_lib.core.servers import cache
+from protonvpn_nm_lib.core.servers.list import ServerList
+from protonvpn_nm_lib.core.session import session as session_module
+from protonvpn_nm_lib.core.session.session import APISession
+
+
+@pytest.fixture
+def server_list(make_logical):
+    server_list = ServerList()
+    server_list.update_logical_data({
+        "Code": 1000,
+        "LogicalServers": [
+            make_logical(
+                position,
+                Name="SE#{}".format(position),
+                EntryCountry="SE",
+                ExitCountry="CH" if position % 3 else "SE",
+                Features=position % 5,
+                Tier=position % 3,
+                Score=float(position % 7),
+                Load=position,
+                Status=int(position % 4 != 0),
+                Unknown={"kept": True},
+            ) for position in range(12)
+        ]
+    })
+    return server_list
+
+
+def binary_copy(server_list):
+    copy = ServerList()
+    copy.binary_loads(server_list.binary_dumps())
+    return copy
+
+
+def test_binary_round_trip(server_list):
+    copy = binary_copy(server_list)
+
+    assert isinstance(copy._servers, cache.MappedServerRecords)
+    assert copy.logicals_update_timestamp == \
+        server_list.logicals_update_timestamp
+    assert [s.data for s in copy] == [s.data for s in server_list]
+    assert json.loads(copy.json_dumps()) == json.loads(server_list.json_dumps())
+
+
+def test_binary_round_trip_of_partially_decoded_cache(server_list):
+    copy = binary_copy(server_list)
+    copy[3]
+    copy.update_load_data({"Code": 1000, "LogicalServers": [
+        {"ID": "id-3", "Load": 90, "Score": 9.5, "Status": 1},
+        {"ID": "id-4", "Load": 80, "Score": 8.5, "Status": 1},
+    ]})
+
+    second_copy = binary_copy(copy)
+
+    assert [s.data for s in second_copy] == [s.data for s in copy]
+    assert (second_copy["id-4"].load, second_copy["id-4"].score) == (80, 8.5)
+
+
+def test_binary_loads_rejects_other_files():
+    with pytest.raises(ValueError):
+        cache.loads(b"PVSL")
+    with pytest.raises(ValueError):
+        cache.loads(b"JSON" + bytes(cache.HEADER.size))
+
+
+def test_load_data_side_file(server_list):
+    copy = binary_copy(server_list)
+    enabled = copy.filter_by(enabled=True).sort_by_score()
+    server_list.update_load_data({"Code": 1000, "LogicalServers": [
+        {"ID": "id-0", "Load": 5, "Score": -1.0, "Status": 1},
+        {"ID": "id-5", "Load": 100, "Score": 50.0, "Status": 0},
+        {"ID": "unknown", "Load": 1, "Score": 1.0, "Status": 1},
+    ]})
+
+    assert copy.json_loads_load_data(server_list.json_dumps_load_data())
+
+    assert copy.loads_update_timestamp == server_list.loads_update_timestamp
+    assert [(s.id, s.load, s.score, s.enabled) for s in copy] == [
+        (s.id, s.load, s.score, s.enabled) for s in server_list
+    ]
+    assert enabled[0].id == "id-0"
+    assert "id-5" not in [s.id for s in enabled]
+    assert [s.id for s in enabled] == [
+        s.id for s in server_list.filter_by(enabled=True).sort_by_score()
+    ]
+
+
+def test_load_data_side_file_of_other_logicals(server_list):
+    copy = binary_copy(server_list)
+    load_data = json.loads(server_list.json_dumps_load_data())
+    load_data["LogicalsUpdateTimestamp"] += 1
+    load_data["LogicalServers"]["id-1"] = [99, 99.0, 0]
+
+    assert not copy.json_loads_load_data(json.dumps(load_data))
+    assert copy["id-1"].load == 1
+
+
+def mapped_copy(server_list, tmp_path):
+    filepath = tmp_path / "servers.bin"
+    filepath.write_bytes(server_list.binary_dumps())
+    with open(str(filepath), "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    copy = ServerList()
+    copy.binary_loads(buffer)
+    return copy
+
+
+def test_mapped_cache_is_decoded_lazily(server_list, tmp_path):
+    copy = mapped_copy(server_list, tmp_path)
+    records = copy._servers
+
+    def decoded_positions():
+        return [
+            position for position in range(len(records))
+            if records.is_decoded(position)
+        ]
+
+    view = copy.filter_by(exit_country="SE", enabled=True)
+    assert len(view) == 3
+    assert decoded_positions() == []
+
+    assert [s.data for s in view] == [
+        s.data for s in server_list.filter_by(exit_country="SE", enabled=True)
+    ]
+    assert decoded_positions() == [3, 6, 9]
+    assert copy["id-3"] is view[0]
+
+
+def test_truncated_cache_is_rejected(server_list):
+    with pytest.raises(ValueError):
+        cache.loads(server_list.binary_dumps()[:-1000])
+
+
+def test_json_cache_is_migrated(server_list, monkeypatch, tmp_path):
+    for name, filename in [
+        ("CACHED_SERVERLIST", "servers.json"),
+        ("CACHED_SERVERLIST_BINARY", "servers.bin"),
+        ("CACHED_SERVERLIST_LOADS", "servers_loads.json"),
+    ]:
+        monkeypatch.setattr(session_module, name, str(tmp_path / filename))
+    (tmp_path / "servers.json").write_text(server_list.json_dumps())
+    session = APISession.__new__(APISession)
+
+    migrated = ServerList()
+    session._APISession__load_servers_cache(migrated)
+    mapped = ServerList()
+    session._APISession__load_servers_cache(mapped)
+
+    assert not (tmp_path / "servers.json").exists()
+    assert isinstance(mapped._servers, cache.MappedServerRecords)
+    assert [s.data for s in mapped] == [s.data for s in server_list]
+    assert [s.data for s in migrated] == [s.data for s in server_list]
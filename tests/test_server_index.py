@@ -0,0 +1,129 @@
+import itertools
+
+import pytest
+
+from protonvpn_nm_lib.core.servers.index import ServerCriteria, ServerListIndex
+from protonvpn_nm_lib.core.servers.list import LogicalServer
+from protonvpn_nm_lib.enums import FeatureEnum
+
+COUNTRIES = ["CH", "SE", "IS", "us"]
+FEATURES = [
+    FeatureEnum.NORMAL,
+    FeatureEnum.SECURE_CORE,
+    FeatureEnum.P2P,
+    FeatureEnum.P2P | FeatureEnum.STREAMING,
+    FeatureEnum.TOR | FeatureEnum.P2P,
+]
+
+
+@pytest.fixture(scope="module")
+def logicals(make_logical):
+    return [
+        LogicalServer(make_logical(
+            position,
+            Name="{}#{}".format(country, position),
+            EntryCountry=country,
+            ExitCountry=country,
+            Features=int(features),
+            Tier=tier,
+            Score=position % 7,
+            Status=status,
+        )) for position, (country, features, tier, status) in enumerate(
+            itertools.product(COUNTRIES, FEATURES, [0, 1, 2], [0, 1])
+        )
+    ]
+
+
+CRITERIA = [
+    {},
+    {"max_tier": 1},
+    {"exit_country": "ch"},
+    {"exit_country": "US"},
+    {"exit_country": "XX"},
+    {"features": FeatureEnum.P2P},
+    {"features": FeatureEnum.P2P | FeatureEnum.STREAMING},
+    {"excluded_features": FeatureEnum.SECURE_CORE | FeatureEnum.TOR},
+    {"features": FeatureEnum.IPv6},
+    {"features": 1 << 10},
+    {"name": "se#33"},
+    {"name": "SE#0"},
+    {"enabled": True},
+    {
+        "exit_country": "IS", "features": FeatureEnum.P2P,
+        "excluded_features": FeatureEnum.TOR, "max_tier": 2,
+        "enabled": True
+    },
+]
+
+
+@pytest.mark.parametrize("kwargs", CRITERIA)
+def test_index_matches_condition(logicals, kwargs):
+    criteria = ServerCriteria(**kwargs)
+    index = ServerListIndex(logicals)
+    condition = criteria.as_condition()
+
+    expected = [
+        position for position, logical in enumerate(logicals)
+        if condition(logical)
+    ]
+    assert index.lookup(criteria) == expected
+    assert sorted(index.lookup(criteria, ordered=False)) == expected
+    assert [
+        position for position in range(len(logicals))
+        if index.matches(criteria, position)
+    ] == expected
+
+
+@pytest.mark.parametrize("first, second", [
+    ({"exit_country": "CH"}, {"exit_country": "SE"}),
+    ({"name": "CH#1"}, {"name": "CH#2"}),
+    ({"features": FeatureEnum.P2P}, {"excluded_features": FeatureEnum.P2P}),
+])
+def test_contradicting_criteria_match_nothing(logicals, first, second):
+    criteria = ServerCriteria(**first).merge(ServerCriteria(**second))
+    index = ServerListIndex(logicals)
+
+    assert criteria.empty
+    assert index.lookup(criteria) == []
+    assert not any(map(criteria.as_condition(), logicals))
+
+
+def test_merged_criteria(logicals):
+    criteria = ServerCriteria(max_tier=2, exit_country="CH").merge(
+        ServerCriteria(max_tier=1, features=FeatureEnum.P2P, enabled=True)
+    )
+    index = ServerListIndex(logicals)
+
+    assert not criteria.empty
+    assert index.lookup(criteria) == [
+        position for position, logical in enumerate(logicals)
+        if logical.exit_country == "CH" and logical.tier <= 1
+        and logical.has_feature(FeatureEnum.P2P) and logical.enabled
+    ]
+
+
+def test_patch(logicals):
+    index = ServerListIndex(logicals)
+    criteria = ServerCriteria(enabled=True)
+    disabled = index.lookup(ServerCriteria())[0]
+    assert not index.matches(criteria, disabled)
+
+    assert index.patch(disabled, 42.0, True) == (logicals[disabled].score, True)
+    assert index.matches(criteria, disabled)
+    assert disabled in index.lookup(criteria)
+    assert index.patch(disabled, 42.0, True) == (None, False)
+
+
+def test_duplicate_names(make_logical):
+    logicals = [
+        LogicalServer(make_logical(position, Name=name))
+        for position, name in enumerate(["CH#1", "SE#1", "ch#1"])
+    ]
+    criteria = ServerCriteria(name="CH#1")
+    index = ServerListIndex(logicals)
+
+    assert index.lookup(criteria) == [0, 2]
+    assert [
+        position for position in range(len(logicals))
+        if index.matches(criteria, position)
+    ] == [0, 2]
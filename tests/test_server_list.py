@@ -0,0 +1,131 @@
+import types
+
+import pytest
+
+from protonvpn_nm_lib.core.environment import ExecutionEnvironment
+from protonvpn_nm_lib.core.servers.list import ServerList
+
+
+def make_server_list(logicals):
+    server_list = ServerList()
+    server_list.update_logical_data(
+        {"Code": 1000, "LogicalServers": logicals}
+    )
+    return server_list
+
+
+def update_load(server_list, logical_id, **load):
+    logical = {"ID": logical_id}
+    logical.update(load)
+    server_list.update_load_data({"Code": 1000, "LogicalServers": [logical]})
+
+
+def test_enabling_server_in_unsorted_view(make_logical):
+    server_list = make_server_list([
+        make_logical(position, Status=position % 2)
+        for position in range(20)
+    ])
+    enabled = server_list.filter_by(enabled=True)
+    assert [s.id for s in enabled] == [
+        "id-{}".format(position) for position in range(1, 20, 2)
+    ]
+
+    update_load(server_list, "id-4", Status=1)
+
+    assert [s.id for s in enabled] == [
+        "id-{}".format(position) for position in [1, 3, 4] + list(
+            range(5, 20, 2)
+        )
+    ]
+
+
+def test_enabling_server_in_reversed_view(make_logical):
+    server_list = make_server_list([
+        make_logical(position, Status=position % 2)
+        for position in range(20)
+    ])
+    enabled = server_list.filter_by(enabled=True)
+    enabled.sort(reverse=True)
+
+    update_load(server_list, "id-4", Status=1)
+    update_load(server_list, "id-7", Status=0)
+
+    assert [s.id for s in enabled] == [
+        "id-{}".format(position)
+        for position in [19, 17, 15, 13, 11, 9, 5, 4, 3, 1]
+    ]
+
+
+def test_score_update_in_sorted_view(make_logical):
+    server_list = make_server_list([
+        make_logical(position) for position in range(20)
+    ])
+    by_score = server_list.filter_by(enabled=True).sort_by_score()
+
+    update_load(server_list, "id-2", Score=100)
+    update_load(server_list, "id-15", Score=-1)
+
+    ids = [s.id for s in by_score]
+    assert ids[0] == "id-15"
+    assert ids[-1] == "id-2"
+    scores = [s.score for s in by_score]
+    assert scores == sorted(scores)
+
+
+def test_updating_copy_leaves_list_and_views_untouched(make_logical):
+    server_list = make_server_list([
+        make_logical(position) for position in range(10)
+    ])
+    by_score = server_list.filter_by(enabled=True).sort_by_score()
+    ids = [s.id for s in by_score]
+
+    copy = server_list.copy()
+    update_load(copy, "id-9", Score=-1)
+    update_load(copy, "id-0", Status=0)
+
+    assert [s.id for s in by_score] == ids
+    assert (server_list["id-9"].score, server_list["id-0"].enabled) == (
+        9, True
+    )
+    assert [s.id for s in copy.filter_by(enabled=True).sort_by_score()] == [
+        "id-9"
+    ] + ids[1:-1]
+
+
+@pytest.fixture
+def vpn_tier(monkeypatch):
+    monkeypatch.setattr(
+        ExecutionEnvironment, "api_session",
+        property(lambda self: types.SimpleNamespace(vpn_tier=1))
+    )
+    return 1
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 10, 100])
+@pytest.mark.parametrize("exit_country", [None, "SE"])
+def test_fastest_servers_are_the_sorted_ones(
+    make_logical, vpn_tier, k, exit_country
+):
+    server_list = make_server_list([
+        make_logical(
+            position,
+            ExitCountry="SE" if position % 3 else "CH",
+            Tier=position % 3,
+            Score=float((position * 7) % 11),
+            Status=int(position % 5 != 0),
+        ) for position in range(40)
+    ])
+    if exit_country is not None:
+        server_list = server_list.filter_by(exit_country=exit_country)
+
+    # The sort is stable, so servers with the same score are in list order
+    expected = sorted(
+        (
+            server for server in server_list
+            if server.enabled and server.tier <= vpn_tier
+        ), key=lambda server: server.score
+    )[:k]
+
+    assert server_list.get_fastest_servers(k) == expected
+    if k > 0:
+        assert server_list.get_fastest_server() is expected[0]
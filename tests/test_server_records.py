@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from protonvpn_nm_lib.core.servers.list import LogicalServer, PhysicalServer
+from protonvpn_nm_lib.enums import FeatureEnum
+
+
+def test_records_have_no_dict(make_logical):
+    server = LogicalServer(make_logical(1))
+
+    for record in (server, server.physical_servers[0]):
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.unknown = True
+
+
+def test_fields(make_logical):
+    server = LogicalServer(make_logical(
+        1, HostCountry="DE", Region="Zurich", Tier=1, Load=42, Score=1.5
+    ))
+    physical_server = server.physical_servers[0]
+
+    assert (server.id, server.name, server.entry_country) == (
+        "id-1", "CH#1", "CH"
+    )
+    assert (server.exit_country, server.host_country) == ("CH", "DE")
+    assert (server.region, server.city, server.tier) == (
+        "Zurich", "Zurich", 1
+    )
+    assert (server.load, server.score, server.enabled) == (42, 1.5, True)
+    assert (server.latitude, server.longitude) == (47.4, 8.5)
+    assert (physical_server.entry_ip, physical_server.exit_ip) == (
+        "10.0.1.1", "10.0.1.2"
+    )
+    assert (physical_server.domain, physical_server.label) == (
+        "node-ch-1.protonvpn.net", "0"
+    )
+
+
+def test_countries_are_shared(make_logical):
+    servers = [
+        LogicalServer(json.loads(json.dumps(make_logical(position))))
+        for position in range(2)
+    ]
+
+    assert servers[0].exit_country is servers[1].exit_country
+
+
+@pytest.mark.parametrize("ip", ["2a07:b944::2:1", "010.0.0.1", None])
+def test_unpackable_ips_are_kept(make_logical, ip):
+    physical_server = PhysicalServer(dict(
+        make_logical(1)["Servers"][0], EntryIP=ip
+    ))
+
+    assert physical_server.entry_ip == ip
+
+
+def test_data_is_the_payload(make_logical):
+    payload = make_logical(
+        1, Unknown={"kept": True},
+        Servers=[{
+            "EntryIP": "10.0.1.1", "ExitIP": "2a07:b944::2:1",
+            "Domain": "node-ch-1.protonvpn.net", "Status": 1,
+            "Generation": 0, "Unknown": [1, 2],
+        }]
+    )
+    for key in LogicalServer.OPTIONAL_KEYS:
+        del payload[key]
+
+    data = LogicalServer(payload).data
+
+    assert data == payload
+    assert json.dumps(data, sort_keys=True) == json.dumps(
+        payload, sort_keys=True
+    )
+
+
+@pytest.mark.parametrize("features", range(1 << 5))
+def test_features(make_logical, features):
+    server = LogicalServer(make_logical(1, Features=features))
+
+    assert server.features_bitmap == features
+    assert server.features == [
+        feature for feature in FeatureEnum.list()
+        if features & feature or feature == 0
+    ]
+    # Decoded once
+    assert server.features is server.features
+    for feature in FeatureEnum.list():
+        assert server.has_feature(feature) == (feature in server.features)
+
+
+def test_has_several_features(make_logical):
+    server = LogicalServer(make_logical(
+        1, Features=FeatureEnum.P2P | FeatureEnum.STREAMING
+    ))
+
+    assert server.has_feature(FeatureEnum.P2P | FeatureEnum.STREAMING)
+    assert server.has_feature(FeatureEnum.NORMAL)
+    assert not server.has_feature(FeatureEnum.P2P | FeatureEnum.TOR)
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from protonvpn_nm_lib.core.environment import ExecutionEnvironment
+from protonvpn_nm_lib.core.servers import ServerList
+from protonvpn_nm_lib.core.session import session as session_module
+from protonvpn_nm_lib.core.session.session import APISession
+from protonvpn_nm_lib.enums import APIEndpointEnum
+
+ETAG = "\"logicals-1\""
+LAST_MODIFIED = "Sat, 17 Oct 2026 07:00:00 GMT"
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """Serve the logicals, or a 304 if they are not modified."""
+    body = None
+    requests = None
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api(make_logical):
+    handler = type("Handler", (StubAPIHandler,), {
+        "requests": [],
+        "body": json.dumps({
+            "Code": 1000,
+            "LogicalServers": [make_logical(position) for position in range(3)]
+        }).encode(),
+    })
+    server = HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield types.SimpleNamespace(
+        url="http://127.0.0.1:{}".format(server.server_port),
+        requests=handler.requests
+    )
+
+    server.shutdown()
+    server.server_close()
+
+
+def make_proton_session(api_url, tmp_path):
+    from proton.api import Session
+
+    try:
+        proton_session = Session(
+            api_url, log_dir_path=str(tmp_path), cache_dir_path=str(tmp_path),
+            tls_pinning=False
+        )
+    except TypeError:
+        # proton-client < 0.7
+        proton_session = Session(api_url, TLSPinning=False)
+
+    proton_session.enable_alternative_routing = False
+    return proton_session
+
+
+@pytest.fixture
+def cache_filepath(monkeypatch, tmp_path):
+    cache_filepath = str(tmp_path / "servers.bin")
+    monkeypatch.setattr(
+        session_module, "CACHED_SERVERLIST_BINARY", cache_filepath
+    )
+    monkeypatch.setattr(
+        session_module, "CACHED_SERVERLIST_LOADS",
+        str(tmp_path / "servers_loads.json")
+    )
+    return cache_filepath
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path, api, cache_filepath):
+    monkeypatch.setattr(
+        ExecutionEnvironment, "netzone",
+        property(lambda self: types.SimpleNamespace(address=None))
+    )
+    monkeypatch.setattr(
+        APISession, "_APISession__ensure_that_api_can_be_reached",
+        lambda self: True
+    )
+    monkeypatch.setattr(
+        APISession, "_APISession__ensure_that_alt_routing_can_be_skipped",
+        lambda self: None
+    )
+
+    # No keyring nor cache service, and the stub API
+    session = APISession.__new__(APISession)
+    session._APISession__proton_api = make_proton_session(api.url, tmp_path)
+    session._APISession__last_response = threading.local()
+    session._APISession__pending_validators = {}
+    session._APISession__install_response_hook()
+    session._APISession__vpn_logicals = ServerList()
+    session._APISession__logicals_checked_timestamp = 0.
+    session._APISession__refresh_scheduler = None
+    session._APISession__next_fetch_logicals = 0.
+    session._APISession__next_fetch_load = float("inf")
+    return session
+
+
+def update_servers(session):
+    # Without the error strategy, which only remaps API errors
+    return APISession.__dict__["update_servers_if_needed"]._func(session)
+
+
+def load_validators(cache_filepath):
+    with open(cache_filepath + ".validators") as f:
+        return json.load(f)
+
+
+def test_validators_are_saved(session, api, cache_filepath):
+    update_servers(session)
+
+    assert "If-None-Match" not in api.requests[0]
+    assert [s.id for s in session._APISession__vpn_logicals] == [
+        "id-0", "id-1", "id-2"
+    ]
+    assert os.path.isfile(cache_filepath)
+    assert load_validators(cache_filepath) == {
+        "ETag": ETAG, "Last-Modified": LAST_MODIFIED
+    }
+
+
+def test_validators_are_sent(session, api):
+    update_servers(session)
+    session._APISession__next_fetch_logicals = 0.
+
+    update_servers(session)
+
+    assert len(api.requests) == 2
+    assert api.requests[1]["If-None-Match"] == ETAG
+    assert api.requests[1]["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_not_modified_only_touches_the_timestamp(
+    session, api, cache_filepath
+):
+    update_servers(session)
+    server_list = session._APISession__vpn_logicals
+    cache_stat = os.stat(cache_filepath)
+    session._APISession__next_fetch_logicals = 0.
+
+    update_servers(session)
+
+    assert len(api.requests) == 2
+    assert session._APISession__vpn_logicals is server_list
+    assert os.stat(cache_filepath) == cache_stat
+    checked_timestamp = session._APISession__logicals_checked_timestamp
+    assert checked_timestamp > server_list.logicals_update_timestamp
+    assert load_validators(cache_filepath) == {
+        "ETag": ETAG, "Last-Modified": LAST_MODIFIED,
+        "CheckedTimestamp": checked_timestamp,
+    }
+    assert session._APISession__next_fetch_logicals > checked_timestamp
+
+
+def test_proton_client_raises_the_not_modified_status(session, api):
+    proton_session = session._APISession__proton_api
+
+    with pytest.raises(Exception) as e:
+        proton_session.api_request(
+            APIEndpointEnum.LOGICALS.value,
+            additional_headers={"If-None-Match": ETAG}
+        )
+
+    assert e.value.code == 304
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+
+from protonvpn_nm_lib.core.environment import ExecutionEnvironment
+from protonvpn_nm_lib.core.session.session import APISession
+from protonvpn_nm_lib.enums import APIEndpointEnum, KeyringEnum
+
+RESOURCES = [
+    "_vpn_data", "servers", "clientconfig", "streaming", "streaming_icons"
+]
+
+
+@pytest.fixture
+def keyring(monkeypatch):
+    keyring = {}
+    monkeypatch.setattr(
+        ExecutionEnvironment, "keyring", property(lambda self: keyring)
+    )
+    return keyring
+
+
+@pytest.fixture
+def session(monkeypatch, keyring):
+    for name in ["settings", "connection_backend"]:
+        monkeypatch.setattr(
+            ExecutionEnvironment, name, property(lambda self: None)
+        )
+
+    # No API session nor cache service
+    session = APISession.__new__(APISession)
+    session._APISession__proton_user = "user"
+    session._APISession__cache_service = None
+    session._APISession__refresh_lock = threading.Lock()
+    session._APISession__refresh_generation = 0
+    return session
+
+
+class ProtonAPI:
+    """Proton session whose access token expired."""
+
+    def __init__(self, error_class=None):
+        self.error_class = error_class
+        self.refreshes = 0
+        # Both requests get a 401 before the session is refreshed
+        self.unauthorized = threading.Barrier(2, timeout=5)
+
+    def api_request(self, endpoint, **kwargs):
+        if self.refreshes == 0:
+            self.unauthorized.wait()
+            raise self.error_class({
+                "Code": 401, "Error": "Invalid access token", "Headers": {}
+            })
+
+        return {"Code": 1000, "Sessions": [{"ID": endpoint}]}
+
+    def refresh(self):
+        # Long enough for the other thread to wait for it
+        time.sleep(0.1)
+        self.refreshes += 1
+
+    def dump(self):
+        return {"refreshes": self.refreshes}
+
+
+def patch_resources(monkeypatch, **fetchers):
+    def make_property(fetch):
+        return property(lambda self: fetch())
+
+    for name in RESOURCES:
+        monkeypatch.setattr(APISession, name, make_property(
+            fetchers.get(name, lambda: None)
+        ))
+
+    notifications = fetchers.get("notifications", lambda: None)
+    monkeypatch.setattr(
+        APISession, "get_all_notifications", lambda self: notifications()
+    )
+
+
+def prefetch(session):
+    session._APISession__prefetch()
+
+
+def test_resources_are_fetched_concurrently(session, monkeypatch):
+    # Fetching sequentially would break the barrier
+    barrier = threading.Barrier(5, timeout=5)
+
+    def fetch():
+        barrier.wait()
+
+    patch_resources(
+        monkeypatch, _vpn_data=fetch, servers=fetch, clientconfig=fetch,
+        streaming=fetch, notifications=fetch
+    )
+
+    prefetch(session)
+
+    assert not barrier.broken
+
+
+def test_optional_resource_errors_are_ignored(session, monkeypatch):
+    def fail():
+        raise Exception("Unreachable API")
+
+    fetched = []
+    patch_resources(
+        monkeypatch, servers=fail, streaming=fail, notifications=fail,
+        _vpn_data=lambda: fetched.append("VPN data")
+    )
+
+    prefetch(session)
+
+    assert fetched == ["VPN data"]
+
+
+def test_vpn_data_errors_are_raised(session, monkeypatch):
+    def fail():
+        raise ValueError("Invalid VPN data")
+
+    patch_resources(monkeypatch, _vpn_data=fail)
+
+    with pytest.raises(ValueError):
+        prefetch(session)
+
+
+def test_slow_optional_resources_complete_in_background(
+    session, monkeypatch
+):
+    release = threading.Event()
+    servers_fetched = threading.Event()
+
+    def fetch_servers():
+        release.wait(5)
+        servers_fetched.set()
+
+    patch_resources(monkeypatch, servers=fetch_servers)
+    session.PREFETCH_TIMEOUT = 0.1
+
+    prefetch(session)
+
+    assert not servers_fetched.is_set()
+    release.set()
+    assert servers_fetched.wait(5)
+
+
+def test_concurrent_refreshes_are_serialized(session, keyring):
+    proton_api = ProtonAPI()
+    session._APISession__proton_api = proton_api
+    refresh = APISession.__dict__["refresh"]._func
+
+    threads = [
+        threading.Thread(
+            target=refresh, args=(session,),
+            kwargs={"if_not_refreshed_since": 0}
+        ) for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert proton_api.refreshes == 1
+    assert session.refresh_generation == 1
+    assert keyring[KeyringEnum.DEFAULT_KEYRING_SESSIONDATA.value] == {
+        "refreshes": 1
+    }
+
+
+def test_concurrent_unauthorized_requests_refresh_once(
+    session, monkeypatch, keyring
+):
+    proton_exceptions = pytest.importorskip("proton.exceptions")
+    if not hasattr(proton_exceptions, "ProtonAPIError"):
+        pytest.skip("proton-client < 0.7")
+
+    proton_api = ProtonAPI(proton_exceptions.ProtonAPIError)
+    session._APISession__proton_api = proton_api
+    sessions = []
+    patch_resources(
+        monkeypatch,
+        servers=lambda: sessions.append(session.get_sessions()),
+        clientconfig=lambda: sessions.append(session.get_sessions()),
+    )
+
+    prefetch(session)
+
+    assert proton_api.refreshes == 1
+    assert sessions == [[{"ID": APIEndpointEnum.SESSIONS.value}]] * 2
@@ -0,0 +1,59 @@
+import pytest
+
+from protonvpn_nm_lib.core.session import session as session_module
+from protonvpn_nm_lib.core.session.session import APISession
+from protonvpn_nm_lib.exceptions import APISessionIsNotValidError
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        session_module, "STREAMING_ICONS_CACHE_TIME_PATH",
+        str(tmp_path / "streaming_icons.json")
+    )
+
+    # No keyring, API session, refresh scheduler nor cache service
+    session = APISession.__new__(APISession)
+    session._APISession__streaming_icons = None
+    session._APISession__cache_service = None
+    session._APISession__refresh_scheduler = None
+    return session
+
+
+def test_streaming_icons_are_loaded_and_refreshed(session, monkeypatch):
+    updates = []
+    monkeypatch.setattr(
+        APISession, "update_streaming_icons_if_needed",
+        lambda self: updates.append("streaming_icons")
+    )
+
+    streaming_icons = session.streaming_icons
+
+    assert streaming_icons is not None
+    assert updates == ["streaming_icons"]
+    assert session.get_next_fetch("streaming_icons") is not None
+
+
+def test_streaming_icons_refresh_errors_are_ignored(session, monkeypatch):
+    def update():
+        raise ValueError("Invalid streaming icons")
+
+    monkeypatch.setattr(
+        APISession, "update_streaming_icons_if_needed",
+        lambda self: update()
+    )
+
+    assert session.streaming_icons is not None
+
+
+def test_streaming_icons_invalid_session_is_raised(session, monkeypatch):
+    def update():
+        raise APISessionIsNotValidError("Logged out")
+
+    monkeypatch.setattr(
+        APISession, "update_streaming_icons_if_needed",
+        lambda self: update()
+    )
+
+    with pytest.raises(APISessionIsNotValidError):
+        session.streaming_icons
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from protonvpn_nm_lib.core.subprocess_wrapper import SubprocessWrapper
+
+pytestmark = pytest.mark.skipif(
+    os.geteuid() != 0, reason="executables have to be root owned"
+)
+
+
+def write_executable(path, output):
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\necho {}\n".format(output))
+    os.chmod(path, 0o755)
+
+
+@pytest.fixture
+def bin_dir(monkeypatch, tmp_path):
+    os.chmod(str(tmp_path), 0o755)
+    write_executable(str(tmp_path / "nmcli"), "nmcli-1")
+    monkeypatch.setenv("PATH", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    searches = []
+    search = SubprocessWrapper.__dict__[
+        "_SubprocessWrapper__search_for_matching_executable"
+    ]
+
+    def search_for_matching_executable(self, binary):
+        searches.append(binary)
+        return search(self, binary)
+
+    monkeypatch.setattr(
+        SubprocessWrapper,
+        "_SubprocessWrapper__search_for_matching_executable",
+        search_for_matching_executable
+    )
+    return searches
+
+
+def run_nmcli(subprocess):
+    return subprocess.run(
+        ["nmcli"], stdout=SubprocessWrapper.PIPE, check=True
+    ).stdout.decode().strip()
+
+
+def test_executables_are_resolved_when_first_run(bin_dir, searches):
+    subprocess = SubprocessWrapper()
+
+    assert searches == []
+
+    assert run_nmcli(subprocess) == "nmcli-1"
+    assert run_nmcli(subprocess) == "nmcli-1"
+    assert searches == ["nmcli"]
+    assert subprocess._path_to_binaries["nmcli"][0] == str(
+        bin_dir / "nmcli"
+    )
+
+
+def test_replaced_executable_is_resolved_again(bin_dir, searches):
+    subprocess = SubprocessWrapper()
+    run_nmcli(subprocess)
+
+    # Replaced by a new inode, so with a new stat signature
+    write_executable(str(bin_dir / "nmcli.new"), "nmcli-2")
+    os.rename(str(bin_dir / "nmcli.new"), str(bin_dir / "nmcli"))
+
+    assert run_nmcli(subprocess) == "nmcli-2"
+    assert searches == ["nmcli", "nmcli"]
+
+
+def test_removed_executable_is_not_run(bin_dir, searches):
+    subprocess = SubprocessWrapper()
+    run_nmcli(subprocess)
+
+    os.remove(str(bin_dir / "nmcli"))
+
+    with pytest.raises(RuntimeError):
+        run_nmcli(subprocess)
+
+
+def test_unacceptable_binary(bin_dir, searches):
+    with pytest.raises(ValueError):
+        SubprocessWrapper().run(["sh", "-c", "true"])
+
+    assert searches == []